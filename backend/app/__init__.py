@@ -7,11 +7,12 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_socketio import SocketIO
-from redis import Redis
+from app.utils.instrumentation import InstrumentedRedis
+from app.utils.replica import RoutingSession
 import os
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 socketio = SocketIO()
@@ -34,30 +35,143 @@ def create_app(config_name=None):
         ),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         
+        # Optional read replica for list and analytics endpoints (see
+        # app.utils.replica); users read from the primary for
+        # REPLICA_STICKY_SECONDS after their own writes
+        SQLALCHEMY_REPLICA_URI=os.getenv('DATABASE_REPLICA_URL'),
+        REPLICA_STICKY_SECONDS=int(os.getenv('REPLICA_STICKY_SECONDS', 5)),
+        REPLICA_HEALTH_INTERVAL=float(os.getenv('REPLICA_HEALTH_INTERVAL', 10)),
+        REPLICA_MAX_LAG=float(os.getenv('REPLICA_MAX_LAG', 5)),
+        
+        # Connection pool (see app.utils.pool). WEB_CONCURRENCY and
+        # WORKER_CONNECTIONS are exported by gunicorn.conf.py in production
+        DB_MAX_CONNECTIONS=int(os.getenv('DB_MAX_CONNECTIONS', 100)),
+        DB_POOL_SIZE=int(os.environ['DB_POOL_SIZE']) if os.getenv('DB_POOL_SIZE') else None,
+        DB_MAX_OVERFLOW=int(os.environ['DB_MAX_OVERFLOW']) if os.getenv('DB_MAX_OVERFLOW') else None,
+        DB_POOL_RECYCLE=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        DB_POOL_TIMEOUT=int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        WEB_CONCURRENCY=int(os.getenv('WEB_CONCURRENCY', 1)),
+        WORKER_CONNECTIONS=int(os.getenv('WORKER_CONNECTIONS', 1000)),
+        
         # Security
         SECRET_KEY=os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production'),
         JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production'),
         JWT_ACCESS_TOKEN_EXPIRES=3600,  # 1 hour
         JWT_REFRESH_TOKEN_EXPIRES=2592000,  # 30 days
         
+        # Password hashing (werkzeug method string, e.g. 'scrypt:32768:8:1'
+        # or 'pbkdf2:sha256:600000'); offloaded to OS threads under eventlet,
+        # at most PASSWORD_HASH_CONCURRENCY at a time
+        PASSWORD_HASH_METHOD=os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+        PASSWORD_HASH_OFFLOAD=os.getenv('PASSWORD_HASH_OFFLOAD', 'true').lower() == 'true',
+        PASSWORD_HASH_CONCURRENCY=int(os.getenv('PASSWORD_HASH_CONCURRENCY', os.cpu_count() or 1)),
+        
+        # Token blocklist (in-process Bloom filter synced over Redis pub/sub)
+        JWT_BLOCKLIST_SUBSCRIBE=os.getenv('JWT_BLOCKLIST_SUBSCRIBE', 'true').lower() == 'true',
+        JWT_BLOCKLIST_CAPACITY=int(os.getenv('JWT_BLOCKLIST_CAPACITY', 100000)),
+        JWT_BLOCKLIST_ERROR_RATE=float(os.getenv('JWT_BLOCKLIST_ERROR_RATE', 0.001)),
+        JWT_BLOCKLIST_RESYNC_INTERVAL=int(os.getenv('JWT_BLOCKLIST_RESYNC_INTERVAL', 3600)),
+        # Reload interval without pub/sub; tokens revoked by another process
+        # are accepted here for up to this long
+        JWT_BLOCKLIST_POLL_INTERVAL=int(os.getenv('JWT_BLOCKLIST_POLL_INTERVAL', 10)),
+        
         # Redis
         REDIS_URL=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
         
+        # Socket.IO fan-out between worker processes (empty to run a single
+        # process without one); presence heartbeats expire after PRESENCE_TTL
+        SOCKETIO_MESSAGE_QUEUE=os.getenv(
+            'SOCKETIO_MESSAGE_QUEUE', os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        ),
+        PRESENCE_TTL=int(os.getenv('PRESENCE_TTL', 60)),
+        # Engine.IO transports. A long-polling session has to reach the same
+        # process on every request, which gunicorn cannot guarantee with
+        # several workers on one port, so only WebSocket is offered unless
+        # this is set to polling,websocket for a single-process server
+        SOCKETIO_TRANSPORTS=os.getenv('SOCKETIO_TRANSPORTS', 'websocket').split(','),
+        
+        # Analytics (task writes invalidate the cache, so this can be long)
+        DASHBOARD_CACHE_TTL=int(os.getenv('DASHBOARD_CACHE_TTL', 86400)),
+        
+        # WebSocket task events are buffered and merged for this many seconds
+        TASK_EVENT_WINDOW=float(os.getenv('TASK_EVENT_WINDOW', 0.05)),
+        
+        # Rows per chunk of GET /api/tasks/export
+        EXPORT_CHUNK_SIZE=int(os.getenv('EXPORT_CHUNK_SIZE', 1000)),
+        # Rows per INSERT (COPY on PostgreSQL) and transaction of task imports
+        IMPORT_BATCH_SIZE=int(os.getenv('IMPORT_BATCH_SIZE', 1000)),
+        
+        # Account deletion (see app.services.accounts): tasks per DELETE
+        # chunk, and the task count above which it runs in the background
+        ACCOUNT_DELETE_CHUNK_SIZE=int(os.getenv('ACCOUNT_DELETE_CHUNK_SIZE', 1000)),
+        ACCOUNT_DELETE_SYNC_LIMIT=int(os.getenv('ACCOUNT_DELETE_SYNC_LIMIT', 2000)),
+        
+        # Tags
+        TAG_CACHE_SIZE=int(os.getenv('TAG_CACHE_SIZE', 10000)),
+        
+        # Instrumentation: Server-Timing header, Prometheus /metrics and the
+        # slow-query log (statements at least SLOW_QUERY_MS long; 0 disables).
+        # /metrics is served only with METRICS_TOKEN set, as a bearer token;
+        # workers add their metrics to Redis every METRICS_FLUSH_INTERVAL s
+        SERVER_TIMING=os.getenv('SERVER_TIMING', 'true').lower() == 'true',
+        METRICS_TOKEN=os.getenv('METRICS_TOKEN', ''),
+        METRICS_FLUSH_INTERVAL=float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+        SLOW_QUERY_MS=float(os.getenv('SLOW_QUERY_MS', 200)),
+        
+        # Per-endpoint query budgets (see app.utils.query_budget): 'log',
+        # 'raise' or 'off'; a statement repeated more than QUERY_REPEAT_LIMIT
+        # times in one request is reported as a probable N+1
+        QUERY_BUDGET_MODE=os.getenv('QUERY_BUDGET_MODE', 'log'),
+        QUERY_REPEAT_LIMIT=int(os.getenv('QUERY_REPEAT_LIMIT', 5)),
+        
+        # Response compression (gzip, or brotli when installed)
+        COMPRESS_MIN_SIZE=int(os.getenv('COMPRESS_MIN_SIZE', 1024)),
+        COMPRESS_GZIP_LEVEL=int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+        COMPRESS_BROTLI_QUALITY=int(os.getenv('COMPRESS_BROTLI_QUALITY', 5)),
+        
         # Upload
         MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # 16MB max file size
         UPLOAD_FOLDER=os.getenv('UPLOAD_FOLDER', '/tmp/uploads'),
     )
     
+    # Socket.IO connect/disconnect handlers; imported before init_app so
+    # they are registered with the server of every app instance
+    from app.routes import sockets  # noqa: F401
+    
+    # Database pool sized for this deployment's workers
+    from app.utils.pool import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'] or None,
+        transports=app.config['SOCKETIO_TRANSPORTS'],
+    )
+    
+    # Read replica routing
+    from app.utils.replica import init_replica
+    init_replica(app)
+    
+    # Per-request SQL/Redis/serialization timings, Server-Timing and /metrics
+    from app.utils.instrumentation import init_instrumentation
+    init_instrumentation(app, db)
+    
+    # SQL statement budgets declared with @query_budget
+    from app.utils.query_budget import init_query_budget
+    init_query_budget(app)
     
     # Initialize Redis
     global redis_client
-    redis_client = Redis.from_url(app.config['REDIS_URL'], decode_responses=True)
+    redis_client = InstrumentedRedis.from_url(app.config['REDIS_URL'], decode_responses=True)
+    
+    # Token revocation check for every @jwt_required request
+    from app.services import blocklist  # noqa: F401
     
     # Register blueprints
     from app.routes import auth, users, tasks, analytics
@@ -66,8 +180,16 @@ def create_app(config_name=None):
     app.register_blueprint(tasks.bp)
     app.register_blueprint(analytics.bp)
     
+    # Response compression
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
     # Error handlers
     from app.utils.error_handlers import register_error_handlers
     register_error_handlers(app)
     
+    # CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     return app
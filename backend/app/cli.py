@@ -0,0 +1,95 @@
+"""
+Flask CLI commands
+"""
+import click
+from app import db
+
+
+def register_commands(app):
+    """Register custom CLI commands for the application"""
+    
+    @app.cli.command('reconcile-task-stats')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True,
+                  help='Only check these users (repeatable). Defaults to everyone.')
+    @click.option('--dry-run', is_flag=True, help='Report drift without rewriting the counters.')
+    def reconcile_task_stats_command(user_ids, dry_run):
+        """Rebuild per-user task counters and completion rollups from tasks, reporting drift"""
+        from app.services.productivity import reconcile_daily_completions
+        from app.services.task_stats import reconcile_task_stats
+        
+        user_ids = list(user_ids) or None
+        drift = reconcile_task_stats(user_ids, fix=not dry_run)
+        for user_id, metric, stored, actual in drift:
+            click.echo(f'user {user_id} {metric}: stored={stored} actual={actual}')
+        
+        rollup_drift = reconcile_daily_completions(user_ids, fix=not dry_run)
+        for user_id, day, stored, actual in rollup_drift:
+            click.echo(f'user {user_id} completed on {day}: stored={stored} actual={actual}')
+        
+        if dry_run:
+            db.session.rollback()
+            click.echo(f'{len(drift)} drifted counter(s), {len(rollup_drift)} drifted day(s) found')
+        else:
+            db.session.commit()
+            click.echo(f'{len(drift)} drifted counter(s), {len(rollup_drift)} drifted day(s) rebuilt')
+    
+    @app.cli.command('import-tasks')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+    @click.option('--user-id', type=int, required=True, help='Owner of the imported tasks.')
+    @click.option('--format', 'import_format', type=click.Choice(['ndjson', 'csv']),
+                  help='File format. Defaults to csv for .csv files and ndjson otherwise.')
+    @click.option('--batch-size', type=int, help='Rows per transaction. Defaults to IMPORT_BATCH_SIZE.')
+    def import_tasks_command(path, user_id, import_format, batch_size):
+        """Import tasks for a user from an NDJSON or CSV file ('-' for stdin)"""
+        from app.models import User
+        from app.services.task_import import import_records, read_records
+        
+        if db.session.get(User, user_id) is None:
+            raise click.BadParameter(f'No user with id {user_id}', param_hint='--user-id')
+        import_format = import_format or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        
+        if path == '-':
+            report = import_records(user_id, read_records(
+                click.get_text_stream('stdin', encoding='utf-8', errors='replace'), import_format
+            ), batch_size)
+        else:
+            with open(path, encoding='utf-8', errors='replace', newline='') as lines:
+                report = import_records(user_id, read_records(lines, import_format), batch_size)
+        
+        for error in report['errors']:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        click.echo(f"{report['imported']} task(s) imported, {report['failed']} failed")
+    
+    @app.cli.command('delete-account')
+    @click.option('--user-id', type=int, required=True, help='User to delete.')
+    @click.confirmation_option(prompt='Delete this user and all of their tasks?')
+    def delete_account_command(user_id):
+        """Delete a user with all of their data, e.g. to finish an interrupted background deletion"""
+        from app.models import User
+        from app.services.accounts import delete_user
+        
+        if db.session.get(User, user_id) is None:
+            raise click.BadParameter(f'No user with id {user_id}', param_hint='--user-id')
+        delete_user(user_id)
+        click.echo(f'User {user_id} deleted')
+    
+    @app.cli.command('resume-account-deletions')
+    @click.option('--older-than', type=int, default=10, show_default=True,
+                  help='Only resume deletions requested at least this many minutes ago.')
+    def resume_account_deletions_command(older_than):
+        """Finish account deletions that were cut short, e.g. by a worker restart; safe to run from cron"""
+        from datetime import timedelta
+        from app.services.accounts import delete_user, pending_deletions
+        
+        failed = 0
+        for user_id in pending_deletions(timedelta(minutes=older_than)):
+            try:
+                delete_user(user_id)
+            except Exception as e:
+                db.session.rollback()
+                failed += 1
+                click.echo(f'User {user_id} not deleted: {e}', err=True)
+            else:
+                click.echo(f'User {user_id} deleted')
+        if failed:
+            raise click.ClickException(f'{failed} deletion(s) failed')
@@ -3,5 +3,7 @@ Models package
 """
 from app.models.user import User
 from app.models.task import Task, Tag
+from app.models.stats import UserTaskStat, DailyCompletion
+from app.models.change import TaskChange, TaskChangeSequence
 
-__all__ = ['User', 'Task', 'Tag']
+__all__ = ['User', 'Task', 'Tag', 'UserTaskStat', 'DailyCompletion', 'TaskChange', 'TaskChangeSequence']
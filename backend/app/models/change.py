@@ -0,0 +1,39 @@
+"""
+Task Change Feed Models
+"""
+from app import db
+
+
+class TaskChange(db.Model):
+    """
+    Latest change of a task, for incremental sync
+    
+    Every task write stamps the task's row with the next value of its
+    owner's change sequence, so the rows with seq above a client's cursor
+    are exactly the tasks that changed since. Deleted tasks keep their row
+    as a tombstone (deleted=True); see app.services.changes.
+    """
+    __tablename__ = 'task_changes'
+    __table_args__ = (
+        db.Index('ix_task_changes_user_id_seq', 'user_id', 'seq', unique=True),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    # No foreign key: tombstones outlive their task
+    task_id = db.Column(db.Integer, primary_key=True)
+    seq = db.Column(db.BigInteger, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f'<TaskChange {self.user_id} task={self.task_id} seq={self.seq}>'
+
+
+class TaskChangeSequence(db.Model):
+    """Last change sequence number handed out for a user"""
+    __tablename__ = 'task_change_sequences'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    last_seq = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TaskChangeSequence {self.user_id}={self.last_seq}>'
@@ -0,0 +1,39 @@
+"""
+Task Statistics Model
+"""
+from app import db
+
+
+class UserTaskStat(db.Model):
+    """
+    Incrementally maintained task counter for a user
+    
+    Metrics are ``total``, ``status:<status>``, ``priority:<priority>`` and
+    ``open_with_due_date`` (tasks that can become overdue). They are updated
+    in the same transaction as the task writes; see app.services.task_stats.
+    """
+    __tablename__ = 'user_task_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    metric = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<UserTaskStat {self.user_id} {self.metric}={self.value}>'
+
+
+class DailyCompletion(db.Model):
+    """
+    Number of tasks a user completed on a (UTC) day
+    
+    Rolled up from tasks.completed_at as tasks are completed, reopened or
+    deleted; see app.services.productivity.
+    """
+    __tablename__ = 'daily_completions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailyCompletion {self.user_id} {self.day}={self.completed}>'
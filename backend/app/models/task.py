@@ -3,28 +3,56 @@ Task Model
 """
 from app import db
 from datetime import datetime
+from sqlalchemy import DDL, event, text
 
 
 class Task(db.Model):
     """Task model for task management"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Every hot query narrows to one user first. Seek index for keyset
+        # pagination of a user's task list (and for user_id lookups)
+        db.Index('ix_tasks_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        # The same list filtered by status or priority
+        db.Index('ix_tasks_user_id_status_created_at_id', 'user_id', 'status', 'created_at', 'id'),
+        db.Index('ix_tasks_user_id_priority_created_at_id', 'user_id', 'priority', 'created_at', 'id'),
+        # Completion windows and overdue/next-due lookups; partial, since
+        # most tasks have neither timestamp
+        db.Index(
+            'ix_tasks_user_id_completed_at', 'user_id', 'completed_at',
+            postgresql_where=text('completed_at IS NOT NULL'),
+            sqlite_where=text('completed_at IS NOT NULL'),
+        ),
+        db.Index(
+            'ix_tasks_user_id_due_date', 'user_id', 'due_date',
+            postgresql_where=text('due_date IS NOT NULL'),
+            sqlite_where=text('due_date IS NOT NULL'),
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    status = db.Column(db.String(20), default='pending', index=True)  # pending, in_progress, completed, cancelled
+    status = db.Column(db.String(20), default='pending')  # pending, in_progress, completed, cancelled
     priority = db.Column(db.String(20), default='medium')  # low, medium, high, urgent
     due_date = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Tags relationship
     tags = db.relationship('Tag', secondary='task_tags', backref='tasks', lazy='dynamic')
     
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
+    def to_dict(self, tags=None):
+        """
+        Convert to dictionary for JSON serialization
+        
+        Pass pre-loaded tag names as ``tags`` to avoid the per-task tags
+        query; ``serialize_many`` does this for whole collections.
+        """
+        if tags is None:
+            tags = [tag.name for tag in self.tags]
         return {
             'id': self.id,
             'title': self.title,
@@ -36,9 +64,32 @@ class Task(db.Model):
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'tags': [tag.name for tag in self.tags]
+            'tags': tags
         }
     
+    @staticmethod
+    def load_tag_names(task_ids):
+        """Map each task id to its tag names using a single query"""
+        tag_names = {task_id: [] for task_id in task_ids}
+        if not tag_names:
+            return tag_names
+        
+        rows = db.session.query(task_tags.c.task_id, Tag.name).join(
+            Tag, Tag.id == task_tags.c.tag_id
+        ).filter(
+            task_tags.c.task_id.in_(list(tag_names))
+        ).order_by(task_tags.c.task_id, Tag.name).all()
+        
+        for task_id, name in rows:
+            tag_names[task_id].append(name)
+        return tag_names
+    
+    @classmethod
+    def serialize_many(cls, tasks):
+        """Serialize a collection of tasks, batching the tag lookup"""
+        tag_names = cls.load_tag_names([task.id for task in tasks])
+        return [task.to_dict(tags=tag_names[task.id]) for task in tasks]
+    
     def __repr__(self):
         return f'<Task {self.title}>'
 
@@ -68,5 +119,61 @@ class Tag(db.Model):
 task_tags = db.Table('task_tags',
     db.Column('task_id', db.Integer, db.ForeignKey('tasks.id'), primary_key=True),
     db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True),
-    db.Column('created_at', db.DateTime, default=datetime.utcnow)
+    db.Column('created_at', db.DateTime, default=datetime.utcnow),
+    # Reverse lookup (tasks of a tag); the primary key leads with task_id
+    db.Index('ix_task_tags_tag_id', 'tag_id'),
+)
+
+
+# Full-text search index over title and description, maintained by the
+# database itself so every write path (ORM or bulk statements) stays in sync.
+# PostgreSQL uses a generated tsvector column with a GIN index; SQLite uses an
+# external-content FTS5 table kept current by triggers. Queries go through
+# app.services.search.
+_SEARCH_DDL = {
+    'postgresql': [
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """,
+        'CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)',
+    ],
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in _SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Task.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+event.listen(
+    Task.__table__, 'before_drop',
+    DDL('DROP TABLE IF EXISTS tasks_fts').execute_if(dialect='sqlite')
 )
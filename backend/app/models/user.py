@@ -2,7 +2,7 @@
 User Model
 """
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import hash_password, verify_password, needs_rehash
 from datetime import datetime
 
 
@@ -22,17 +22,22 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    deletion_requested_at = db.Column(db.DateTime)  # set until a started account deletion finishes
     
     # Relationships
     tasks = db.relationship('Task', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash uses outdated algorithm or cost settings"""
+        return needs_rehash(self.password_hash)
     
     def to_dict(self, include_email=False):
         """Convert to dictionary for JSON serialization"""
@@ -1,92 +1,78 @@
 """
 Analytics Routes
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db, redis_client
-from app.models import Task
-from sqlalchemy import func
-from datetime import datetime, timedelta
-import json
+from app.services import analytics, productivity
+from app.utils.etag import make_etag, not_modified, with_etag
+from app.utils.query_budget import query_budget
+from app.utils.replica import replica_reads
+from datetime import date, datetime, timedelta
 
 bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
 
 @bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@query_budget(3)
 def get_dashboard_stats():
-    """Get dashboard statistics"""
-    user_id = get_jwt_identity()
-    
-    # Check cache
-    cache_key = f'analytics:dashboard:{user_id}'
-    cached = redis_client.get(cache_key)
-    if cached:
-        return jsonify(json.loads(cached)), 200
-    
-    # Task counts by status
-    status_counts = db.session.query(
-        Task.status, func.count(Task.id)
-    ).filter_by(user_id=user_id).group_by(Task.status).all()
-    
-    # Task counts by priority
-    priority_counts = db.session.query(
-        Task.priority, func.count(Task.id)
-    ).filter_by(user_id=user_id).group_by(Task.priority).all()
-    
-    # Tasks completed this week
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    completed_this_week = Task.query.filter(
-        Task.user_id == user_id,
-        Task.status == 'completed',
-        Task.completed_at >= week_ago
-    ).count()
-    
-    # Overdue tasks
-    overdue_tasks = Task.query.filter(
-        Task.user_id == user_id,
-        Task.status != 'completed',
-        Task.due_date < datetime.utcnow()
-    ).count()
-    
-    # Total tasks
-    total_tasks = Task.query.filter_by(user_id=user_id).count()
-    
-    stats = {
-        'total_tasks': total_tasks,
-        'completed_this_week': completed_this_week,
-        'overdue_tasks': overdue_tasks,
-        'status_distribution': {status: count for status, count in status_counts},
-        'priority_distribution': {priority: count for priority, count in priority_counts}
-    }
-    
-    # Cache for 5 minutes
-    redis_client.setex(cache_key, 300, json.dumps(stats))
+    """
+    Get dashboard statistics
     
-    return jsonify(stats), 200
+    Some of the numbers change with time alone, so the ETag is a hash of the
+    (normally cached) statistics rather than of a write version. Computed
+    from the primary, not a replica: the result is cached until the next
+    write, and stats read from a lagging replica would outlive it.
+    """
+    user_id = get_jwt_identity()
+    stats = analytics.get_dashboard_stats(user_id)
+    etag = make_etag('dashboard', user_id, sorted(stats.items()))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    return with_etag((jsonify(stats), 200), etag)
 
 
 @bp.route('/productivity', methods=['GET'])
 @jwt_required()
+@replica_reads
+@query_budget(2)
 def get_productivity_stats():
-    """Get productivity statistics over time"""
+    """
+    Get productivity statistics over time
+    
+    Query parameters ``from`` and ``to`` (YYYY-MM-DD, inclusive) default to
+    the last 30 days; ``granularity`` is day, week or month. Every bucket in
+    the range is returned, including those without completions.
+    """
     user_id = get_jwt_identity()
+    granularity = request.args.get('granularity', 'day')
     
-    # Last 30 days of completed tasks
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    if granularity not in productivity.GRANULARITIES:
+        return jsonify({'error': 'granularity must be one of day, week, month'}), 400
     
-    daily_completed = db.session.query(
-        func.date(Task.completed_at).label('date'),
-        func.count(Task.id).label('count')
-    ).filter(
-        Task.user_id == user_id,
-        Task.status == 'completed',
-        Task.completed_at >= thirty_days_ago
-    ).group_by(func.date(Task.completed_at)).all()
+    try:
+        end = date.fromisoformat(request.args['to']) if 'to' in request.args else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['from']) if 'from' in request.args else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    
+    if start > end:
+        return jsonify({'error': 'from must not be after to'}), 400
+    if (end - start).days >= productivity.MAX_RANGE_DAYS:
+        return jsonify({'error': f'Range is limited to {productivity.MAX_RANGE_DAYS} days'}), 400
+    
+    series = productivity.get_completion_series(user_id, start, end, granularity)
+    
+    response = {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'granularity': granularity,
+        'completed': series,
+        'total_completed': sum(bucket['count'] for bucket in series)
+    }
+    if granularity == 'day':
+        # Kept for clients written against the original response
+        response['daily_completed'] = series
     
-    return jsonify({
-        'daily_completed': [
-            {'date': str(date), 'count': count}
-            for date, count in daily_completed
-        ]
-    }), 200
+    return jsonify(response), 200
@@ -6,8 +6,11 @@ from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity, get_jwt
 )
-from app import db, redis_client
+from app import db
 from app.models import User
+from app.services.accounts import is_active_user
+from app.services.blocklist import decode_refresh_token, get_blocklist
+from app.utils.query_budget import query_budget
 from app.utils.validators import validate_email, validate_password
 from datetime import datetime
 
@@ -15,6 +18,7 @@ bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
 @bp.route('/register', methods=['POST'])
+@query_budget(5)
 def register():
     """Register a new user"""
     data = request.get_json()
@@ -68,6 +72,7 @@ def register():
 
 
 @bp.route('/login', methods=['POST'])
+@query_budget(3)
 def login():
     """Login user"""
     data = request.get_json()
@@ -86,12 +91,24 @@ def login():
         (User.username == username_or_email) | (User.email == username_or_email)
     ).first()
     
+    if user:
+        # Hand the pooled connection back while the (deliberately slow)
+        # password check runs, so a burst of logins can't drain the pool
+        db.session.expunge(user)
+        db.session.rollback()
+    
     if not user or not user.check_password(password):
         return jsonify({'error': 'Invalid credentials'}), 401
     
     if not user.is_active:
         return jsonify({'error': 'Account is disabled'}), 403
     
+    db.session.add(user)
+    
+    # Upgrade hashes made with outdated parameters while we have the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+    
     # Update last login
     user.last_login = datetime.utcnow()
     db.session.commit()
@@ -110,25 +127,50 @@ def login():
 
 @bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
+@query_budget(1)
 def refresh():
-    """Refresh access token"""
+    """
+    Refresh access token
+    
+    Refused once the account is deactivated or deleted, so refresh tokens
+    issued earlier cannot outlive the account.
+    """
     identity = get_jwt_identity()
+    if not is_active_user(identity):
+        return jsonify({'error': 'Account is disabled'}), 403
+    
     access_token = create_access_token(identity=identity)
     return jsonify({'access_token': access_token}), 200
 
 
 @bp.route('/logout', methods=['POST'])
 @jwt_required()
+@query_budget(2)
 def logout():
-    """Logout user (blacklist token)"""
-    jti = get_jwt()['jti']
-    # Add token to blacklist in Redis
-    redis_client.setex(f'blacklist:{jti}', 3600, '1')
+    """
+    Logout user (revoke tokens)
+    
+    Revokes the access token used for the request and, when the body holds
+    a ``refresh_token`` of the same user, that refresh token too.
+    """
+    token = get_jwt()
+    blocklist = get_blocklist()
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    try:
+        refresh = decode_refresh_token(refresh_token, token['sub']) if refresh_token else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if refresh is not None:
+        blocklist.revoke(refresh['jti'], refresh['exp'])
+    blocklist.revoke(token['jti'], token['exp'])
     return jsonify({'message': 'Logout successful'}), 200
 
 
 @bp.route('/me', methods=['GET'])
 @jwt_required()
+@query_budget(2)
 def get_current_user():
     """Get current user profile"""
     user_id = get_jwt_identity()
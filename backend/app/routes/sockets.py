@@ -0,0 +1,42 @@
+"""
+Socket.IO Event Handlers
+"""
+from flask import request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_socketio import ConnectionRefusedError, join_room
+from jwt.exceptions import InvalidTokenError
+from app import socketio
+from app.services.blocklist import get_blocklist
+from app.services.presence import get_presence
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """
+    Authenticate a connection and join the user's room
+    
+    The access token is read from the Socket.IO auth payload
+    (``{'token': ...}``) only: a query parameter would end up in proxy and
+    access logs.
+    """
+    token = auth.get('token') if isinstance(auth, dict) else None
+    if not token:
+        raise ConnectionRefusedError('Authorization token required')
+    
+    try:
+        claims = decode_token(token)
+    except (InvalidTokenError, JWTExtendedException):
+        raise ConnectionRefusedError('Invalid token') from None
+    if claims.get('type') != 'access' or get_blocklist().is_revoked(claims['jti']):
+        raise ConnectionRefusedError('Invalid token')
+    
+    user_id = claims['sub']
+    join_room(f'user_{user_id}')
+    get_presence().connected(request.sid, user_id)
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Forget a closed connection"""
+    get_presence().disconnected(request.sid)
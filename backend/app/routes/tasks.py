@@ -1,63 +1,270 @@
 """
 Task Management Routes
 """
-from flask import Blueprint, request, jsonify
+import io
+from flask import Blueprint, current_app, g, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db, socketio
-from app.models import Task, Tag
+from app import db
+from app.models import Task
+from app.services.accounts import active_user_required
+from app.services.projections import (
+    select_tasks, select_tags, fetch_dicts, attach_tags, paginate, parse_fields, TASK_FIELDS
+)
+from app.services.search import apply_search
+from app.services.tags import normalize_tag_names, sync_task_tags
+from app.services.events import task_delta
+from app.services.export import EXPORT_FORMATS, iter_task_chunks, csv_chunks, ndjson_chunks
+from app.services.task_batch import run_batch, MAX_BATCH_OPERATIONS
+from app.services.task_import import IMPORT_FORMATS, import_records, read_records
+from app.services.changes import get_changes, current_seq, task_version, DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT
+from app.services.task_writes import record_task_changes, record_task_ids, snapshot, tasks_committed
+from app.utils.etag import make_etag, not_modified, with_etag
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.query_budget import query_budget
+from app.utils.replica import replica_reads
+from app.utils.serialization import json_response
+from app.utils.validators import parse_iso_datetime
 from datetime import datetime
 from flask_socketio import emit
+from sqlalchemy import func, select, tuple_
 
 bp = Blueprint('tasks', __name__, url_prefix='/api/tasks')
 
+MAX_CURSOR_LIMIT = 100
+
 
 @bp.route('/', methods=['GET'])
 @jwt_required()
+@replica_reads
+@query_budget(7)
 def get_tasks():
-    """Get all tasks for current user"""
+    """
+    Get all tasks for current user
+    
+    Passing ``cursor`` or ``limit`` switches to keyset pagination: pages are
+    ordered by (created_at, id) descending, ``next_cursor`` points at the
+    following page and the total is only counted when ``include_total`` is set.
+    Without them the page/per_page contract is used, and ``search`` results
+    are ordered by relevance. Tasks are read as column projections rather
+    than ORM objects; ``fields`` (comma-separated) narrows them to the named
+    fields, and the tags are only loaded when ``tags`` is one of them.
+    
+    Responses carry an ETag derived from the user's task version and the
+    query string; a matching If-None-Match is answered with 304 without
+    running the query.
+    """
     user_id = get_jwt_identity()
+    etag = make_etag('tasks', user_id, current_seq(user_id), sorted(request.args.items(multi=True)))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), TASK_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query, rank = filter_tasks_query(select_tasks(user_id, fields), request.args)
+    
+    if 'cursor' in request.args or 'limit' in request.args:
+        return with_etag(get_tasks_page_by_cursor(query, fields), etag)
+    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    status = request.args.get('status')
-    priority = request.args.get('priority')
-    search = request.args.get('search', '')
     
-    query = Task.query.filter_by(user_id=user_id)
+    order = [Task.created_at.desc()]
+    if rank is not None:
+        order.insert(0, rank)
+    
+    tasks, total, pages = paginate(query.order_by(*order), page, per_page)
+    if fields is None or 'tags' in fields:
+        attach_tags(tasks)
+    
+    return with_etag(json_response({
+        'tasks': tasks,
+        'total': total,
+        'pages': pages,
+        'current_page': page
+    }), etag)
+
+
+def filter_tasks_query(query, args):
+    """
+    Apply the status/priority/search filters of the list endpoint
+    
+    Works on ORM queries and Core selects alike. Returns (query, rank);
+    rank is the relevance ordering for a full-text search, or None.
+    """
+    status = args.get('status')
+    priority = args.get('priority')
+    search = args.get('search', '')
     
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Task.status == status)
     if priority:
-        query = query.filter_by(priority=priority)
+        query = query.filter(Task.priority == priority)
+    
+    rank = None
     if search:
-        query = query.filter(Task.title.ilike(f'%{search}%'))
+        query, rank = apply_search(query, search)
     
-    pagination = query.order_by(Task.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    return query, rank
+
+
+def get_tasks_page_by_cursor(query, fields=None):
+    """Serve one keyset-paginated page of an already filtered task select"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_CURSOR_LIMIT)
+    cursor = request.args.get('cursor')
+    
+    response = {}
+    if request.args.get('include_total', '').lower() in ('1', 'true'):
+        response['total'] = db.session.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+    
+    if cursor:
+        try:
+            created_at, task_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(Task.created_at, Task.id) < (created_at, task_id))
+    
+    # The cursor needs created_at even when the client did not ask for it
+    hide_created_at = fields is not None and 'created_at' not in fields
+    if hide_created_at:
+        query = query.add_columns(Task.created_at)
+    
+    # Fetch one extra row to find out whether another page exists
+    tasks = fetch_dicts(query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1))
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    next_cursor = encode_cursor(tasks[-1]['created_at'], tasks[-1]['id']) if has_more else None
+    
+    if hide_created_at:
+        for task in tasks:
+            del task['created_at']
+    if fields is None or 'tags' in fields:
+        attach_tags(tasks)
+    
+    response.update({
+        'tasks': tasks,
+        'limit': limit,
+        'next_cursor': next_cursor
+    })
+    return json_response(response)
+
+
+@bp.route('/changes', methods=['GET'])
+@jwt_required()
+@query_budget(4)
+def get_task_changes():
+    """
+    Get the tasks created, updated or deleted since a cursor
+    
+    Returns changed tasks in full and deleted ones as ids, oldest change
+    first, with the ``cursor`` to pass as ``since`` next time. While
+    ``has_more`` is set, request again right away. Without ``since`` only
+    the current cursor is returned; fetch it before a full reload of the
+    task list so no change falls in between.
+    """
+    user_id = get_jwt_identity()
+    
+    if 'since' not in request.args:
+        return jsonify({
+            'tasks': [], 'deleted': [], 'cursor': str(current_seq(user_id)), 'has_more': False
+        }), 200
+    
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    limit = request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_CHANGES_LIMIT))
+    
+    tasks, deleted_ids, seq, has_more = get_changes(user_id, since, limit)
     
     return jsonify({
-        'tasks': [task.to_dict() for task in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        'tasks': Task.serialize_many(tasks),
+        'deleted': deleted_ids,
+        'cursor': str(seq),
+        'has_more': has_more
     }), 200
 
 
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+@replica_reads
+@query_budget(None)
+def export_tasks():
+    """
+    Stream all tasks of the current user as NDJSON or CSV
+    
+    ``format`` is ndjson (the default) or csv; status, priority, search and
+    fields work as for the list endpoint. Rows are read and sent in chunks of
+    EXPORT_CHUNK_SIZE while the response streams, which is after the
+    request's instrumentation and query budget check have run: none of the
+    export's queries are counted there, so the view declares no budget.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be one of ndjson, csv'}), 400
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), TASK_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query, rank = filter_tasks_query(select_tasks(get_jwt_identity(), fields), request.args)
+    order = [Task.created_at.desc(), Task.id.desc()]
+    if rank is not None:
+        order.insert(0, rank)
+    
+    with_tags = fields is None or 'tags' in fields
+    chunks = iter_task_chunks(query.order_by(*order), current_app.config['EXPORT_CHUNK_SIZE'], with_tags)
+    if export_format == 'csv':
+        columns = [column.key for column in query.selected_columns] + (['tags'] if with_tags else [])
+        body = csv_chunks(chunks, columns)
+    else:
+        body = ndjson_chunks(chunks)
+    
+    # The rows are read after the view returns; keep its replica routing
+    use_replica = g.get('db_replica', False)
+    
+    def generate():
+        g.db_replica = use_replica
+        yield from body
+    
+    mimetype, filename = EXPORT_FORMATS[export_format]
+    return current_app.response_class(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 @bp.route('/<int:task_id>', methods=['GET'])
 @jwt_required()
+@query_budget(3)
 def get_task(task_id):
     """Get task by ID"""
     user_id = get_jwt_identity()
+    etag = make_etag('task', user_id, task_id, task_version(user_id, task_id))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
     task = Task.query.filter_by(id=task_id, user_id=user_id).first()
     
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
-    return jsonify({'task': task.to_dict()}), 200
+    return with_etag((jsonify({'task': Task.serialize_many([task])[0]}), 200), etag)
 
 
 @bp.route('/', methods=['POST'])
 @jwt_required()
+@active_user_required
+@query_budget(13)
 def create_task():
     """Create a new task"""
     user_id = get_jwt_identity()
@@ -77,33 +284,42 @@ def create_task():
     # Handle due date
     if data.get('due_date'):
         try:
-            task.due_date = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
+            task.due_date = parse_iso_datetime(data['due_date'])
         except ValueError:
             return jsonify({'error': 'Invalid due_date format'}), 400
     
-    # Handle tags
-    if data.get('tags'):
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            task.tags.append(tag)
+    if task.status == 'completed':
+        task.completed_at = datetime.utcnow()
+    
+    try:
+        tag_names = normalize_tag_names(data.get('tags'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     db.session.add(task)
+    db.session.flush()
+    
+    # Handle tags
+    if tag_names:
+        sync_task_tags({task.id: tag_names}, new_task_ids=[task.id])
+    
+    record_task_changes(user_id, [(None, snapshot(task))])
+    record_task_ids(user_id, changed_ids=[task.id])
     db.session.commit()
     
-    # Emit WebSocket event
-    socketio.emit('task_created', {'task': task.to_dict()}, room=f'user_{user_id}')
+    task_data = Task.serialize_many([task])[0]
+    tasks_committed(user_id, created=[task_data])
     
     return jsonify({
         'message': 'Task created successfully',
-        'task': task.to_dict()
+        'task': task_data
     }), 201
 
 
 @bp.route('/<int:task_id>', methods=['PUT'])
 @jwt_required()
+@active_user_required
+@query_budget(14)
 def update_task(task_id):
     """Update a task"""
     user_id = get_jwt_identity()
@@ -113,6 +329,8 @@ def update_task(task_id):
         return jsonify({'error': 'Task not found'}), 404
     
     data = request.get_json()
+    before = snapshot(task)
+    before_data = task.to_dict(tags=[])
     
     # Update fields
     if 'title' in data:
@@ -130,35 +348,40 @@ def update_task(task_id):
     if 'due_date' in data:
         if data['due_date']:
             try:
-                task.due_date = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
+                task.due_date = parse_iso_datetime(data['due_date'])
             except ValueError:
                 return jsonify({'error': 'Invalid due_date format'}), 400
         else:
             task.due_date = None
     
-    # Update tags
+    # Update tags, writing only the associations that changed
     if 'tags' in data:
-        task.tags = []
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            task.tags.append(tag)
+        try:
+            tag_names = normalize_tag_names(data['tags'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        sync_task_tags({task.id: tag_names})
     
+    record_task_changes(user_id, [(before, snapshot(task))])
+    record_task_ids(user_id, changed_ids=[task.id])
     db.session.commit()
     
-    # Emit WebSocket event
-    socketio.emit('task_updated', {'task': task.to_dict()}, room=f'user_{user_id}')
+    task_data = Task.serialize_many([task])[0]
+    # Tags were left out of before_data, so only send them when they were set
+    delta = task_delta({**before_data, 'tags': task_data['tags']}, task_data,
+                       fields=['tags'] if 'tags' in data else [])
+    tasks_committed(user_id, updated=[delta])
     
     return jsonify({
         'message': 'Task updated successfully',
-        'task': task.to_dict()
+        'task': task_data
     }), 200
 
 
 @bp.route('/<int:task_id>', methods=['DELETE'])
 @jwt_required()
+@active_user_required
+@query_budget(10)
 def delete_task(task_id):
     """Delete a task"""
     user_id = get_jwt_identity()
@@ -167,18 +390,77 @@ def delete_task(task_id):
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    record_task_changes(user_id, [(snapshot(task), None)])
+    record_task_ids(user_id, deleted_ids=[task.id])
     db.session.delete(task)
     db.session.commit()
-    
-    # Emit WebSocket event
-    socketio.emit('task_deleted', {'task_id': task_id}, room=f'user_{user_id}')
+    tasks_committed(user_id, deleted=[task_id])
     
     return jsonify({'message': 'Task deleted successfully'}), 200
 
 
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+@active_user_required
+@query_budget(21)
+def batch_tasks():
+    """
+    Create, update and delete many tasks in one transaction
+    
+    Each operation is reported individually; invalid operations are skipped
+    without affecting the others. The changes of the whole batch go out
+    together in the next ``tasks_changed`` WebSocket event.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    operations = data.get('operations') if isinstance(data, dict) else None
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+    
+    results, changes = run_batch(user_id, operations)
+    
+    if any(changes.values()):
+        tasks_committed(user_id, **changes)
+    
+    return jsonify({'results': results}), 200
+
+
+@bp.route('/import', methods=['POST'])
+@jwt_required()
+@active_user_required
+@query_budget(None)
+def import_tasks():
+    """
+    Import tasks from an NDJSON or CSV request body
+    
+    ``format`` is ndjson or csv, by default taken from the Content-Type. The
+    body is parsed while it is read and written in batches (see
+    app.services.task_import); invalid rows are reported by line number
+    without stopping the import.
+    """
+    import_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({'error': 'format must be one of ndjson, csv'}), 400
+    
+    stream = request.stream
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    
+    report = import_records(get_jwt_identity(), read_records(lines, import_format))
+    if not report['imported'] and not report['failed']:
+        return jsonify({'error': 'No tasks to import'}), 400
+    
+    return jsonify(report), 200
+
+
 @bp.route('/tags', methods=['GET'])
 @jwt_required()
+@replica_reads
+@query_budget(2)
 def get_tags():
     """Get all tags"""
-    tags = Tag.query.all()
-    return jsonify({'tags': [tag.to_dict() for tag in tags]}), 200
+    return json_response({'tags': fetch_dicts(select_tags())})
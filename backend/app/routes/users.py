@@ -2,43 +2,60 @@
 User Management Routes
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app import db
 from app.models import User
+from app.services.accounts import active_user_required, delete_user, delete_user_later, is_large_account
+from app.services.blocklist import decode_refresh_token, get_blocklist
+from app.services.presence import get_presence
+from app.services.projections import select_users, paginate, parse_fields, USER_FIELDS
+from app.utils.query_budget import query_budget
+from app.utils.replica import replica_reads
+from app.utils.serialization import json_response
 
 bp = Blueprint('users', __name__, url_prefix='/api/users')
 
 
 @bp.route('/', methods=['GET'])
 @jwt_required()
+@replica_reads
+@query_budget(3)
 def get_users():
-    """Get all users (paginated)"""
+    """
+    Get all users (paginated)
+    
+    ``fields`` (comma-separated) limits the profiles to the named fields.
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     search = request.args.get('search', '')
     
-    query = User.query
+    try:
+        fields = parse_fields(request.args.get('fields'), USER_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = select_users(fields)
     
     if search:
-        query = query.filter(
+        query = query.where(
             (User.username.ilike(f'%{search}%')) |
             (User.email.ilike(f'%{search}%'))
         )
     
-    pagination = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    users, total, pages = paginate(query.order_by(User.created_at.desc()), page, per_page)
     
-    return jsonify({
-        'users': [user.to_dict() for user in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+    return json_response({
+        'users': users,
+        'total': total,
+        'pages': pages,
         'current_page': page
-    }), 200
+    })
 
 
 @bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
+@query_budget(1)
 def get_user(user_id):
     """Get user by ID"""
     user = User.query.get(user_id)
@@ -49,8 +66,29 @@ def get_user(user_id):
     return jsonify({'user': user.to_dict()}), 200
 
 
+@bp.route('/<int:user_id>/presence', methods=['GET'])
+@jwt_required()
+@query_budget(1)
+def get_user_presence(user_id):
+    """Get the number of open real-time connections of a user (own or, for admins, any)"""
+    current_user_id = get_jwt_identity()
+    if user_id != current_user_id:
+        viewer = db.session.get(User, current_user_id)
+        if not viewer or not viewer.is_admin:
+            return jsonify({'error': 'Access denied'}), 403
+    
+    connections = get_presence().connection_count(user_id)
+    return jsonify({
+        'user_id': user_id,
+        'online': connections > 0,
+        'connections': connections
+    }), 200
+
+
 @bp.route('/profile', methods=['PUT'])
 @jwt_required()
+@active_user_required
+@query_budget(4)
 def update_profile():
     """Update current user profile"""
     user_id = get_jwt_identity()
@@ -79,15 +117,36 @@ def update_profile():
 
 @bp.route('/profile', methods=['DELETE'])
 @jwt_required()
+@active_user_required
+@query_budget(16)
 def delete_account():
-    """Delete current user account"""
+    """
+    Delete current user account
+    
+    Tasks and derived data are removed with chunked bulk DELETEs (see
+    app.services.accounts). Accounts with more than ACCOUNT_DELETE_SYNC_LIMIT
+    tasks are deactivated right away and deleted in the background; the
+    response is then 202. The access token used is revoked either way, and
+    so is a ``refresh_token`` of the same user sent in the body, as on
+    logout.
+    """
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    token = get_jwt()
+    blocklist = get_blocklist()
     
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    try:
+        refresh = decode_refresh_token(refresh_token, token['sub']) if refresh_token else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    db.session.delete(user)
-    db.session.commit()
+    if refresh is not None:
+        blocklist.revoke(refresh['jti'], refresh['exp'])
+    blocklist.revoke(token['jti'], token['exp'])
+    
+    if is_large_account(user_id):
+        delete_user_later(user_id)
+        return jsonify({'message': 'Account deletion started'}), 202
     
+    delete_user(user_id)
     return jsonify({'message': 'Account deleted successfully'}), 200
@@ -0,0 +1,170 @@
+"""
+Account deletion
+
+Deletes a user and everything they own with set-based statements instead
+of the ORM cascade, which would load every task and its tag associations
+into the session first. Tasks go in chunks of ACCOUNT_DELETE_CHUNK_SIZE,
+each chunk in its own short transaction, so memory stays flat and locks
+are held briefly. Accounts with more than ACCOUNT_DELETE_SYNC_LIMIT tasks
+are deleted by a background task.
+
+A deletion starts by deactivating the user and recording
+``deletion_requested_at``, which stops logins, token refreshes and writes
+(see active_user_required). The mark stays until the user row is gone, so
+a deletion cut short by a worker restart is finished by
+``flask resume-account-deletions``.
+"""
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, func, select, update
+from app import db, socketio
+from app.models import User, Task, UserTaskStat, DailyCompletion, TaskChange, TaskChangeSequence
+from app.models.task import task_tags
+from app.services.analytics import dashboard_cache_key
+from app.services.presence import KEY_PREFIX as PRESENCE_KEY_PREFIX
+from app.utils.cache import cache_delete
+from app.utils.replica import RECENT_WRITE_PREFIX
+
+ACCOUNT_DELETED_EVENT = 'account_deleted'
+
+# Per-user rows besides tasks, deleted with one statement each
+USER_TABLES = (UserTaskStat, DailyCompletion, TaskChange, TaskChangeSequence)
+
+
+def _active_flag(user_id, lock):
+    statement = select(User.is_active).where(User.id == user_id)
+    if lock:
+        statement = statement.with_for_update(read=True)
+    return db.session.execute(statement).first()
+
+
+def is_active_user(user_id, lock=False):
+    """
+    Whether a user exists and is not deactivated
+    
+    With ``lock``, the user row is share-locked until the transaction ends,
+    so deactivating the user (the first step of a deletion) waits for the
+    write that made this check to commit.
+    """
+    row = _active_flag(user_id, lock)
+    return row is not None and bool(row.is_active)
+
+
+def active_user_required(view):
+    """
+    Refuse a write when the JWT's user is gone (404) or deactivated (403)
+    
+    Goes after @jwt_required. The check share-locks the user row for the
+    rest of the request's transaction, see is_active_user().
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        row = _active_flag(get_jwt_identity(), lock=True)
+        if row is None:
+            return jsonify({'error': 'User not found'}), 404
+        if not row.is_active:
+            return jsonify({'error': 'Account is disabled'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def is_large_account(user_id):
+    """Whether a user has more tasks than are deleted within a request"""
+    limit = current_app.config['ACCOUNT_DELETE_SYNC_LIMIT']
+    return db.session.scalar(
+        select(Task.id).where(Task.user_id == user_id).offset(limit).limit(1)
+    ) is not None
+
+
+def delete_user(user_id, chunk_size=None):
+    """
+    Delete a user with their tasks and derived data, then forget them
+    
+    Commits after every chunk of tasks. An interrupted run leaves the user
+    deactivated, with fewer tasks, and can simply be repeated.
+    """
+    chunk_size = chunk_size or current_app.config['ACCOUNT_DELETE_CHUNK_SIZE']
+    request_deletion(user_id)
+    while True:
+        task_ids = db.session.scalars(
+            select(Task.id).where(Task.user_id == user_id).limit(chunk_size)
+        ).all()
+        if not task_ids:
+            break
+        db.session.execute(delete(task_tags).where(task_tags.c.task_id.in_(task_ids)))
+        db.session.execute(
+            delete(Task).where(Task.id.in_(task_ids)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+    
+    for model in USER_TABLES:
+        db.session.execute(
+            delete(model).where(model.user_id == user_id),
+            execution_options={'synchronize_session': False}
+        )
+    db.session.execute(delete(User).where(User.id == user_id), execution_options={'synchronize_session': False})
+    db.session.commit()
+    forget_user(user_id)
+
+
+def request_deletion(user_id):
+    """
+    Deactivate a user and mark them for deletion, committing right away
+    
+    Waits for writes that already passed active_user_required to commit;
+    later ones are refused. A repeated request keeps the first timestamp.
+    """
+    db.session.execute(
+        update(User).where(User.id == user_id).values(
+            is_active=False,
+            deletion_requested_at=func.coalesce(User.deletion_requested_at, datetime.utcnow()),
+        ),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+
+
+def delete_user_later(user_id):
+    """Mark a user for deletion now and delete them in a background task"""
+    request_deletion(user_id)
+    socketio.start_background_task(_delete_in_background, current_app._get_current_object(), user_id)
+
+
+def _delete_in_background(app, user_id):
+    with app.app_context():
+        try:
+            delete_user(user_id)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(
+                f'Deleting user {user_id} failed, `flask resume-account-deletions` finishes it: {e}'
+            )
+        else:
+            app.logger.info(f'User {user_id} deleted')
+
+
+def pending_deletions(older_than=timedelta(0)):
+    """Ids of users marked for deletion at least ``older_than`` ago, oldest first"""
+    cutoff = datetime.utcnow() - older_than
+    return db.session.scalars(
+        select(User.id).where(User.deletion_requested_at <= cutoff).order_by(User.deletion_requested_at)
+    ).all()
+
+
+def forget_user(user_id):
+    """
+    Drop a deleted user's Redis keys and close their WebSocket room
+    
+    Connected clients receive an ``account_deleted`` event first.
+    """
+    cache_delete(
+        dashboard_cache_key(user_id),
+        f'{PRESENCE_KEY_PREFIX}{user_id}',
+        f'{RECENT_WRITE_PREFIX}{user_id}',
+    )
+    room = f'user_{user_id}'
+    socketio.emit(ACCOUNT_DELETED_EVENT, {'user_id': user_id}, room=room)
+    socketio.close_room(room)
@@ -0,0 +1,113 @@
+"""
+Analytics aggregation
+"""
+from datetime import datetime, time, timedelta
+from flask import current_app, g
+from sqlalchemy import and_, func, literal, null, select
+from app import db
+from app.models import Task, DailyCompletion
+from app.services.changes import current_seq
+from app.services.task_stats import get_task_stats
+from app.utils.cache import cache_get_json, cache_set_json, cache_delete
+
+# completed_this_week covers today and the days before it, in UTC days
+COMPLETED_WINDOW_DAYS = 7
+
+
+def dashboard_cache_key(user_id):
+    return f'analytics:dashboard:{user_id}'
+
+
+def get_dashboard_stats(user_id):
+    """
+    Dashboard statistics for a user, served from Redis when cached
+    
+    The cached entry carries the user's change sequence (app.services.changes)
+    from before the statistics were computed and only counts while that is
+    still the current sequence. Every task write bumps it, so statistics
+    computed before a write are never served after it, even when they are
+    stored after the write's invalidate_dashboard() ran.
+    
+    Only statistics read from the primary are cached: a lagging replica
+    could return results from before the sequence they would be stored
+    under.
+    """
+    cache_key = dashboard_cache_key(user_id)
+    seq = current_seq(user_id)
+    cached = cache_get_json(cache_key)
+    if cached is not None and cached.get('seq') == seq:
+        return cached['stats']
+    
+    stats, ttl = compute_dashboard_stats(user_id)
+    if not g.get('db_replica'):
+        cache_set_json(cache_key, {'seq': seq, 'stats': stats}, ttl)
+    return stats
+
+
+def invalidate_dashboard(user_id):
+    """Drop the cached dashboard of a user, freeing its memory after task writes"""
+    cache_delete(dashboard_cache_key(user_id))
+
+
+def compute_dashboard_stats(user_id):
+    """
+    Compute dashboard statistics for a user
+    
+    Totals and distributions come from the maintained user_task_stats
+    counters, and completed_this_week sums the last seven daily_completions
+    rows (today and the six UTC days before). Overdue tasks are the
+    open_with_due_date counter minus the open tasks not yet due, so only
+    upcoming tasks are read; tasks completed or past due in the user's
+    history are not. All of it is one statement besides the counters.
+    
+    Returns (stats, ttl). Task writes retire the cached entry by bumping
+    the change sequence it is stored under, so the TTL only has to cover
+    metrics that change with time alone: it ends when the next open task
+    becomes overdue or, if there are completions in the window, at the next
+    UTC midnight, capped at DASHBOARD_CACHE_TTL.
+    """
+    now = datetime.utcnow()
+    today = now.date()
+    
+    counters = get_task_stats(user_id)
+    stats = {
+        'total_tasks': counters.get('total', 0),
+        'completed_this_week': 0,
+        'overdue_tasks': 0,
+        'status_distribution': _distribution(counters, 'status:'),
+        'priority_distribution': _distribution(counters, 'priority:')
+    }
+    
+    expiries = []
+    if stats['total_tasks']:
+        open_with_due_date = counters.get('open_with_due_date', 0)
+        upcoming = and_(
+            Task.user_id == user_id, Task.status != 'completed', Task.due_date >= now
+        )
+        completed, not_due, next_due = db.session.query(
+            select(func.coalesce(func.sum(DailyCompletion.completed), 0)).where(
+                DailyCompletion.user_id == user_id,
+                DailyCompletion.day > today - timedelta(days=COMPLETED_WINDOW_DAYS)
+            ).scalar_subquery(),
+            select(func.count(Task.id)).where(upcoming).scalar_subquery() if open_with_due_date else literal(0),
+            select(func.min(Task.due_date)).where(upcoming).scalar_subquery() if open_with_due_date else null(),
+        ).one()
+        stats['completed_this_week'] = completed
+        stats['overdue_tasks'] = open_with_due_date - not_due
+        if completed:
+            expiries.append(datetime.combine(today + timedelta(days=1), time()))
+        if next_due:
+            expiries.append(next_due)
+    
+    ttl = current_app.config['DASHBOARD_CACHE_TTL']
+    if expiries:
+        ttl = min(ttl, int((min(expiries) - now).total_seconds()) + 1)
+    
+    return stats, max(ttl, 1)
+
+
+def _distribution(counters, prefix):
+    return {
+        metric[len(prefix):]: value
+        for metric, value in counters.items() if metric.startswith(prefix) and value
+    }
@@ -0,0 +1,213 @@
+"""
+JWT blocklist
+
+Revoked token ids live in Redis under ``blacklist:{jti}`` and expire with
+the token itself. Every process also keeps a Bloom filter of revoked ids,
+fed by a Redis pub/sub channel, so checking a token that was never revoked
+(nearly all of them) needs no network round trip. Only filter hits are
+confirmed against Redis.
+
+With JWT_BLOCKLIST_SUBSCRIBE off there is no channel to follow, and the
+filter is reloaded every JWT_BLOCKLIST_POLL_INTERVAL seconds instead. A
+token revoked by another process stays valid here until the next reload.
+"""
+import hashlib
+import math
+import threading
+import time
+from flask import current_app
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
+from redis.exceptions import RedisError
+from app import jwt, socketio
+from app.utils.cache import get_redis
+
+KEY_PREFIX = 'blacklist:'
+CHANNEL = 'blacklist'
+POLL_INTERVAL = 0.2
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+    
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item):
+        # Double hashing: derive every probe from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+    
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, item):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item)
+        )
+
+
+class TokenBlocklist:
+    """Revoked-token registry of one application"""
+    
+    def __init__(self, capacity, error_rate, resync_interval, poll_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.resync_interval = resync_interval
+        self.poll_interval = poll_interval
+        self.synced = False
+        self._filter = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._added_during_reload = None
+        self._listener_started = False
+        self._next_reload = 0
+    
+    def revoke(self, jti, expires_at):
+        """
+        Revoke a token until it would have expired anyway
+        
+        Args:
+            jti: Token id (``jti`` claim)
+            expires_at: Expiry as a unix timestamp (``exp`` claim)
+        """
+        self._add(jti)
+        ttl = max(1, int(expires_at - time.time()))
+        try:
+            redis = get_redis()
+            redis.setex(f'{KEY_PREFIX}{jti}', ttl, '1')
+            redis.publish(CHANNEL, jti)
+        except RedisError as e:
+            current_app.logger.warning(f'Could not store revoked token {jti}: {e}')
+    
+    def is_revoked(self, jti):
+        """Check a token id, touching Redis only for Bloom filter hits"""
+        self._ensure_synced()
+        
+        maybe_revoked = jti in self._filter
+        if self.synced and not maybe_revoked:
+            return False
+        
+        try:
+            return bool(get_redis().exists(f'{KEY_PREFIX}{jti}'))
+        except RedisError as e:
+            if maybe_revoked:
+                # The filter says the token is probably revoked: fail closed
+                current_app.logger.warning(f'Blocklist unavailable, rejecting token {jti}: {e}')
+                return True
+            # Nothing to go on at all; don't lock every user out
+            current_app.logger.warning(f'Blocklist unavailable, accepting token {jti}: {e}')
+            return False
+    
+    def reload(self):
+        """Rebuild the filter from Redis, dropping entries that have expired"""
+        with self._lock:
+            self._added_during_reload = []
+        try:
+            keys = get_redis().scan_iter(f'{KEY_PREFIX}*', count=1000)
+            jtis = [key[len(KEY_PREFIX):] for key in keys]
+        except RedisError:
+            with self._lock:
+                self._added_during_reload = None
+            raise
+        
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            for jti in self._added_during_reload:
+                bloom.add(jti)
+            self._added_during_reload = None
+            self._filter = bloom
+            self.synced = True
+    
+    def _add(self, jti):
+        with self._lock:
+            self._filter.add(jti)
+            if self._added_during_reload is not None:
+                self._added_during_reload.append(jti)
+    
+    def _ensure_synced(self):
+        if current_app.config['JWT_BLOCKLIST_SUBSCRIBE']:
+            with self._lock:
+                if self._listener_started:
+                    return
+                self._listener_started = True
+            socketio.start_background_task(self._listen, current_app._get_current_object())
+            return
+        
+        # Without a subscription, reload the whole list every poll_interval:
+        # this bounds how long a token revoked elsewhere is still accepted
+        now = time.monotonic()
+        if now < self._next_reload:
+            return
+        try:
+            self.reload()
+            self._next_reload = now + self.poll_interval
+        except RedisError as e:
+            self._next_reload = now + 5
+            current_app.logger.warning(f'Could not load token blocklist: {e}')
+    
+    def _listen(self, app):
+        """Follow revocations published by other processes, resyncing periodically"""
+        with app.app_context():
+            while True:
+                try:
+                    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(CHANNEL)
+                    # Load after subscribing so no revocation falls in between
+                    self.reload()
+                    next_reload = time.monotonic() + self.resync_interval
+                    while time.monotonic() < next_reload:
+                        # Poll without blocking so an unpatched green loop keeps running
+                        message = pubsub.get_message(timeout=0)
+                        if message:
+                            self._add(message['data'])
+                        else:
+                            socketio.sleep(POLL_INTERVAL)
+                    pubsub.close()
+                except RedisError as e:
+                    app.logger.warning(f'Token blocklist subscription lost: {e}')
+                    self.synced = False
+                    socketio.sleep(5)
+
+
+def get_blocklist():
+    """Token blocklist of the current application"""
+    if 'token_blocklist' not in current_app.extensions:
+        current_app.extensions['token_blocklist'] = TokenBlocklist(
+            capacity=current_app.config['JWT_BLOCKLIST_CAPACITY'],
+            error_rate=current_app.config['JWT_BLOCKLIST_ERROR_RATE'],
+            resync_interval=current_app.config['JWT_BLOCKLIST_RESYNC_INTERVAL'],
+            poll_interval=current_app.config['JWT_BLOCKLIST_POLL_INTERVAL'],
+        )
+    return current_app.extensions['token_blocklist']
+
+
+def decode_refresh_token(encoded, identity):
+    """
+    Claims of a refresh token sent in to be revoked along with an access token
+    
+    Returns None for an expired token, which needs no revoking, and raises
+    ValueError for anything but a refresh token of ``identity``.
+    """
+    try:
+        claims = decode_token(encoded)
+    except ExpiredSignatureError:
+        return None
+    except (InvalidTokenError, JWTExtendedException):
+        raise ValueError('Invalid refresh token') from None
+    
+    if claims['type'] != 'refresh' or claims['sub'] != identity:
+        raise ValueError('Invalid refresh token')
+    return claims
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return get_blocklist().is_revoked(jwt_payload['jti'])
@@ -0,0 +1,122 @@
+"""
+Task change feed
+
+Each user has a monotonically increasing change sequence. Every task write
+stamps the written tasks' task_changes rows with fresh sequence numbers in
+the same transaction, keeping one row per task (deletes leave a
+tombstone). A client that remembers the last sequence it has seen (its
+cursor) can then fetch just what changed since, at a cost proportional to
+the number of changes rather than the number of tasks.
+
+The sequence row is incremented with an upsert, which holds its row lock
+until commit, so a user's writes commit in sequence order and a cursor
+never skips a change that commits later. The same numbers serve as cheap
+versions for HTTP ETags.
+"""
+from sqlalchemy import delete, func, insert, select
+from app import db
+from app.models import Task, TaskChange, TaskChangeSequence
+from app.utils.sql import increment_counters, upsert_insert
+
+DEFAULT_CHANGES_LIMIT = 500
+
+MAX_CHANGES_LIMIT = 1000
+
+
+def append_changes(user_id, changed_ids=(), deleted_ids=()):
+    """
+    Record task writes in the user's change feed (the caller commits)
+    
+    Args:
+        user_id: Owner of the tasks
+        changed_ids: Ids of created or updated tasks
+        deleted_ids: Ids of deleted tasks
+    """
+    deleted_ids = list(dict.fromkeys(deleted_ids))
+    changed_ids = [task_id for task_id in dict.fromkeys(changed_ids) if task_id not in deleted_ids]
+    count = len(changed_ids) + len(deleted_ids)
+    if not count:
+        return
+    
+    increment_counters(TaskChangeSequence.__table__, ('user_id',), 'last_seq', [
+        {'user_id': user_id, 'last_seq': count}
+    ])
+    first_seq = current_seq(user_id) - count + 1
+    
+    rows = [
+        {'user_id': user_id, 'task_id': task_id, 'seq': first_seq + offset, 'deleted': deleted}
+        for offset, (task_id, deleted) in enumerate(
+            [(task_id, False) for task_id in changed_ids] + [(task_id, True) for task_id in deleted_ids]
+        )
+    ]
+    
+    table = TaskChange.__table__
+    statement = upsert_insert(table)
+    if statement is not None:
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id', 'task_id'],
+            set_={'seq': statement.excluded.seq, 'deleted': statement.excluded.deleted}
+        ), rows)
+        return
+    
+    db.session.execute(delete(table).where(
+        table.c.user_id == user_id, table.c.task_id.in_([row['task_id'] for row in rows])
+    ))
+    db.session.execute(insert(table), rows)
+
+
+def current_seq(user_id):
+    """Latest change sequence number of a user (0 before the first write)"""
+    return db.session.scalar(
+        select(TaskChangeSequence.last_seq).where(TaskChangeSequence.user_id == user_id)
+    ) or 0
+
+
+def task_version(user_id, task_id):
+    """
+    Sequence number of a task's latest change
+    
+    Tasks written before the change feed existed have no change row; they
+    fall back to the user's sequence, which is still bumped by any write.
+    """
+    own = select(TaskChange.seq).where(
+        TaskChange.user_id == user_id, TaskChange.task_id == task_id
+    ).scalar_subquery()
+    user = select(TaskChangeSequence.last_seq).where(
+        TaskChangeSequence.user_id == user_id
+    ).scalar_subquery()
+    return db.session.scalar(select(func.coalesce(own, user, 0)))
+
+
+def get_changes(user_id, since, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Tasks changed after sequence number since, oldest change first
+    
+    Returns:
+        (tasks, deleted_ids, seq, has_more) where tasks are the current
+        versions of created/updated tasks, deleted_ids the ids of deleted
+        ones and seq the sequence number to continue from. has_more is set
+        when the limit cut the feed short.
+    """
+    rows = db.session.execute(
+        select(TaskChange.task_id, TaskChange.seq, TaskChange.deleted)
+        .where(TaskChange.user_id == user_id, TaskChange.seq > since)
+        .order_by(TaskChange.seq)
+        .limit(limit + 1)
+    ).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    changed_ids = [row.task_id for row in rows if not row.deleted]
+    deleted_ids = [row.task_id for row in rows if row.deleted]
+    tasks = []
+    if changed_ids:
+        by_id = {
+            task.id: task for task in Task.query.filter(
+                Task.user_id == user_id, Task.id.in_(changed_ids)
+            )
+        }
+        tasks = [by_id[task_id] for task_id in changed_ids if task_id in by_id]
+    
+    return tasks, deleted_ids, rows[-1].seq if rows else since, has_more
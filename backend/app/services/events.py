@@ -0,0 +1,127 @@
+"""
+Task WebSocket events
+
+Task writes publish their changes here once committed. Events are held per
+user room for TASK_EVENT_WINDOW seconds and merged per task (an update
+after a create folds into the create, a delete cancels a create made in
+the same window, repeated updates merge their fields), then sent from a
+background task as one ``tasks_changed`` event per room, so emitting never
+adds to request latency. Updates carry only the fields that changed.
+Writes too large to describe task by task (imports) only set ``resync`` in
+the event, telling clients to catch up from the change feed.
+
+How many changes were enqueued and coalesced and how many events were sent
+is counted in the application's ``task_events_total`` metric (/metrics).
+"""
+import threading
+from flask import current_app
+from app import socketio
+from app.utils.instrumentation import MetricCounter, get_request_metrics
+
+EVENT_NAME = 'tasks_changed'
+
+
+class TaskEventDispatcher:
+    """Per-room buffer of task events for one application"""
+    
+    def __init__(self, window, counters=None):
+        self.window = window
+        self.counters = counters or MetricCounter('task_events_total', 'Task WebSocket events', 'stage')
+        self._pending = {}   # room -> {task_id: [kind, data]}
+        self._resync = set()   # rooms told to catch up from the change feed
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+    
+    def publish(self, user_id, created=(), updated=(), deleted=(), resync=False):
+        """
+        Queue committed task changes for a user's room
+        
+        Args:
+            user_id: Owner of the tasks
+            created: Serialized new tasks
+            updated: Deltas of updated tasks, each with the task ``id`` and
+                the changed fields
+            deleted: Ids of deleted tasks
+            resync: Whether other changes happened that the clients should
+                fetch from the change feed
+        """
+        room = f'user_{user_id}'
+        with self._lock:
+            pending = self._pending.setdefault(room, {})
+            for task in created:
+                self._merge(pending, task['id'], 'created', dict(task))
+            for delta in updated:
+                self._merge(pending, delta['id'], 'updated', dict(delta))
+            for task_id in deleted:
+                self._merge(pending, task_id, 'deleted', None)
+            if resync:
+                self._resync.add(room)
+            if not pending and room not in self._resync:
+                del self._pending[room]
+            schedule = bool(self._pending) and not self._flush_scheduled
+            self._flush_scheduled = self._flush_scheduled or schedule
+        
+        if schedule:
+            socketio.start_background_task(self._flush_later)
+    
+    def _merge(self, pending, task_id, kind, data):
+        self.counters.inc('enqueued')
+        previous = pending.get(task_id)
+        if previous is None:
+            pending[task_id] = [kind, data]
+            return
+        
+        self.counters.inc('coalesced')
+        previous_kind, previous_data = previous
+        if kind == 'updated' and previous_kind in ('created', 'updated'):
+            previous_data.update(data)
+        elif kind == 'deleted' and previous_kind == 'created':
+            # Never sent, so the clients need not hear of it at all
+            del pending[task_id]
+        else:
+            pending[task_id] = [kind, data]
+    
+    def _flush_later(self):
+        socketio.sleep(self.window)
+        self.flush()
+    
+    def flush(self):
+        """Send everything buffered, one event per room"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            resync, self._resync = self._resync, set()
+            self._flush_scheduled = False
+        
+        for room, events in pending.items():
+            payload = {'created': [], 'updated': [], 'deleted': []}
+            for task_id, (kind, data) in events.items():
+                payload[kind].append(task_id if kind == 'deleted' else data)
+            if room in resync:
+                payload['resync'] = True
+            socketio.emit(EVENT_NAME, payload, room=room)
+            self.counters.inc('sent')
+
+
+def get_task_events():
+    """Task event dispatcher of the current application"""
+    if 'task_events' not in current_app.extensions:
+        current_app.extensions['task_events'] = TaskEventDispatcher(
+            window=current_app.config['TASK_EVENT_WINDOW'],
+            counters=get_request_metrics().task_events,
+        )
+    return current_app.extensions['task_events']
+
+
+def task_delta(before, after, fields=()):
+    """
+    Fields of a serialized task that differ between two versions
+    
+    Args:
+        before: Serialized task before the write
+        after: Serialized task after the write
+        fields: Fields to include whether or not they changed
+    """
+    delta = {'id': after['id']}
+    delta.update((field, value) for field, value in after.items() if before.get(field) != value)
+    delta.update((field, after[field]) for field in fields)
+    return delta
@@ -0,0 +1,111 @@
+"""
+Streaming task export
+
+Rows are read with yield_per, which uses a server-side cursor on
+PostgreSQL, and encoded chunk by chunk, so memory use depends on the
+chunk size rather than on how many tasks a user has. Tags are loaded with
+one query per chunk.
+
+CSV cells are written so that the importer (app.services.task_import) reads
+them back unchanged. Tags share one cell, separated by commas; commas and
+backslashes inside tag names are escaped with a backslash. Text that a
+spreadsheet would evaluate as a formula (starting with =, +, -, @, tab or
+carriage return) is prefixed with a single quote.
+"""
+import csv
+import io
+from datetime import date, datetime
+from app import db
+from app.services.projections import attach_tags
+from app.utils.serialization import dumps
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'tasks.ndjson'),
+    'csv': ('text/csv', 'tasks.csv'),
+}
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_task_chunks(statement, chunk_size, with_tags=True):
+    """Yield the rows of a task select as lists of dicts, chunk_size at a time"""
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+    keys = tuple(result.keys())
+    for rows in result.partitions():
+        tasks = [dict(zip(keys, row)) for row in rows]
+        if with_tags:
+            attach_tags(tasks)
+        yield tasks
+
+
+def ndjson_chunks(chunks):
+    """Encode chunks of task dicts as newline-delimited JSON"""
+    for tasks in chunks:
+        yield b''.join(dumps(task) + b'\n' for task in tasks)
+
+
+def join_tags(names):
+    """Tag names as one CSV cell"""
+    return ','.join(name.replace('\\', '\\\\').replace(',', '\\,') for name in names)
+
+
+def split_tags(cell):
+    """Tag names of a cell written by join_tags(), or typed by hand"""
+    names, current, escaped = [], [], False
+    for char in cell:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ',':
+            names.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    names.append(''.join(current))
+    return [name.strip() for name in names if name.strip()]
+
+
+def quote_formula(text):
+    """Text for a CSV cell that spreadsheets will not evaluate"""
+    if text.lstrip("'").startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+def unquote_formula(cell):
+    """Undo quote_formula()"""
+    if cell.startswith("'") and cell.lstrip("'").startswith(FORMULA_PREFIXES):
+        return cell[1:]
+    return cell
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return quote_formula(join_tags(value))
+    if isinstance(value, str):
+        return quote_formula(value)
+    return value
+
+
+def _drain(buffer):
+    data = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def csv_chunks(chunks, columns):
+    """Encode chunks of task dicts as CSV, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield _drain(buffer)
+    for tasks in chunks:
+        writer.writerows([_csv_value(task[column]) for column in columns] for task in tasks)
+        yield _drain(buffer)
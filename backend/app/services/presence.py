@@ -0,0 +1,105 @@
+"""
+Socket.IO presence
+
+Counts each user's open Socket.IO connections across all worker processes.
+Every worker keeps its own counts in the Redis hash ``presence:{user_id}``
+(one field per worker) and refreshes a ``presence:worker:{worker_id}``
+heartbeat key; counts of workers whose heartbeat has expired (a crashed or
+killed process) are ignored when reading, so they never inflate presence.
+"""
+import os
+import socket
+import threading
+import uuid
+from collections import Counter
+from flask import current_app
+from redis.exceptions import RedisError
+from app import socketio
+from app.utils.cache import get_redis
+
+KEY_PREFIX = 'presence:'
+WORKER_KEY_PREFIX = 'presence:worker:'
+
+
+class PresenceTracker:
+    """Connections of the current worker process, mirrored to Redis"""
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.counts = Counter()
+        self._users = {}   # sid -> user_id
+        self._lock = threading.Lock()
+        self._heartbeat_started = False
+    
+    def connected(self, sid, user_id):
+        """Record a new connection of a user"""
+        with self._lock:
+            self._users[sid] = user_id
+            self.counts[user_id] += 1
+            start_heartbeat = not self._heartbeat_started
+            self._heartbeat_started = True
+        
+        if start_heartbeat:
+            self._beat()
+            socketio.start_background_task(self._heartbeat, current_app._get_current_object())
+        try:
+            get_redis().hincrby(f'{KEY_PREFIX}{user_id}', self.worker_id, 1)
+        except RedisError as e:
+            current_app.logger.warning(f'Could not record presence of user {user_id}: {e}')
+    
+    def disconnected(self, sid):
+        """Record the end of a connection"""
+        with self._lock:
+            user_id = self._users.pop(sid, None)
+            if user_id is None:
+                return
+            self.counts[user_id] -= 1
+            remaining = self.counts[user_id]
+            if not remaining:
+                del self.counts[user_id]
+        
+        key = f'{KEY_PREFIX}{user_id}'
+        try:
+            if remaining:
+                get_redis().hincrby(key, self.worker_id, -1)
+            else:
+                get_redis().hdel(key, self.worker_id)
+        except RedisError as e:
+            current_app.logger.warning(f'Could not record presence of user {user_id}: {e}')
+    
+    def connection_count(self, user_id):
+        """Open connections of a user across all live workers"""
+        try:
+            redis = get_redis()
+            per_worker = redis.hgetall(f'{KEY_PREFIX}{user_id}')
+            if not per_worker:
+                return 0
+            workers = list(per_worker)
+            alive = redis.mget([f'{WORKER_KEY_PREFIX}{worker}' for worker in workers])
+        except RedisError as e:
+            current_app.logger.warning(f'Presence unavailable, counting this worker only: {e}')
+            return self.counts[user_id]
+        
+        return sum(
+            max(0, int(per_worker[worker])) for worker, beat in zip(workers, alive) if beat
+        )
+    
+    def _beat(self):
+        try:
+            get_redis().setex(f'{WORKER_KEY_PREFIX}{self.worker_id}', self.ttl, '1')
+        except RedisError as e:
+            current_app.logger.warning(f'Could not refresh presence heartbeat: {e}')
+    
+    def _heartbeat(self, app):
+        with app.app_context():
+            while True:
+                socketio.sleep(self.ttl / 3)
+                self._beat()
+
+
+def get_presence():
+    """Presence tracker of the current application"""
+    if 'presence' not in current_app.extensions:
+        current_app.extensions['presence'] = PresenceTracker(ttl=current_app.config['PRESENCE_TTL'])
+    return current_app.extensions['presence']
@@ -0,0 +1,143 @@
+"""
+Productivity rollups
+
+Maintains daily_completions, the number of tasks each user completed per
+UTC day, from task write snapshots, and answers completion time series
+from it instead of grouping the raw tasks table.
+"""
+from collections import Counter
+from datetime import date, timedelta
+from sqlalchemy import delete, func, insert
+from app import db
+from app.models import Task, DailyCompletion
+from app.utils.sql import increment_counters
+
+GRANULARITIES = ('day', 'week', 'month')
+
+MAX_RANGE_DAYS = 3660
+
+
+def completion_day(task):
+    """UTC day a task snapshot counts as completed on, or None"""
+    if task['status'] == 'completed' and task['completed_at'] is not None:
+        return task['completed_at'].date()
+    return None
+
+
+def apply_completion_changes(user_id, changes):
+    """
+    Apply the rollup deltas of task writes for a user
+    
+    Args:
+        user_id: Owner of the changed tasks
+        changes: (before, after) snapshot pairs, as for
+            app.services.task_writes.record_task_changes
+    """
+    deltas = Counter()
+    for before, after in changes:
+        day = before is not None and completion_day(before)
+        if day:
+            deltas[day] -= 1
+        day = after is not None and completion_day(after)
+        if day:
+            deltas[day] += 1
+    
+    increment_counters(DailyCompletion.__table__, ('user_id', 'day'), 'completed', [
+        {'user_id': user_id, 'day': day, 'completed': delta}
+        for day, delta in sorted(deltas.items()) if delta
+    ])
+
+
+def bucket_start(day, granularity):
+    """First day of the day/week (ISO, Monday-based)/month bucket containing day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def get_completion_series(user_id, start, end, granularity='day'):
+    """
+    Completed task counts for every bucket between start and end (inclusive)
+    
+    Buckets without completions are returned with a zero count. Reads at
+    most one rollup row per day in the range.
+    """
+    rows = db.session.query(DailyCompletion.day, DailyCompletion.completed).filter(
+        DailyCompletion.user_id == user_id,
+        DailyCompletion.day >= start,
+        DailyCompletion.day <= end
+    )
+    
+    counts = Counter()
+    for day, completed in rows:
+        counts[bucket_start(day, granularity)] += completed
+    
+    series = []
+    bucket = bucket_start(start, granularity)
+    while bucket <= end:
+        series.append({'date': bucket.isoformat(), 'count': counts[bucket]})
+        bucket = _next_bucket(bucket, granularity)
+    return series
+
+
+def compute_daily_completions(user_ids=None):
+    """Recount the rollup from the tasks table, as {(user_id, day): completed}"""
+    day = func.date(Task.completed_at)
+    query = db.session.query(Task.user_id, day, func.count(Task.id)).filter(
+        Task.status == 'completed', Task.completed_at.isnot(None)
+    ).group_by(Task.user_id, day)
+    if user_ids is not None:
+        query = query.filter(Task.user_id.in_(user_ids))
+    
+    return {
+        (user_id, day if isinstance(day, date) else date.fromisoformat(day)): count
+        for user_id, day, count in query
+    }
+
+
+def reconcile_daily_completions(user_ids=None, fix=True):
+    """
+    Compare the rollup with a recount from tasks
+    
+    Returns a list of (user_id, day, stored, actual) tuples for every day
+    that drifted. With fix=True the rollup of the affected users is
+    rewritten (the caller commits).
+    """
+    actual = compute_daily_completions(user_ids)
+    
+    stored_query = db.session.query(
+        DailyCompletion.user_id, DailyCompletion.day, DailyCompletion.completed
+    )
+    if user_ids is not None:
+        stored_query = stored_query.filter(DailyCompletion.user_id.in_(user_ids))
+    stored = {(user_id, day): completed for user_id, day, completed in stored_query}
+    
+    drift = [
+        (user_id, day, stored.get((user_id, day), 0), actual.get((user_id, day), 0))
+        for user_id, day in sorted(actual.keys() | stored.keys())
+        if stored.get((user_id, day), 0) != actual.get((user_id, day), 0)
+    ]
+    
+    if fix and drift:
+        drifted_users = {user_id for user_id, _, _, _ in drift}
+        db.session.execute(
+            delete(DailyCompletion).where(DailyCompletion.user_id.in_(sorted(drifted_users)))
+        )
+        rows = [
+            {'user_id': user_id, 'day': day, 'completed': completed}
+            for (user_id, day), completed in sorted(actual.items()) if user_id in drifted_users
+        ]
+        if rows:
+            db.session.execute(insert(DailyCompletion), rows)
+    
+    return drift
@@ -0,0 +1,102 @@
+"""
+Read-only projections
+
+List endpoints select just the columns they return with Core statements
+and turn the rows into plain dicts, which skips ORM object construction,
+identity-map bookkeeping and per-object to_dict() calls. Datetimes are
+left as they are for app.utils.serialization to encode.
+"""
+import math
+from sqlalchemy import func, select
+from app import db
+from app.models import Task, Tag, User
+
+TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+    Task.completed_at, Task.user_id, Task.created_at, Task.updated_at,
+)
+
+USER_COLUMNS = (
+    User.id, User.username, User.first_name, User.last_name, User.avatar_url,
+    User.is_active, User.is_admin, User.created_at, User.last_login,
+)
+
+TAG_COLUMNS = (Tag.id, Tag.name, Tag.color, Tag.created_at)
+
+# Names accepted by a ``fields=`` parameter; tasks also accept 'tags'
+TASK_FIELDS = tuple(column.key for column in TASK_COLUMNS) + ('tags',)
+USER_FIELDS = tuple(column.key for column in USER_COLUMNS)
+
+
+def parse_fields(value, allowed):
+    """
+    Parse a comma-separated ``fields=`` parameter
+    
+    Returns the requested names in order, always led by 'id', or None when
+    value is empty (all fields). Raises ValueError naming unknown fields.
+    """
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    if not names:
+        return None
+    
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(['id'] + names))
+
+
+def _project(columns, fields):
+    if fields is None:
+        return columns
+    return tuple(column for column in columns if column.key in fields)
+
+
+def select_tasks(user_id, fields=None):
+    """
+    Statement for a user's tasks, in the shape of Task.to_dict() minus tags
+    
+    With fields (see parse_fields) only those columns are selected.
+    """
+    return select(*_project(TASK_COLUMNS, fields)).where(Task.user_id == user_id)
+
+
+def select_users(fields=None):
+    """Statement for public user profiles, in the shape of User.to_dict()"""
+    return select(*_project(USER_COLUMNS, fields))
+
+
+def select_tags():
+    """Statement for tags, in the shape of Tag.to_dict()"""
+    return select(*TAG_COLUMNS)
+
+
+def fetch_dicts(statement):
+    """Run a statement and return its rows as dicts keyed by column name"""
+    result = db.session.execute(statement)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def attach_tags(tasks):
+    """Add the tag names of task dicts in place, using a single query"""
+    tag_names = Task.load_tag_names([task['id'] for task in tasks])
+    for task in tasks:
+        task['tags'] = tag_names[task['id']]
+    return tasks
+
+
+def paginate(statement, page, per_page):
+    """
+    One page of an ordered statement as dicts
+    
+    Out-of-range arguments are handled like Flask-SQLAlchemy's
+    paginate(error_out=False). Returns (rows, total, pages).
+    """
+    page = max(page, 1)
+    per_page = per_page if per_page > 0 else 20
+    
+    total = db.session.scalar(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    )
+    rows = fetch_dicts(statement.limit(per_page).offset((page - 1) * per_page))
+    return rows, total, math.ceil(total / per_page)
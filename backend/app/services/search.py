@@ -0,0 +1,62 @@
+"""
+Full-text task search
+
+Backed by the tsvector column (PostgreSQL) or the tasks_fts table (SQLite)
+that app/models/task.py installs next to the tasks table. Other databases
+fall back to a substring match without ranking.
+"""
+import re
+from sqlalchemy import func, literal_column, or_, table, column
+from app import db
+from app.models import Task
+
+tasks_fts = table('tasks_fts', column('rowid'))
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(term):
+    """Split user input into the words used to build a full-text query"""
+    return _WORD_RE.findall(term or '')
+
+
+def apply_search(query, term):
+    """
+    Restrict a Task query to full-text matches of term
+    
+    Every word must match, as a prefix, in the title or description.
+    Returns (query, rank) where rank is an ORDER BY clause putting the most
+    relevant tasks first, or None when no ranking is available. Input without
+    any searchable word leaves the query untouched.
+    """
+    words = search_terms(term)
+    if not words:
+        return query, None
+    
+    dialect = db.engine.dialect.name
+    
+    if dialect == 'postgresql':
+        tsquery = func.to_tsquery('english', ' & '.join(f'{word}:*' for word in words))
+        vector = literal_column('tasks.search_vector')
+        query = query.filter(vector.op('@@')(tsquery))
+        return query, func.ts_rank(vector, tsquery).desc()
+    
+    if dialect == 'sqlite':
+        match = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+        query = query.join(tasks_fts, tasks_fts.c.rowid == Task.id).filter(
+            literal_column('tasks_fts').op('MATCH')(match)
+        )
+        # bm25() is lower for better matches; weight title above description
+        return query, literal_column('bm25(tasks_fts, 2.0, 1.0)').asc()
+    
+    for word in words:
+        pattern = f'%{word}%'
+        query = query.filter(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+    return query, None
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table from tasks (PostgreSQL needs no rebuild)"""
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')"))
+        db.session.commit()
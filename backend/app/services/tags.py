@@ -0,0 +1,167 @@
+"""
+Tag resolution
+
+Resolves tag names to ids with set-based queries, creating missing tags
+with a single conflict-tolerant insert, and maintains task_tags by applying
+only the difference between the current and wanted associations.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Tag
+from app.models.task import task_tags
+from app.utils.sql import upsert_insert
+
+
+class TagCache:
+    """Bounded, thread-safe LRU mapping of tag name to id"""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_many(self, names):
+        """Return the cached ids for whichever of names are present"""
+        found = {}
+        with self._lock:
+            for name in names:
+                tag_id = self._entries.get(name)
+                if tag_id is not None:
+                    self._entries.move_to_end(name)
+                    found[name] = tag_id
+        return found
+    
+    def put_many(self, tag_ids):
+        with self._lock:
+            for name, tag_id in tag_ids.items():
+                self._entries[name] = tag_id
+                self._entries.move_to_end(name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_tag_cache():
+    """Tag cache of the current application"""
+    if 'tag_cache' not in current_app.extensions:
+        current_app.extensions['tag_cache'] = TagCache(current_app.config['TAG_CACHE_SIZE'])
+    return current_app.extensions['tag_cache']
+
+
+def normalize_tag_names(tags):
+    """
+    Validate a tags payload and de-duplicate it, keeping the given order
+    
+    Raises ValueError unless tags is a list of strings; None means no tags.
+    """
+    if tags is None:
+        return []
+    if not isinstance(tags, list) or not all(isinstance(name, str) for name in tags):
+        raise ValueError('tags must be a list of strings')
+    return list(dict.fromkeys(tags))
+
+
+def resolve_tag_ids(names):
+    """
+    Map tag names to ids, creating the tags that do not exist yet
+    
+    Costs at most one SELECT for uncached names, plus one INSERT ... ON
+    CONFLICT DO NOTHING and one SELECT when some names are new. Concurrent
+    requests creating the same tag do not fail on the unique constraint.
+    """
+    names = set(names)
+    if not names:
+        return {}
+    
+    cache = get_tag_cache()
+    tag_ids = cache.get_many(names)
+    missing = names - tag_ids.keys()
+    if not missing:
+        return tag_ids
+    
+    # Only rows committed before this transaction go into the cache; ids of
+    # tags created below would be wrong if the transaction rolled back.
+    found = dict(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(missing)))
+    cache.put_many(found)
+    tag_ids.update(found)
+    missing -= found.keys()
+    
+    if missing:
+        _insert_tags(missing)
+        tag_ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(missing)))
+    
+    return tag_ids
+
+
+def _insert_tags(names):
+    now = datetime.utcnow()
+    rows = [{'name': name, 'created_at': now} for name in sorted(names)]
+    
+    statement = upsert_insert(Tag.__table__)
+    if statement is not None:
+        db.session.execute(statement.on_conflict_do_nothing(index_elements=['name']), rows)
+        return
+    
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Tag.__table__), row)
+        except IntegrityError:
+            pass
+
+
+def sync_task_tags(tag_names_by_task, new_task_ids=()):
+    """
+    Make each task's tags exactly the given names
+    
+    Only the difference is written: stale associations are deleted and
+    missing ones inserted, each with a single statement for all tasks.
+    
+    Args:
+        tag_names_by_task: Mapping of task id to the wanted tag names
+        new_task_ids: Ids of tasks inserted in this transaction, which are
+            known to have no associations yet
+    """
+    if not tag_names_by_task:
+        return
+    
+    tag_ids = resolve_tag_ids(
+        name for names in tag_names_by_task.values() for name in names
+    )
+    wanted = {
+        (task_id, tag_ids[name])
+        for task_id, names in tag_names_by_task.items() for name in names
+    }
+    
+    new_task_ids = set(new_task_ids)
+    existing_ids = [task_id for task_id in tag_names_by_task if task_id not in new_task_ids]
+    current = set()
+    if existing_ids:
+        current = set(db.session.query(task_tags.c.task_id, task_tags.c.tag_id).filter(
+            task_tags.c.task_id.in_(existing_ids)
+        ))
+    
+    stale = current - wanted
+    if stale:
+        db.session.execute(delete(task_tags).where(
+            tuple_(task_tags.c.task_id, task_tags.c.tag_id).in_(list(stale))
+        ))
+    
+    fresh = wanted - current
+    if fresh:
+        now = datetime.utcnow()
+        db.session.execute(insert(task_tags), [
+            {'task_id': task_id, 'tag_id': tag_id, 'created_at': now}
+            for task_id, tag_id in sorted(fresh)
+        ])
@@ -0,0 +1,248 @@
+"""
+Batched task writes
+
+Runs a list of create/update/delete operations for one user with bulk
+INSERT/UPDATE/DELETE statements inside a single transaction.
+"""
+from datetime import datetime
+from sqlalchemy import insert, update, delete
+from app import db
+from app.models import Task
+from app.models.task import task_tags
+from app.services.tags import normalize_tag_names, sync_task_tags
+from app.services.task_writes import record_task_changes, record_task_ids, snapshot
+from app.utils.validators import parse_iso_datetime
+
+MAX_BATCH_OPERATIONS = 500
+
+UPDATABLE_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+
+STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+PRIORITIES = ('low', 'medium', 'high', 'urgent')
+MAX_TITLE_LENGTH = 200
+
+
+class BatchOperationError(Exception):
+    """An operation in a batch that cannot be applied"""
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def run_batch(user_id, operations):
+    """
+    Apply a batch of task operations for a user
+    
+    Args:
+        user_id: Owner of every task touched by the batch
+        operations: List of ``{'op': 'create', 'data': {...}}``,
+            ``{'op': 'update', 'id': 1, 'data': {...}}`` or
+            ``{'op': 'delete', 'id': 1}`` dicts
+    
+    Returns:
+        (results, changes) where results holds one entry per operation, in
+        order, and changes groups the created tasks, the deltas of updated
+        tasks and the deleted ids for the WebSocket event.
+    """
+    results = [None] * len(operations)
+    creates = []   # (index, row, tag names or None)
+    updates = {}   # task_id -> (index, values, tag names or None)
+    deletes = {}   # task_id -> index
+    
+    target_ids = list({
+        op['id'] for op in operations if isinstance(op, dict) and _is_task_id(op.get('id'))
+    })
+    existing = {
+        task.id: task for task in Task.query.filter(
+            Task.user_id == user_id, Task.id.in_(target_ids)
+        )
+    } if target_ids else {}
+    
+    now = datetime.utcnow()
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        try:
+            if op == 'create':
+                row, tags = _create_values(operation.get('data'), now)
+                row['user_id'] = user_id
+                creates.append((index, row, tags))
+                continue
+            
+            if op not in ('update', 'delete'):
+                raise BatchOperationError('op must be one of create, update, delete')
+            
+            task_id = operation.get('id')
+            if not _is_task_id(task_id):
+                raise BatchOperationError('id must be an integer')
+            if task_id not in existing:
+                raise BatchOperationError('Task not found', 404)
+            if task_id in updates or task_id in deletes:
+                raise BatchOperationError('Task is already targeted by this batch', 409)
+            
+            if op == 'update':
+                values, tags = _update_values(existing[task_id], operation.get('data'), now)
+                updates[task_id] = (index, values, tags)
+            else:
+                deletes[task_id] = index
+        except BatchOperationError as e:
+            results[index] = {'index': index, 'op': op, 'status': e.status, 'error': e.message}
+    
+    record_task_changes(user_id, [
+        (None, snapshot(row)) for _, row, _ in creates
+    ] + [
+        (snapshot(existing[task_id]), snapshot({**snapshot(existing[task_id]), **values}))
+        for task_id, (_, values, _) in updates.items()
+    ] + [
+        (snapshot(existing[task_id]), None) for task_id in deletes
+    ])
+    
+    created_ids = []
+    if creates:
+        created_ids = db.session.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [row for _, row, _ in creates]
+        ).all()
+    
+    if updates:
+        db.session.execute(update(Task), [
+            {'id': task_id, **values, 'updated_at': now}
+            for task_id, (_, values, _) in updates.items()
+        ])
+    
+    tag_names_by_task = {
+        task_id: tags for task_id, (_, _, tags) in zip(created_ids, creates) if tags
+    }
+    tag_names_by_task.update(
+        (task_id, tags) for task_id, (_, _, tags) in updates.items() if tags is not None
+    )
+    sync_task_tags(tag_names_by_task, new_task_ids=created_ids)
+    
+    if deletes:
+        db.session.execute(delete(task_tags).where(task_tags.c.task_id.in_(list(deletes))))
+        db.session.execute(
+            delete(Task).where(Task.user_id == user_id, Task.id.in_(list(deletes))),
+            execution_options={'synchronize_session': False}
+        )
+    
+    record_task_ids(user_id, changed_ids=list(created_ids) + list(updates), deleted_ids=list(deletes))
+    db.session.commit()
+    
+    written_ids = list(created_ids) + list(updates)
+    serialized = {}
+    if written_ids:
+        tasks = Task.query.filter(Task.id.in_(written_ids)).all()
+        serialized = {data['id']: data for data in Task.serialize_many(tasks)}
+    
+    for task_id, (index, _, _) in zip(created_ids, creates):
+        results[index] = {'index': index, 'op': 'create', 'status': 201, 'task': serialized[task_id]}
+    for task_id, (index, _, _) in updates.items():
+        results[index] = {'index': index, 'op': 'update', 'status': 200, 'task': serialized[task_id]}
+    for task_id, index in deletes.items():
+        results[index] = {'index': index, 'op': 'delete', 'status': 200, 'task_id': task_id}
+    
+    changes = {
+        'created': [serialized[task_id] for task_id in created_ids],
+        'updated': [
+            _update_delta(serialized[task_id], values, tags)
+            for task_id, (_, values, tags) in updates.items()
+        ],
+        'deleted': list(deletes),
+    }
+    return results, changes
+
+
+def _create_values(data, now):
+    """Validate a create payload and build a complete INSERT row"""
+    if not isinstance(data, dict):
+        raise BatchOperationError('Title is required')
+    
+    row = {
+        'title': _title(data.get('title')),
+        'description': _description(data.get('description')),
+        'status': _choice(data, 'status', STATUSES, 'pending'),
+        'priority': _choice(data, 'priority', PRIORITIES, 'medium'),
+        'due_date': _due_date(data.get('due_date')),
+        'completed_at': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+    if row['status'] == 'completed':
+        row['completed_at'] = now
+    
+    return row, _tag_names(data.get('tags'))
+
+
+def _update_values(task, data, now):
+    """Validate an update payload and build the changed column values"""
+    if not isinstance(data, dict):
+        raise BatchOperationError('data must be an object')
+    
+    values = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+    if 'title' in values:
+        values['title'] = _title(values['title'])
+    if 'description' in values:
+        values['description'] = _description(values['description'])
+    if 'status' in values:
+        values['status'] = _choice(values, 'status', STATUSES)
+    if 'priority' in values:
+        values['priority'] = _choice(values, 'priority', PRIORITIES)
+    if 'due_date' in values:
+        values['due_date'] = _due_date(values['due_date'])
+    if 'status' in values:
+        if values['status'] == 'completed':
+            values['completed_at'] = task.completed_at or now
+        else:
+            values['completed_at'] = None
+    
+    return values, _tag_names(data['tags']) if 'tags' in data else None
+
+
+def _update_delta(task_data, values, tags):
+    """The fields of a serialized task an update wrote"""
+    fields = list(values) + ['updated_at'] + (['tags'] if tags is not None else [])
+    return {'id': task_data['id'], **{field: task_data[field] for field in fields}}
+
+
+def _is_task_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _title(value):
+    if not isinstance(value, str) or not value.strip():
+        raise BatchOperationError('Title is required')
+    if len(value) > MAX_TITLE_LENGTH:
+        raise BatchOperationError(f'Title is longer than {MAX_TITLE_LENGTH} characters')
+    return value
+
+
+def _description(value):
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise BatchOperationError('description must be a string')
+    return value
+
+
+def _choice(data, field, choices, default=None):
+    value = data.get(field) or default
+    if value not in choices:
+        raise BatchOperationError(f"{field} must be one of {', '.join(choices)}")
+    return value
+
+
+def _due_date(value):
+    if not value:
+        return None
+    try:
+        return parse_iso_datetime(value)
+    except ValueError:
+        raise BatchOperationError('Invalid due_date format') from None
+
+
+def _tag_names(tags):
+    try:
+        return normalize_tag_names(tags)
+    except ValueError as e:
+        raise BatchOperationError(str(e)) from None
@@ -0,0 +1,262 @@
+"""
+Bulk task import
+
+Reads NDJSON or CSV line by line and writes the valid rows in batches of
+IMPORT_BATCH_SIZE, each batch in its own transaction: one multi-row INSERT
+(COPY on PostgreSQL), one tag resolution for all of its tags and the usual
+write bookkeeping of app.services.task_writes. Invalid rows are reported
+with their line number and skipped. Every batch first checks, and locks,
+that the user is still active, so an import stops once the account's
+deletion has begun. Once the import ends, even if it
+fails part way, the dashboard cache is invalidated and connected clients
+get one ``tasks_changed`` event with ``resync`` set, telling them to fetch
+the new tasks from the change feed rather than receiving them all in the
+event.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Task
+from app.services.accounts import is_active_user
+from app.services.export import split_tags, unquote_formula
+from app.services.tags import normalize_tag_names, sync_task_tags
+from app.services.task_batch import MAX_TITLE_LENGTH, PRIORITIES, STATUSES
+from app.services.task_writes import record_task_changes, record_task_ids, snapshot, tasks_committed
+from app.utils.validators import parse_iso_datetime
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# Per-row errors kept for the report; the failed count includes all of them
+MAX_IMPORT_ERRORS = 1000
+
+INSERT_COLUMNS = (
+    'title', 'description', 'status', 'priority', 'due_date', 'completed_at',
+    'user_id', 'created_at', 'updated_at',
+)
+
+
+class ImportRowError(Exception):
+    """A row that cannot be imported"""
+
+
+def read_ndjson(lines):
+    """Yield (line number, object or ImportRowError) for NDJSON text lines"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, ImportRowError('Invalid JSON')
+            continue
+        if not isinstance(record, dict):
+            yield number, ImportRowError('Each line must be a JSON object')
+            continue
+        yield number, record
+
+
+def read_csv(lines):
+    """
+    Yield (line number, dict or ImportRowError) for CSV text lines
+    
+    The first row names the columns; empty cells count as missing. Cells
+    are decoded as the export writes them: tags comma-separated with
+    backslash escapes, formula-looking text behind a single quote.
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, ImportRowError('More cells than columns')
+            continue
+        record = {key: unquote_formula(value) for key, value in record.items() if value not in ('', None)}
+        if 'tags' in record:
+            record['tags'] = split_tags(record['tags'])
+        yield reader.line_num, record
+
+
+def read_records(lines, import_format):
+    """Records of a text stream in one of IMPORT_FORMATS"""
+    return read_csv(lines) if import_format == 'csv' else read_ndjson(lines)
+
+
+def task_values(record, now):
+    """
+    Validate an imported record and build its INSERT row and tag names
+    
+    Besides the fields of create_task, created_at and completed_at may be
+    given to keep the history of migrated tasks. Unknown fields (such as
+    the id of an exported task) are ignored.
+    """
+    title = record.get('title')
+    if not isinstance(title, str) or not title.strip():
+        raise ImportRowError('Title is required')
+    if len(title) > MAX_TITLE_LENGTH:
+        raise ImportRowError(f'Title is longer than {MAX_TITLE_LENGTH} characters')
+    
+    description = record.get('description') or ''
+    if not isinstance(description, str):
+        raise ImportRowError('description must be a string')
+    
+    status = record.get('status') or 'pending'
+    if status not in STATUSES:
+        raise ImportRowError(f"status must be one of {', '.join(STATUSES)}")
+    priority = record.get('priority') or 'medium'
+    if priority not in PRIORITIES:
+        raise ImportRowError(f"priority must be one of {', '.join(PRIORITIES)}")
+    
+    created_at = _datetime(record, 'created_at') or now
+    completed_at = None
+    if status == 'completed':
+        completed_at = _datetime(record, 'completed_at') or now
+    
+    try:
+        tags = normalize_tag_names(record.get('tags'))
+    except ValueError as e:
+        raise ImportRowError(str(e)) from None
+    
+    return {
+        'title': title,
+        'description': description,
+        'status': status,
+        'priority': priority,
+        'due_date': _datetime(record, 'due_date'),
+        'completed_at': completed_at,
+        'created_at': created_at,
+        'updated_at': now,
+    }, tags
+
+
+def _datetime(record, field):
+    value = record.get(field)
+    if not value:
+        return None
+    try:
+        return parse_iso_datetime(value)
+    except ValueError:
+        raise ImportRowError(f'Invalid {field} format') from None
+
+
+def import_records(user_id, records, batch_size=None):
+    """
+    Import records for a user
+    
+    Args:
+        user_id: Owner of the imported tasks
+        records: Iterable of (line number, dict or ImportRowError), as
+            produced by read_records()
+        batch_size: Rows per INSERT and transaction (IMPORT_BATCH_SIZE)
+    
+    Returns:
+        ``{'imported': n, 'failed': n, 'errors': [{'line': n, 'error': ...}]}``
+    """
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    batch = []   # (line number, row, tag names)
+    
+    def fail(line, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_IMPORT_ERRORS:
+            report['errors'].append({'line': line, 'error': message})
+    
+    def flush():
+        """Store the batch; False once the user is deactivated or deleted"""
+        if not is_active_user(user_id, lock=True):
+            db.session.rollback()
+            for line, _, _ in batch:
+                fail(line, 'Account is disabled')
+            batch.clear()
+            return False
+        try:
+            _write_batch(user_id, batch)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning(f'Task import batch failed for user {user_id}: {e}')
+            for line, _, _ in batch:
+                fail(line, 'Could not be stored')
+        else:
+            report['imported'] += len(batch)
+        batch.clear()
+        return True
+    
+    now = datetime.utcnow()
+    try:
+        for line, record in records:
+            try:
+                if isinstance(record, ImportRowError):
+                    raise record
+                row, tags = task_values(record, now)
+            except ImportRowError as e:
+                fail(line, str(e))
+                continue
+            
+            row['user_id'] = user_id
+            batch.append((line, row, tags))
+            if len(batch) >= batch_size and not flush():
+                break
+        if batch:
+            flush()
+    finally:
+        # Also when reading the input fails after some batches committed
+        if report['imported']:
+            tasks_committed(user_id, resync=True)
+    return report
+
+
+def _write_batch(user_id, batch):
+    """Insert one batch of rows with their tags and bookkeeping, and commit"""
+    rows = [row for _, row, _ in batch]
+    record_task_changes(user_id, [(None, snapshot(row)) for row in rows])
+    
+    if db.engine.dialect.name == 'postgresql':
+        task_ids = _copy_tasks(rows)
+    else:
+        # A Core insert: the ORM's bulk insert merges the rows SQLite returns
+        # one by one at a cost quadratic in the batch size
+        table = Task.__table__
+        task_ids = db.session.scalars(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        ).all()
+    
+    sync_task_tags(
+        {task_id: tags for task_id, (_, _, tags) in zip(task_ids, batch) if tags},
+        new_task_ids=task_ids
+    )
+    record_task_ids(user_id, changed_ids=task_ids)
+    db.session.commit()
+
+
+def _copy_tasks(rows):
+    """Insert rows with COPY, taking their ids from the sequence first"""
+    task_ids = db.session.scalars(
+        text("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, :count)"),
+        {'count': len(rows)}
+    ).all()
+    
+    buffer = io.StringIO()
+    for task_id, row in zip(task_ids, rows):
+        buffer.write('\t'.join([str(task_id)] + [_copy_text(row[column]) for column in INSERT_COLUMNS]))
+        buffer.write('\n')
+    buffer.seek(0)
+    
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY tasks (id, {', '.join(INSERT_COLUMNS)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+    return task_ids
+
+
+def _copy_text(value):
+    """A value in COPY's text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
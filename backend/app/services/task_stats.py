@@ -0,0 +1,118 @@
+"""
+Per-user task counters
+
+Keeps user_task_stats in step with the tasks table by applying the counter
+deltas of each write in the same transaction, and can rebuild the counters
+from scratch to repair drift.
+"""
+from collections import Counter
+from sqlalchemy import and_, case, delete, func, insert
+from app import db
+from app.models import Task, UserTaskStat
+from app.utils.sql import increment_counters
+
+
+def stat_metrics(task):
+    """Counter metrics a task snapshot contributes to"""
+    metrics = ['total']
+    if task['status'] is not None:
+        metrics.append(f"status:{task['status']}")
+    if task['priority'] is not None:
+        metrics.append(f"priority:{task['priority']}")
+    if task['status'] != 'completed' and task['due_date'] is not None:
+        metrics.append('open_with_due_date')
+    return metrics
+
+
+def apply_stat_changes(user_id, changes):
+    """
+    Apply the counter deltas of task writes for a user
+    
+    Args:
+        user_id: Owner of the changed tasks
+        changes: (before, after) snapshot pairs; before is None for created
+            tasks and after is None for deleted ones
+    """
+    deltas = Counter()
+    for before, after in changes:
+        if before is not None:
+            deltas.subtract(stat_metrics(before))
+        if after is not None:
+            deltas.update(stat_metrics(after))
+    
+    increment_counters(UserTaskStat.__table__, ('user_id', 'metric'), 'value', [
+        {'user_id': user_id, 'metric': metric, 'value': delta}
+        for metric, delta in sorted(deltas.items()) if delta
+    ])
+
+
+def get_task_stats(user_id):
+    """Current counters of a user as a metric -> value dict"""
+    return dict(
+        db.session.query(UserTaskStat.metric, UserTaskStat.value).filter(
+            UserTaskStat.user_id == user_id
+        )
+    )
+
+
+def compute_task_stats(user_ids=None):
+    """Recount every metric from the tasks table, as {user_id: {metric: value}}"""
+    query = db.session.query(
+        Task.user_id,
+        Task.status,
+        Task.priority,
+        func.count(Task.id),
+        func.sum(case((and_(Task.status != 'completed', Task.due_date.isnot(None)), 1), else_=0)),
+    ).group_by(Task.user_id, Task.status, Task.priority)
+    if user_ids is not None:
+        query = query.filter(Task.user_id.in_(user_ids))
+    
+    stats = {}
+    for user_id, status, priority, count, open_with_due_date in query:
+        counters = stats.setdefault(user_id, Counter())
+        counters['total'] += count
+        if status is not None:
+            counters[f'status:{status}'] += count
+        if priority is not None:
+            counters[f'priority:{priority}'] += count
+        counters['open_with_due_date'] += open_with_due_date or 0
+    
+    return {user_id: +counters for user_id, counters in stats.items()}
+
+
+def reconcile_task_stats(user_ids=None, fix=True):
+    """
+    Compare stored counters with a recount from tasks
+    
+    Returns a list of (user_id, metric, stored, actual) tuples for every
+    counter that drifted. With fix=True the stored counters of the affected
+    users are rewritten (the caller commits).
+    """
+    actual = compute_task_stats(user_ids)
+    
+    stored_query = db.session.query(UserTaskStat.user_id, UserTaskStat.metric, UserTaskStat.value)
+    if user_ids is not None:
+        stored_query = stored_query.filter(UserTaskStat.user_id.in_(user_ids))
+    stored = {}
+    for user_id, metric, value in stored_query:
+        stored.setdefault(user_id, {})[metric] = value
+    
+    drift = []
+    for user_id in sorted(actual.keys() | stored.keys()):
+        expected = actual.get(user_id, {})
+        current = stored.get(user_id, {})
+        for metric in sorted(expected.keys() | current.keys()):
+            if expected.get(metric, 0) != current.get(metric, 0):
+                drift.append((user_id, metric, current.get(metric, 0), expected.get(metric, 0)))
+    
+    if fix and drift:
+        drifted_users = sorted({user_id for user_id, _, _, _ in drift})
+        db.session.execute(delete(UserTaskStat).where(UserTaskStat.user_id.in_(drifted_users)))
+        rows = [
+            {'user_id': user_id, 'metric': metric, 'value': value}
+            for user_id in drifted_users for metric, value in actual.get(user_id, {}).items()
+        ]
+        if rows:
+            db.session.execute(insert(UserTaskStat), rows)
+    
+    return drift
@@ -0,0 +1,52 @@
+"""
+Task write bookkeeping
+
+Every code path that writes tasks reports its changes here as (before,
+after) snapshot pairs, with None standing for a task that did not exist
+before or no longer exists after. record_task_changes() runs inside the
+write transaction so derived data commits or rolls back together with the
+tasks; tasks_committed() runs once the transaction has committed and
+publishes the WebSocket events. The ids of written tasks go to
+record_task_ids(), also inside the transaction, for the change feed.
+"""
+from app.services.analytics import invalidate_dashboard
+from app.services.changes import append_changes
+from app.services.events import get_task_events
+from app.services.productivity import apply_completion_changes
+from app.services.task_stats import apply_stat_changes
+
+SNAPSHOT_FIELDS = ('status', 'priority', 'due_date', 'completed_at')
+
+
+def snapshot(task):
+    """Capture the fields derived data depends on from a Task or row dict"""
+    if isinstance(task, dict):
+        return {field: task.get(field) for field in SNAPSHOT_FIELDS}
+    return {field: getattr(task, field) for field in SNAPSHOT_FIELDS}
+
+
+def record_task_changes(user_id, changes):
+    """Update derived data for task writes that are about to be committed"""
+    apply_stat_changes(user_id, changes)
+    apply_completion_changes(user_id, changes)
+
+
+def record_task_ids(user_id, changed_ids=(), deleted_ids=()):
+    """Add written tasks to the user's change feed"""
+    append_changes(user_id, changed_ids, deleted_ids)
+
+
+def tasks_committed(user_id, created=(), updated=(), deleted=(), resync=False):
+    """
+    Run follow-up work once a user's task writes are committed
+    
+    Args:
+        user_id: Owner of the written tasks
+        created: Serialized new tasks
+        updated: Deltas of updated tasks (see app.services.events.task_delta)
+        deleted: Ids of deleted tasks
+        resync: Whether clients should fetch further changes from the
+            change feed, for writes too large to send task by task
+    """
+    invalidate_dashboard(user_id)
+    get_task_events().publish(user_id, created=created, updated=updated, deleted=deleted, resync=resync)
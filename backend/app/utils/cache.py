@@ -0,0 +1,42 @@
+"""
+Redis cache helpers
+
+Redis only holds derived data here, so cache operations are best effort: a
+Redis outage is logged and treated as a cache miss instead of failing the
+request.
+"""
+import json
+from flask import current_app
+from redis.exceptions import RedisError
+
+
+def get_redis():
+    """Redis client of the running application (set up by create_app)"""
+    from app import redis_client
+    return redis_client
+
+
+def cache_get_json(key):
+    """Return the decoded JSON value cached under key, or None"""
+    try:
+        cached = get_redis().get(key)
+    except RedisError as e:
+        current_app.logger.warning(f'Cache read failed for {key}: {e}')
+        return None
+    return json.loads(cached) if cached else None
+
+
+def cache_set_json(key, value, ttl):
+    """Cache value as JSON under key for ttl seconds"""
+    try:
+        get_redis().setex(key, ttl, json.dumps(value))
+    except RedisError as e:
+        current_app.logger.warning(f'Cache write failed for {key}: {e}')
+
+
+def cache_delete(*keys):
+    """Drop cached keys"""
+    try:
+        get_redis().delete(*keys)
+    except RedisError as e:
+        current_app.logger.warning(f'Cache delete failed for {keys}: {e}')
@@ -0,0 +1,57 @@
+"""
+Response compression
+
+Compresses responses above COMPRESS_MIN_SIZE bytes with the best encoding
+the client accepts: brotli when the Brotli package is installed, else
+gzip. Small bodies are sent as they are, since compressing them costs more
+than it saves.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain',
+))
+
+
+def _encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def init_compression(app):
+    """Compress the responses of app when the client and payload allow it"""
+    
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        
+        encoding = request.accept_encodings.best_match(_encodings())
+        if not encoding or response.content_length < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        
+        response.set_data(_compress(response.get_data(), encoding, app.config))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The bytes differ from the uncompressed representation's
+            response.set_etag(etag, weak=True)
+        return response
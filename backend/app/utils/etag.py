@@ -0,0 +1,35 @@
+"""
+Conditional GET helpers
+
+ETags are built from version numbers that are cheap to read (see
+app.services.changes), so a matching If-None-Match is answered with 304
+before the data itself is queried or serialized. They are weak: the same
+version may be sent with different encodings.
+"""
+import hashlib
+from flask import current_app, make_response, request
+
+
+def make_etag(*parts):
+    """Opaque ETag value for the given version parts"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def not_modified(etag):
+    """A 304 response if the client already has this version, else None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _with_validator(current_app.response_class(status=304), etag)
+
+
+def with_etag(result, etag):
+    """Attach an ETag to a view result such as ``(jsonify(...), 200)``"""
+    return _with_validator(make_response(result), etag)
+
+
+def _with_validator(response, etag):
+    response.set_etag(etag, weak=True)
+    # Private data: browsers may keep it but must revalidate every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
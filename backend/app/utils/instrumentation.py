@@ -0,0 +1,410 @@
+"""
+Per-request performance instrumentation
+
+Every request collects the number and total time of its SQL statements
+(SQLAlchemy engine events), Redis commands (InstrumentedRedis), JSON
+encoding and the time spent in the application. The totals are sent back
+in a Server-Timing header and recorded in Prometheus histograms, labelled
+by endpoint. Statements slower than SLOW_QUERY_MS are logged.
+
+Each worker process observes into its own histograms and adds what it
+collected to totals in Redis every METRICS_FLUSH_INTERVAL seconds, on a
+scrape and when gunicorn retires it, in one MULTI/EXEC. /metrics serves the
+totals of all workers in the text exposition format, so whichever worker
+answers a scrape the counters only grow, and workers recycled after
+max_requests keep their counts. The endpoint exists only when
+METRICS_TOKEN is set and requires it as a bearer token.
+
+The bookkeeping is a few perf_counter() calls and one short lock per
+histogram, plus one Redis round trip per worker and flush interval.
+"""
+import bisect
+import hmac
+import threading
+import time
+from collections import Counter
+from flask import abort, current_app, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from redis import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from app.utils.cache import get_redis
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SLOW_QUERY_TEXT_LIMIT = 1000
+
+# Redis hash of a metric's totals: {label value}:{bucket index or "sum"}
+METRICS_KEY_PREFIX = 'metrics:'
+
+
+class RequestStats:
+    """Counters of one request"""
+    __slots__ = (
+        'started', 'db_count', 'db_time', 'statements', 'last_batch',
+        'redis_count', 'redis_time', 'serialize_time',
+    )
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        # execute() calls per statement text, for app.utils.query_budget
+        self.statements = {}
+        self.last_batch = None
+        self.redis_count = 0
+        self.redis_time = 0.0
+        self.serialize_time = 0.0
+
+
+def current_stats():
+    """Stats of the request being handled, or None outside a request"""
+    return g.get('request_stats') if has_app_context() else None
+
+
+class Histogram:
+    """Prometheus histogram with one label"""
+    
+    def __init__(self, name, help_text, label, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def key(self):
+        return f'{METRICS_KEY_PREFIX}{self.name}'
+    
+    def _empty(self):
+        return [[0] * (len(self.buckets) + 1), 0.0]
+    
+    def observe(self, label_value, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = self._empty()
+            series[0][index] += 1
+            series[1] += value
+    
+    def take(self):
+        """Observations since the last take(), which starts over"""
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+    
+    def restore(self, series):
+        """Put back observations taken for a push that failed"""
+        with self._lock:
+            for label_value, (counts, total) in series.items():
+                current = self._series.setdefault(label_value, self._empty())
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+    
+    def push(self, pipeline, series):
+        """Queue adding taken observations to the Redis totals"""
+        for label_value, (counts, total) in series.items():
+            for index, count in enumerate(counts):
+                if count:
+                    pipeline.hincrby(self.key, f'{label_value}:{index}', count)
+            pipeline.hincrbyfloat(self.key, f'{label_value}:sum', total)
+    
+    def load(self, fields):
+        """Series from the fields of the Redis totals"""
+        series = {}
+        for field, value in fields.items():
+            label_value, _, slot = field.rpartition(':')
+            current = series.setdefault(label_value, self._empty())
+            if slot == 'sum':
+                current[1] = float(value)
+            elif slot.isdigit() and int(slot) < len(current[0]):
+                current[0][int(slot)] = int(value)
+        return series
+    
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return '\n'.join(lines)
+
+
+class MetricCounter:
+    """Prometheus counter with one label"""
+    
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._totals = Counter()     # since the process started
+        self._unpushed = Counter()   # since the last push
+        self._lock = threading.Lock()
+    
+    @property
+    def key(self):
+        return f'{METRICS_KEY_PREFIX}{self.name}'
+    
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._totals[label_value] += amount
+            self._unpushed[label_value] += amount
+    
+    def values(self):
+        """Counts of this process as a label value -> count dict"""
+        with self._lock:
+            return dict(self._totals)
+    
+    def take(self):
+        with self._lock:
+            series, self._unpushed = self._unpushed, Counter()
+        return series
+    
+    def restore(self, series):
+        with self._lock:
+            self._unpushed.update(series)
+    
+    def push(self, pipeline, series):
+        for label_value, count in series.items():
+            if count:
+                pipeline.hincrby(self.key, label_value, count)
+    
+    def load(self, fields):
+        return {label_value: int(value) for label_value, value in fields.items()}
+    
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_value, count in sorted(series.items()):
+            lines.append(f'{self.name}{{{self.label}="{_escape(label_value)}"}} {count}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Metrics of one application, summed across worker processes in Redis"""
+    
+    def __init__(self):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Time spent handling requests', 'endpoint', DURATION_BUCKETS
+        )
+        self.db_duration = Histogram(
+            'http_request_db_duration_seconds', 'SQL time per request', 'endpoint', DURATION_BUCKETS
+        )
+        self.db_queries = Histogram(
+            'http_request_db_queries', 'SQL statements per request', 'endpoint', COUNT_BUCKETS
+        )
+        self.redis_duration = Histogram(
+            'http_request_redis_duration_seconds', 'Redis time per request', 'endpoint', DURATION_BUCKETS
+        )
+        self.serialize_duration = Histogram(
+            'http_request_serialize_duration_seconds', 'JSON encoding time per request', 'endpoint',
+            DURATION_BUCKETS
+        )
+        self.task_events = MetricCounter(
+            'task_events_total', 'Task WebSocket changes enqueued, coalesced and events sent', 'stage'
+        )
+        self.metrics = [
+            self.request_duration, self.db_duration, self.db_queries,
+            self.redis_duration, self.serialize_duration, self.task_events,
+        ]
+        self._next_push = 0
+    
+    def observe(self, endpoint, stats, duration):
+        self.request_duration.observe(endpoint, duration)
+        self.db_duration.observe(endpoint, stats.db_time)
+        self.db_queries.observe(endpoint, stats.db_count)
+        self.redis_duration.observe(endpoint, stats.redis_time)
+        self.serialize_duration.observe(endpoint, stats.serialize_time)
+    
+    def push(self):
+        """Add everything observed since the last push to the Redis totals"""
+        taken = [(metric, metric.take()) for metric in self.metrics]
+        try:
+            pipeline = get_redis().pipeline()
+            for metric, series in taken:
+                metric.push(pipeline, series)
+            pipeline.execute()
+        except RedisError:
+            for metric, series in taken:
+                metric.restore(series)
+            raise
+        self._next_push = time.monotonic() + current_app.config['METRICS_FLUSH_INTERVAL']
+    
+    def push_if_due(self):
+        if time.monotonic() < self._next_push:
+            return
+        try:
+            self.push()
+        except RedisError as e:
+            self._next_push = time.monotonic() + current_app.config['METRICS_FLUSH_INTERVAL']
+            current_app.logger.warning(f'Could not push metrics: {e}')
+    
+    def render(self):
+        """Totals of all workers in the Prometheus text format"""
+        self.push()
+        redis = get_redis()
+        return '\n'.join(metric.render(metric.load(redis.hgetall(metric.key))) for metric in self.metrics) + '\n'
+
+
+class InstrumentedRedis(Redis):
+    """Redis client that adds its command time to the current request"""
+    
+    def execute_command(self, *args, **options):
+        stats = current_stats()
+        if stats is None:
+            return super().execute_command(*args, **options)
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            stats.redis_count += 1
+            stats.redis_time += time.perf_counter() - started
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing the encoding done by jsonify()"""
+    
+    def dumps(self, obj, **kwargs):
+        stats = current_stats()
+        if stats is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats.serialize_time += time.perf_counter() - started
+
+
+def record_serialization(seconds):
+    """Add JSON encoding done outside jsonify() to the current request"""
+    stats = current_stats()
+    if stats is not None:
+        stats.serialize_time += seconds
+
+
+def instrument_engine(engine, app):
+    """Count and time the statements of engine, logging slow ones"""
+    config = app.config
+    logger = app.logger
+    
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        stats = current_stats()
+        if stats is not None:
+            stats.db_count += 1
+            stats.db_time += elapsed
+            # An executemany() the dialect sends row by row is one call
+            if not executemany or context is not stats.last_batch:
+                stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats.last_batch = context if executemany else None
+        slow_query_ms = config['SLOW_QUERY_MS']
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            endpoint = request.endpoint if stats is not None else None
+            logger.warning(
+                f'Slow query ({elapsed * 1000:.1f} ms) in {endpoint or "background"}: '
+                f'{" ".join(statement.split())[:SLOW_QUERY_TEXT_LIMIT]}'
+            )
+    
+    @event.listens_for(engine, 'handle_error')
+    def drop_timer(context):
+        # after_cursor_execute does not run for failed statements
+        started = context.connection.info.get('query_started') if context.connection else None
+        if started:
+            started.pop()
+
+
+def server_timing(stats, total):
+    """Server-Timing header value for a request's stats"""
+    return ', '.join((
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.db_count} queries"',
+        f'redis;dur={stats.redis_time * 1000:.2f};desc="{stats.redis_count} calls"',
+        f'serialize;dur={stats.serialize_time * 1000:.2f}',
+        f'app;dur={total * 1000:.2f}',
+    ))
+
+
+def get_request_metrics():
+    """Request histograms of the current application"""
+    return current_app.extensions['request_metrics']
+
+
+def init_instrumentation(app, db):
+    """
+    Instrument the requests of app
+    
+    Call before other after_request hooks are registered: hooks run in
+    reverse order, so the measured time then includes them.
+    """
+    app.extensions['request_metrics'] = metrics = RequestMetrics()
+    app.json = TimedJSONProvider(app)
+    
+    with app.app_context():
+        instrument_engine(db.engine, app)
+    router = app.extensions.get('replica_router')
+    if router is not None:
+        instrument_engine(router.engine, app)
+    
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+    
+    @app.after_request
+    def finish_request_stats(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        if app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = server_timing(stats, total)
+        if request.endpoint != 'metrics':
+            metrics.observe(request.endpoint or 'unmatched', stats, total)
+            if app.config['METRICS_TOKEN']:
+                metrics.push_if_due()
+        return response
+    
+    @app.teardown_request
+    def drop_request_stats(exc):
+        g.pop('request_stats', None)
+    
+    @app.route('/metrics', endpoint='metrics')
+    def metrics_view():
+        token = app.config['METRICS_TOKEN']
+        if not token:
+            abort(404)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+        try:
+            body = metrics.render()
+        except RedisError as e:
+            # Per-worker numbers would look like counter resets; fail the scrape
+            app.logger.warning(f'Could not read metrics: {e}')
+            abort(503)
+        return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+
+def push_metrics(app):
+    """Push a worker's last metrics before it exits (gunicorn worker_exit)"""
+    if not app.config['METRICS_TOKEN']:
+        return
+    with app.app_context():
+        try:
+            get_request_metrics().push()
+        except RedisError as e:
+            app.logger.warning(f'Could not push metrics: {e}')
@@ -0,0 +1,26 @@
+"""
+Keyset pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at, row_id):
+    """Build an opaque cursor from the sort key of the last row on a page"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Returns a (created_at, id) tuple; raises ValueError for malformed input.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
@@ -0,0 +1,59 @@
+"""
+Password hashing
+
+Hashing is deliberately slow CPU work. Under eventlet it would stall every
+other greenlet (HTTP requests and WebSocket traffic alike) for the whole
+hash, so it is handed to eventlet's pool of real OS threads, which the
+green loop keeps running alongside. At most PASSWORD_HASH_CONCURRENCY
+hashes run at once (one per CPU by default) so a login storm queues up
+instead of starving the loop of CPU time. The algorithm and cost come from
+PASSWORD_HASH_METHOD; hashes made with other parameters are upgraded on the
+next successful login.
+"""
+import threading
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+def hash_password(password):
+    """Hash a password with the configured method"""
+    return _run_off_loop(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _run_off_loop(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with other than the configured parameters"""
+    return password_hash.split('$', 1)[0] != _effective_method(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+@lru_cache(maxsize=8)
+def _effective_method(method):
+    # Stored hashes spell out every parameter ('scrypt' is saved as
+    # 'scrypt:32768:8:1'); let werkzeug fill in its defaults once. That
+    # takes a full hash, so it goes off the loop as well.
+    return _run_off_loop(generate_password_hash, '', method).split('$', 1)[0]
+
+
+def _run_off_loop(func, *args):
+    # Under eventlet's monkey patching this semaphore is green, so waiting
+    # for a slot yields to other requests
+    with _hash_slots():
+        if current_app.config['PASSWORD_HASH_OFFLOAD']:
+            from app import socketio
+            if socketio.async_mode == 'eventlet':
+                from eventlet import tpool
+                return tpool.execute(func, *args)
+        return func(*args)
+
+
+def _hash_slots():
+    if 'password_hash_slots' not in current_app.extensions:
+        current_app.extensions['password_hash_slots'] = threading.BoundedSemaphore(
+            current_app.config['PASSWORD_HASH_CONCURRENCY']
+        )
+    return current_app.extensions['password_hash_slots']
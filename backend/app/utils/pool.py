@@ -0,0 +1,44 @@
+"""
+Database connection pool sizing
+
+Every worker process has its own SQLAlchemy pool, so the pools of all
+workers together must fit in the database's connection limit. Greenlets
+only hold a connection while they talk to the database, so a worker needs
+far fewer connections than it has concurrent greenlets; the persistent
+pool gets half of the worker's share and overflow connections absorb
+bursts.
+"""
+from sqlalchemy.engine import make_url
+
+# Connections left for migrations, psql sessions and monitoring
+RESERVED_CONNECTIONS = 10
+
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the application config
+    
+    Uses DB_MAX_CONNECTIONS, WEB_CONCURRENCY (worker processes) and
+    WORKER_CONNECTIONS (greenlets per worker) to size the pool; DB_POOL_SIZE
+    and DB_MAX_OVERFLOW, when set, override the computed values.
+    """
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        # SQLite uses a single-connection or per-thread pool without sizing
+        return {}
+    
+    workers = max(1, config['WEB_CONCURRENCY'])
+    per_worker = max(2, (config['DB_MAX_CONNECTIONS'] - RESERVED_CONNECTIONS) // workers)
+    pool_size = max(1, min(config['WORKER_CONNECTIONS'], per_worker // 2))
+    
+    if config['DB_POOL_SIZE'] is not None:
+        pool_size = config['DB_POOL_SIZE']
+    max_overflow = per_worker - pool_size if config['DB_MAX_OVERFLOW'] is None else config['DB_MAX_OVERFLOW']
+    
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max(0, max_overflow),
+        # Connections dropped by the server or a proxy are replaced transparently
+        'pool_pre_ping': True,
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+    }
@@ -0,0 +1,88 @@
+"""
+Per-endpoint SQL query budgets
+
+Views declare the most statements a request may run with @query_budget.
+After each request the statements counted by app.utils.instrumentation
+are checked against it. An executemany() counts once, however many round
+trips the dialect needs for it (SQLite sends a multi-row INSERT .. RETURNING
+row by row), so budgets hold on every database. Statements executed more than
+QUERY_REPEAT_LIMIT times with the same text (SQLAlchemy binds parameters,
+so a loop of lazy loads repeats one statement) are flagged as a probable
+N+1. QUERY_BUDGET_MODE decides what happens: 'log' writes a warning,
+'raise' raises QueryBudgetExceeded (the test suite runs in this mode) and
+'off' skips the check.
+"""
+import re
+from flask import request
+from app.utils.instrumentation import current_stats
+
+EXPANDED_IN = re.compile(r'\bIN \((?:[^()]*?, )+[^()]*?\)', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its endpoint allows"""
+
+
+def query_budget(max_queries, max_repeats=None):
+    """
+    Declare the SQL statement budget of a view
+    
+    max_repeats overrides QUERY_REPEAT_LIMIT for views that legitimately
+    run one statement several times. A budget of None declares a view whose
+    statements grow with its input by design, such as a bulk import; it is
+    exempt from both checks.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.query_repeat_limit = max_repeats
+        return view
+    return decorator
+
+
+def statement_shape(statement):
+    """Statement text with whitespace and expanded IN lists collapsed"""
+    return EXPANDED_IN.sub('IN (...)', ' '.join(statement.split()))
+
+
+def budget_violations(view, stats, repeat_limit):
+    """Problems of one request's statements, as messages"""
+    problems = []
+    if hasattr(view, 'query_budget') and view.query_budget is None:
+        return problems
+    budget = getattr(view, 'query_budget', None)
+    executed = sum(stats.statements.values())
+    if budget is not None and executed > budget:
+        problems.append(f'{executed} statements, budget {budget}')
+    limit = getattr(view, 'query_repeat_limit', None) or repeat_limit
+    if limit:
+        shapes = {}
+        for statement, count in stats.statements.items():
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + count
+        for shape, count in shapes.items():
+            if count > limit:
+                problems.append(f'probable N+1, {count}x: {shape[:200]}')
+    return problems
+
+
+def init_query_budget(app):
+    """
+    Check every request against its endpoint's budget
+    
+    Call after init_instrumentation: after_request hooks run in reverse
+    order, so this one sees the request's stats before they are dropped.
+    """
+    @app.after_request
+    def check_query_budget(response):
+        mode = app.config['QUERY_BUDGET_MODE']
+        stats = current_stats()
+        view = app.view_functions.get(request.endpoint)
+        if mode == 'off' or stats is None or view is None:
+            return response
+        problems = budget_violations(view, stats, app.config['QUERY_REPEAT_LIMIT'])
+        if problems:
+            message = f'Query budget exceeded in {request.endpoint}: ' + '; '.join(problems)
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+        return response
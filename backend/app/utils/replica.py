@@ -0,0 +1,175 @@
+"""
+Read-replica routing
+
+When DATABASE_REPLICA_URL is set, views decorated with @replica_reads
+send their queries to a replica engine while everything else, and every
+flush or DML statement, keeps using the primary. A user who wrote within
+the last REPLICA_STICKY_SECONDS reads from the primary as well, so their
+own changes are never missing from a lagging replica. Writes are recorded
+per process and in Redis, so other workers see them too.
+
+The replica is health-checked at most every REPLICA_HEALTH_INTERVAL
+seconds (on PostgreSQL this includes replication lag). While it is
+unhealthy, or when it fails in the middle of a request, reads fall back to
+the primary.
+"""
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from redis.exceptions import RedisError
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from app.utils.cache import get_redis
+
+RECENT_WRITE_PREFIX = 'replica:recent_write:'
+
+_LAG_QUERY = text("""
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+""")
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica inside @replica_reads views"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('db_replica'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # Writes always go to the primary, and so do later reads
+                g.db_replica = False
+            else:
+                router = get_replica_router()
+                if router is not None:
+                    return router.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Health and read-your-writes state of one application's replica"""
+    
+    def __init__(self, engine, sticky_seconds, health_interval, max_lag):
+        self.engine = engine
+        self.sticky_seconds = sticky_seconds
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self.healthy = False
+        self._next_check = 0
+        self._recent_writers = {}
+    
+    def available(self):
+        """Whether reads may go to the replica, re-checking it when due"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.health_interval
+            self.healthy = self._check()
+        return self.healthy
+    
+    def mark_failed(self):
+        """Stop using the replica until the next health check"""
+        self.healthy = False
+        self._next_check = time.monotonic() + self.health_interval
+    
+    def _check(self):
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name == 'postgresql':
+                    lag = conn.scalar(_LAG_QUERY)
+                    if lag is not None and lag > self.max_lag:
+                        current_app.logger.warning(f'Read replica is {lag:.1f}s behind, using primary')
+                        return False
+                else:
+                    conn.execute(text('SELECT 1'))
+            return True
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f'Read replica unavailable, using primary: {e}')
+            return False
+    
+    def note_write(self, user_id):
+        """Pin a user's reads to the primary for the sticky window"""
+        if self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        if len(self._recent_writers) > 10000:
+            self._recent_writers = {
+                uid: until for uid, until in self._recent_writers.items() if until > now
+            }
+        self._recent_writers[user_id] = now + self.sticky_seconds
+        try:
+            get_redis().setex(f'{RECENT_WRITE_PREFIX}{user_id}', self.sticky_seconds, '1')
+        except RedisError as e:
+            current_app.logger.warning(f'Could not record write of user {user_id}: {e}')
+    
+    def recently_wrote(self, user_id):
+        """Whether a user wrote within the sticky window, in any process"""
+        if user_id is None or self.sticky_seconds <= 0:
+            return False
+        if self._recent_writers.get(user_id, 0) > time.monotonic():
+            return True
+        try:
+            return bool(get_redis().exists(f'{RECENT_WRITE_PREFIX}{user_id}'))
+        except RedisError:
+            # Can't tell: the primary is always consistent
+            return True
+
+
+def get_replica_router():
+    """Replica router of the current application, or None without a replica"""
+    return current_app.extensions.get('replica_router')
+
+
+def init_replica(app):
+    """Set up replica routing for app if a replica is configured"""
+    url = app.config['SQLALCHEMY_REPLICA_URI']
+    if not url:
+        return
+    
+    app.extensions['replica_router'] = router = ReplicaRouter(
+        create_engine(url, **app.config['SQLALCHEMY_ENGINE_OPTIONS']),
+        sticky_seconds=app.config['REPLICA_STICKY_SECONDS'],
+        health_interval=app.config['REPLICA_HEALTH_INTERVAL'],
+        max_lag=app.config['REPLICA_MAX_LAG'],
+    )
+    
+    @app.after_request
+    def remember_writes(response):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+            return response
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:
+            # Not an authenticated request
+            return response
+        if user_id is not None:
+            router.note_write(user_id)
+        return response
+
+
+def replica_reads(view):
+    """
+    Let a read-only view query the replica
+    
+    Apply below @jwt_required() so the user is known. Falls back to the
+    primary when the user wrote recently or the replica is unhealthy, and
+    re-runs the view on the primary if the replica fails mid-request.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = get_replica_router()
+        if router is None or router.recently_wrote(get_jwt_identity()) or not router.available():
+            return view(*args, **kwargs)
+        
+        from app import db
+        g.db_replica = True
+        try:
+            return view(*args, **kwargs)
+        except OperationalError as e:
+            current_app.logger.warning(f'Read replica failed, retrying on primary: {e}')
+            router.mark_failed()
+            db.session.rollback()
+            g.db_replica = False
+            return view(*args, **kwargs)
+        finally:
+            g.db_replica = False
+    return wrapper
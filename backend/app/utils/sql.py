@@ -0,0 +1,54 @@
+"""
+SQL helpers shared across dialects
+"""
+from sqlalchemy import and_, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert_insert(table):
+    """
+    Build an INSERT for table that supports ON CONFLICT clauses
+    
+    Returns None when the current database has no ON CONFLICT support, so
+    callers can fall back to a plain insert.
+    """
+    insert = _UPSERT_INSERTS.get(db.engine.dialect.name)
+    return insert(table) if insert else None
+
+
+def increment_counters(table, key_columns, value_column, rows):
+    """
+    Add each row's delta to a counter table, creating missing rows
+    
+    Args:
+        table: Counter table
+        key_columns: Names of the columns identifying a counter (its
+            primary key)
+        value_column: Name of the counter column; each row holds the delta
+        rows: List of dicts with the key columns and the delta
+    """
+    if not rows:
+        return
+    
+    value = table.c[value_column]
+    statement = upsert_insert(table)
+    if statement is not None:
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={value_column: value + statement.excluded[value_column]}
+        ), rows)
+        return
+    
+    for row in rows:
+        key = and_(*(table.c[column] == row[column] for column in key_columns))
+        updated = db.session.execute(
+            update(table).where(key).values({value_column: value + row[value_column]})
+        )
+        if not updated.rowcount:
+            db.session.execute(insert(table), row)
@@ -2,6 +2,7 @@
 Validation utilities
 """
 import re
+from datetime import datetime
 
 
 def validate_email(email):
@@ -27,3 +28,15 @@ def validate_password(password):
     if not re.search(r'\d', password):
         return False
     return True
+
+
+def parse_iso_datetime(value):
+    """
+    Parse an ISO 8601 timestamp as sent by the frontend
+    
+    Accepts a trailing 'Z' for UTC. Raises ValueError for anything else
+    that datetime.fromisoformat rejects.
+    """
+    if not isinstance(value, str):
+        raise ValueError('Expected an ISO 8601 string')
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
@@ -0,0 +1,357 @@
+"""
+Endpoint benchmark suite
+
+Seeds a reproducible dataset with a realistic skew (task counts per user
+and tag popularity follow Zipf distributions), drives the auth, users,
+tasks and analytics blueprints through the Flask test client, and prints
+per-endpoint latency percentiles, throughput and SQL query counts as JSON.
+The same --seed always produces the same data, so results of two commits
+can be compared with --compare.
+
+Requests run as the user with the most tasks (--profile heavy) or a
+typical one (--profile median). Redis is used when REDIS_URL points at a
+running server; without it every cache lookup is a (fast failing) miss.
+
+Usage:
+    python benchmarks/endpoints.py [--users 1000] [--tasks 100000] [--tags 5000]
+        [--requests 100] [--output results.json] [--compare baseline.json]
+    python benchmarks/endpoints.py --database-url postgresql://... --tasks 1000000
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'Bench1234'
+CHUNK_SIZE = 10000
+
+STATUSES = (('completed', 40), ('pending', 30), ('in_progress', 20), ('cancelled', 10))
+PRIORITIES = (('medium', 50), ('high', 25), ('low', 15), ('urgent', 10))
+WORDS = (
+    'report', 'review', 'deploy', 'meeting', 'invoice', 'design', 'bug', 'release',
+    'customer', 'budget', 'draft', 'migrate', 'interview', 'roadmap', 'backup', 'audit',
+)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def zipf_weights(count, exponent):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def split_by_weight(total, weights, minimum=1):
+    """Split total into integer shares proportional to weights, each at least minimum"""
+    scale = (total - minimum * len(weights)) / sum(weights)
+    shares = [minimum + int(weight * scale) for weight in weights]
+    shares[0] += total - sum(shares)
+    return shares
+
+
+def weighted_picker(rng, items, weights):
+    cumulative = list(itertools.accumulate(weights))
+    
+    def pick():
+        return items[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+    return pick
+
+
+def insert_chunks(db, table, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.session.execute(db.insert(table), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(db.insert(table), chunk)
+
+
+def seed(db, args):
+    """Insert the dataset; returns {'users': [(id, username, task_count)], ...}"""
+    from app.models import Tag, Task, TaskChange, TaskChangeSequence, User
+    from app.models.task import task_tags
+    from app.services.productivity import reconcile_daily_completions
+    from app.services.task_stats import reconcile_task_stats
+    from app.utils.passwords import hash_password
+    
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = hash_password(PASSWORD)
+    
+    users = [
+        {'id': i, 'email': f'user{i}@example.com', 'username': f'user{i}', 'password_hash': password_hash,
+         'first_name': f'First{i}', 'last_name': f'Last{i}', 'is_active': True, 'is_admin': False,
+         'created_at': now - timedelta(minutes=i)}
+        for i in range(1, args.users + 1)
+    ]
+    insert_chunks(db, User, users)
+    
+    tag_names = [f'{rng.choice(WORDS)}-{i}' for i in range(1, args.tags + 1)]
+    insert_chunks(db, Tag, ({'id': i, 'name': name} for i, name in enumerate(tag_names, 1)))
+    
+    task_counts = split_by_weight(args.tasks, zipf_weights(args.users, args.skew))
+    pick_status = weighted_picker(rng, *zip(*STATUSES))
+    pick_priority = weighted_picker(rng, *zip(*PRIORITIES))
+    pick_tag = weighted_picker(rng, list(range(1, args.tags + 1)), zipf_weights(args.tags, 1.0))
+    
+    def tasks():
+        task_id = 0
+        for user_id, count in enumerate(task_counts, 1):
+            for _ in range(count):
+                task_id += 1
+                created_at = now - timedelta(seconds=rng.randrange(2 * 365 * 86400))
+                status = pick_status()
+                yield {
+                    'id': task_id, 'user_id': user_id,
+                    'title': ' '.join(rng.choices(WORDS, k=3)).capitalize(),
+                    'description': ' '.join(rng.choices(WORDS, k=rng.randrange(0, 40))),
+                    'status': status, 'priority': pick_priority(),
+                    'due_date': created_at + timedelta(days=rng.randrange(60)) if rng.random() < 0.5 else None,
+                    'completed_at': (
+                        min(now, created_at + timedelta(hours=rng.randrange(1, 24 * 30)))
+                        if status == 'completed' else None
+                    ),
+                    'created_at': created_at, 'updated_at': created_at,
+                }
+    insert_chunks(db, Task, tasks())
+    
+    def tagging():
+        for task_id in range(1, args.tasks + 1):
+            for tag_id in {pick_tag() for _ in range(rng.randrange(4))}:
+                yield {'task_id': task_id, 'tag_id': tag_id}
+    insert_chunks(db, task_tags, tagging())
+    
+    # Change feed as if every task had been written once through the API
+    def changes():
+        task_id = 0
+        for user_id, count in enumerate(task_counts, 1):
+            for seq in range(1, count + 1):
+                task_id += 1
+                yield {'user_id': user_id, 'task_id': task_id, 'seq': seq, 'deleted': False}
+    insert_chunks(db, TaskChange, changes())
+    insert_chunks(db, TaskChangeSequence, (
+        {'user_id': user_id, 'last_seq': count} for user_id, count in enumerate(task_counts, 1)
+    ))
+    
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('users', 'tags', 'tasks'):
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+    
+    reconcile_task_stats(fix=True)
+    reconcile_daily_completions(fix=True)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    
+    return {
+        'users': [(i, f'user{i}', count) for i, count in enumerate(task_counts, 1)],
+        'tag_names': tag_names,
+    }
+
+
+def scenarios(data, user_id, username, task_ids):
+    """(name, method, path factory, request kwargs factory, requests multiplier)"""
+    other_ids = [uid for uid, _, _ in data['users'][:50] if uid != user_id]
+    popular_tags = data['tag_names'][:20]
+    
+    def login(i):
+        return {'json': {'username': username, 'password': PASSWORD}}
+    
+    return [
+        ('auth.login', 'POST', lambda i: '/api/auth/login', login, 0.2),
+        ('auth.me', 'GET', lambda i: '/api/auth/me', None, 1),
+        ('users.list', 'GET', lambda i: f'/api/users/?page={i % 20 + 1}', None, 1),
+        ('users.search', 'GET', lambda i: f'/api/users/?search=user{i % 100}', None, 1),
+        ('users.detail', 'GET', lambda i: f'/api/users/{other_ids[i % len(other_ids)]}', None, 1),
+        ('tasks.list', 'GET', lambda i: f'/api/tasks/?page={i % 5 + 1}', None, 1),
+        ('tasks.list_fields', 'GET', lambda i: f'/api/tasks/?page={i % 5 + 1}&fields=title,status', None, 1),
+        ('tasks.list_status', 'GET', lambda i: '/api/tasks/?status=' + ('completed', 'pending')[i % 2], None, 1),
+        ('tasks.list_cursor', 'GET', lambda i: '/api/tasks/?limit=50', None, 1),
+        ('tasks.search', 'GET', lambda i: f'/api/tasks/?search={WORDS[i % len(WORDS)]}', None, 1),
+        ('tasks.detail', 'GET', lambda i: f'/api/tasks/{task_ids[i % len(task_ids)]}', None, 1),
+        ('tasks.changes', 'GET', lambda i: f'/api/tasks/changes?since={max(0, len(task_ids) - 100)}', None, 1),
+        ('tasks.export', 'GET', lambda i: '/api/tasks/export?format=' + ('ndjson', 'csv')[i % 2], None, 0.1),
+        ('tasks.tags', 'GET', lambda i: '/api/tasks/tags', None, 0.2),
+        ('analytics.dashboard', 'GET', lambda i: '/api/analytics/dashboard', None, 1),
+        ('analytics.productivity', 'GET', lambda i: '/api/analytics/productivity?granularity=week', None, 1),
+        ('tasks.create', 'POST', lambda i: '/api/tasks/',
+         lambda i: {'json': {'title': f'Bench {i}', 'tags': popular_tags[i % 3:i % 3 + 2]}}, 1),
+        ('tasks.update', 'PUT', lambda i: f'/api/tasks/{task_ids[i % len(task_ids)]}',
+         lambda i: {'json': {'status': ('in_progress', 'completed')[i % 2]}}, 1),
+    ]
+
+
+def run_scenario(client, headers, method, path, kwargs, requests, statements):
+    latencies = []
+    query_counts = []
+    started = time.perf_counter()
+    for i in range(requests):
+        before = statements[0]
+        request_started = time.perf_counter()
+        response = client.open(path(i), method=method, headers=headers, **(kwargs(i) if kwargs else {}))
+        # Streamed bodies are produced while they are read
+        response.get_data()
+        latencies.append(time.perf_counter() - request_started)
+        query_counts.append(statements[0] - before)
+        assert response.status_code < 400, f'{method} {path(i)}: {response.status_code} {response.get_data(as_text=True)}'
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'queries_mean': round(statistics.mean(query_counts), 2),
+        'queries_max': max(query_counts),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def redis_available():
+    from redis.exceptions import RedisError
+    from app.utils.cache import get_redis
+    try:
+        return bool(get_redis().ping())
+    except RedisError:
+        return False
+
+
+def compare(baseline, results):
+    """Per-endpoint ratios of results to baseline (above 1 means slower)"""
+    report = {}
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if not previous:
+            continue
+        report[name] = {
+            metric: round(current[metric] / previous[metric], 2) if previous[metric] else None
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+        }
+        report[name]['throughput_rps'] = round(previous['throughput_rps'] / current['throughput_rps'], 2)
+    return {'baseline_commit': baseline['meta'].get('commit'), 'ratios': report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--tags', type=int, default=5000)
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of tasks per user')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per endpoint')
+    parser.add_argument('--profile', choices=('heavy', 'median'), default='heavy')
+    parser.add_argument('--database-url', help='Benchmark database (its tables are dropped); default: temporary SQLite file')
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    parser.add_argument('--compare', help='Results of an earlier run to compare against')
+    args = parser.parse_args()
+    
+    db_file = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_file.close()
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+    os.environ.setdefault('SOCKETIO_MESSAGE_QUEUE', '')
+    
+    from sqlalchemy import event
+    from app import create_app, db
+    from app.models import Task
+    
+    app = create_app()
+    app.config['JWT_BLOCKLIST_SUBSCRIBE'] = False
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            started = time.perf_counter()
+            data = seed(db, args)
+            seed_seconds = time.perf_counter() - started
+            
+            ranked = sorted(data['users'], key=lambda user: -user[2])
+            user_id, username, task_count = ranked[0] if args.profile == 'heavy' else ranked[len(ranked) // 2]
+            task_ids = db.session.scalars(
+                db.select(Task.id).where(Task.user_id == user_id).order_by(Task.id)
+            ).all()
+            db.session.remove()
+            
+            client = app.test_client()
+            token = client.post('/api/auth/login', json={
+                'username': username, 'password': PASSWORD
+            }).get_json()['access_token']
+            headers = {'Authorization': f'Bearer {token}'}
+            
+            statements = [0]
+            
+            def count(*_):
+                statements[0] += 1
+            event.listen(db.engine, 'before_cursor_execute', count)
+            
+            endpoints = {}
+            for name, method, path, kwargs, multiplier in scenarios(data, user_id, username, task_ids):
+                requests = max(5, int(args.requests * multiplier))
+                endpoints[name] = run_scenario(client, headers, method, path, kwargs, requests, statements)
+            event.remove(db.engine, 'before_cursor_execute', count)
+            
+            results = {
+                'meta': {
+                    'commit': git_commit(),
+                    'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'database': db.engine.dialect.name,
+                    'cpus': os.cpu_count(),
+                    'redis': redis_available(),
+                },
+                'dataset': {
+                    'users': args.users, 'tasks': args.tasks, 'tags': args.tags,
+                    'skew': args.skew, 'seed': args.seed, 'seed_seconds': round(seed_seconds, 1),
+                    'profile': args.profile, 'profile_tasks': task_count,
+                },
+                'endpoints': endpoints,
+            }
+            db.session.remove()
+            db.drop_all()
+    finally:
+        if db_file:
+            os.unlink(db_file.name)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = compare(json.load(f), results)
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Login storm benchmark
+
+Runs a burst of concurrent logins in green threads next to a stream of
+cheap authenticated requests, once with password hashing on the event loop
+and once offloaded to OS threads, and prints probe latency percentiles as
+JSON. With offloading the probe latency should stay flat during the storm.
+
+Usage:
+    python benchmarks/login_storm.py [--logins 40] [--method scrypt:32768:8:1]
+"""
+import eventlet
+import eventlet.event
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+        'mean_ms': round(statistics.mean(samples) * 1000, 2),
+    }
+
+
+def run(app, offload, logins, probe_interval):
+    app.config['PASSWORD_HASH_OFFLOAD'] = offload
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={
+        'username': 'probe', 'password': 'Probe1234'
+    }).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    def login(i):
+        started = time.perf_counter()
+        response = client.post('/api/auth/login', json={
+            'username': f'storm{i}', 'password': 'Storm1234'
+        })
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return time.perf_counter() - started
+    
+    storm_over = eventlet.event.Event()
+    
+    def probe():
+        latencies = []
+        while not storm_over.ready():
+            started = time.perf_counter()
+            client.get('/api/auth/me', headers=headers)
+            latencies.append(time.perf_counter() - started)
+            eventlet.sleep(probe_interval)
+        return latencies
+    
+    pool = eventlet.GreenPool(logins + 1)
+    prober = pool.spawn(probe)
+    started = time.perf_counter()
+    login_times = list(pool.imap(login, range(logins)))
+    storm_seconds = time.perf_counter() - started
+    storm_over.send()
+    probe_times = prober.wait()
+    
+    return {
+        'offload': offload,
+        'storm_seconds': round(storm_seconds, 3),
+        'logins': summarize(login_times),
+        'probe_requests': summarize(probe_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--probe-interval', type=float, default=0.005)
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD to benchmark')
+    args = parser.parse_args()
+    
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+    if args.method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.method
+    
+    from app import create_app, db
+    from app.models import User
+    
+    app = create_app()
+    app.config['JWT_BLOCKLIST_SUBSCRIBE'] = False
+    try:
+        with app.app_context():
+            db.create_all()
+            users = [User(email='probe@example.com', username='probe')]
+            users[0].set_password('Probe1234')
+            for i in range(args.logins):
+                user = User(email=f'storm{i}@example.com', username=f'storm{i}')
+                user.set_password('Storm1234')
+                users.append(user)
+            db.session.add_all(users)
+            db.session.commit()
+            
+            results = {
+                'method': app.config['PASSWORD_HASH_METHOD'],
+                'runs': [
+                    run(app, offload, args.logins, args.probe_interval)
+                    for offload in (False, True)
+                ],
+            }
+            db.session.remove()
+            db.drop_all()
+    finally:
+        os.unlink(db_file.name)
+    
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Read path benchmark
+
+Serves pages of the task list the way the ORM path did (Task objects,
+to_dict(), jsonify) and through the Core projection path (column rows,
+plain dicts, app.utils.serialization), and prints the throughput of both
+as JSON. Only the query and serialization are timed, not HTTP or auth.
+
+Usage:
+    python benchmarks/read_path.py [--tasks 5000] [--per-page 100] [--iterations 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, user_id, count, tags_per_task):
+    from app.models import Tag, Task
+    from app.models.task import task_tags
+    
+    tags = [Tag(name=f'tag-{i}') for i in range(tags_per_task * 4)]
+    db.session.add_all(tags)
+    db.session.flush()
+    db.session.execute(db.insert(Task), [
+        {'title': f'Task {i}', 'description': 'Lorem ipsum dolor sit amet. ' * 8,
+         'status': 'pending', 'priority': 'medium', 'user_id': user_id}
+        for i in range(count)
+    ])
+    task_ids = db.session.scalars(db.select(Task.id)).all()
+    db.session.execute(db.insert(task_tags), [
+        {'task_id': task_id, 'tag_id': tags[(task_id + j) % len(tags)].id}
+        for task_id in task_ids for j in range(tags_per_task)
+    ])
+    db.session.commit()
+
+
+def orm_page(db, user_id, page, per_page):
+    from flask import jsonify
+    from app.models import Task
+    
+    pagination = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    response = jsonify({'tasks': Task.serialize_many(pagination.items), 'total': pagination.total})
+    db.session.remove()
+    return len(response.get_data())
+
+
+def projection_page(db, user_id, page, per_page):
+    from app.models import Task
+    from app.services.projections import select_tasks, attach_tags, paginate
+    from app.utils.serialization import json_response
+    
+    tasks, total, _ = paginate(select_tasks(user_id).order_by(Task.created_at.desc()), page, per_page)
+    response, _ = json_response({'tasks': attach_tags(tasks), 'total': total})
+    db.session.remove()
+    return len(response.get_data())
+
+
+def measure(serve, db, user_id, pages, per_page, iterations):
+    serve(db, user_id, 1, per_page)  # warm up
+    started = time.perf_counter()
+    size = 0
+    for i in range(iterations):
+        size = serve(db, user_id, i % pages + 1, per_page)
+    elapsed = time.perf_counter() - started
+    return {
+        'pages_per_second': round(iterations / elapsed, 1),
+        'tasks_per_second': round(iterations * per_page / elapsed),
+        'mean_ms': round(elapsed / iterations * 1000, 3),
+        'response_bytes': size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--tags-per-task', type=int, default=3)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+    
+    from app import create_app, db
+    from app.models import User
+    from app.utils import serialization
+    
+    app = create_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@example.com', username='bench', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            seed(db, user_id, args.tasks, args.tags_per_task)
+            
+            pages = max(1, args.tasks // args.per_page)
+            with app.test_request_context():
+                orm = measure(orm_page, db, user_id, pages, args.per_page, args.iterations)
+                projection = measure(projection_page, db, user_id, pages, args.per_page, args.iterations)
+            
+            results = {
+                'tasks': args.tasks,
+                'per_page': args.per_page,
+                'encoder': 'orjson' if serialization.orjson is not None else 'json',
+                'orm': orm,
+                'projection': projection,
+                'speedup': round(projection['pages_per_second'] / orm['pages_per_second'], 2),
+            }
+            db.session.remove()
+            db.drop_all()
+    finally:
+        os.unlink(db_file.name)
+    
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Socket.IO load test
+
+Starts several eventlet worker processes sharing a Redis message queue,
+spreads many idle authenticated connections over them, then publishes
+task events through the queue (as any worker's emit would) and measures
+how long they take to reach the connected clients. Prints JSON with the
+connect time, per-worker connection counts and delivery latency
+percentiles.
+
+Needs a Redis server (REDIS_URL, default redis://localhost:6379/0) and a
+file descriptor limit above the connection count. Each worker accepts up
+to --worker-connections concurrent connections (by default enough for its
+share), like gunicorn's worker_connections; eventlet's own default of 1024
+would leave the rest of the connections hanging.
+
+Usage:
+    python benchmarks/socket_load.py [--connections 10000] [--workers 4] [--users 2000] [--events 500]
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+EVENT = 'tasks_changed'
+
+CONNECT_TIMEOUT = 30
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def serve(port, max_connections):
+    """Worker process: run the application on a port"""
+    raise_fd_limit()
+    from app import create_app, socketio
+    app = create_app()
+    socketio.run(app, host='127.0.0.1', port=port, log_output=False, max_size=max_connections)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+        'mean_ms': round(statistics.mean(samples) * 1000, 2),
+    }
+
+
+class IdleClient:
+    """Minimal Socket.IO client speaking Engine.IO v4 over a WebSocket"""
+    
+    def __init__(self, port, token, latencies):
+        import simple_websocket
+        self.ws = simple_websocket.Client.connect(
+            f'ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket'
+        )
+        self.latencies = latencies
+        # Send the namespace connect right away: simple_websocket does not
+        # hand out the Engine.IO handshake until more data arrives
+        self.ws.send('40' + json.dumps({'token': token}))
+        handshake = self.ws.receive(timeout=CONNECT_TIMEOUT)
+        if not handshake or not handshake.startswith('0'):
+            raise ConnectionError(f'No Engine.IO handshake: {handshake!r}')
+        reply = self.ws.receive(timeout=CONNECT_TIMEOUT)
+        if not reply or not reply.startswith('40'):
+            raise ConnectionError(f'Connection refused: {reply!r}')
+    
+    def run(self):
+        while True:
+            message = self.ws.receive()
+            if message is None:
+                return
+            if message == '2':
+                self.ws.send('3')
+            elif message.startswith('42'):
+                name, data = json.loads(message[2:])
+                if name == EVENT and 'sent_at' in data:
+                    self.latencies.append(time.time() - data['sent_at'])
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            eventlet.connect(('127.0.0.1', port)).close()
+            return
+        except OSError:
+            eventlet.sleep(0.2)
+    raise RuntimeError(f'Worker on port {port} did not start')
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--worker-connections', type=int,
+                        help='Concurrent connections per worker (default: its share plus 10%%)')
+    parser.add_argument('--base-port', type=int, default=5100)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.serve, args.worker_connections or 1024)
+        return
+    worker_connections = args.worker_connections or -(-args.connections * 11 // (10 * args.workers))
+    
+    limit = raise_fd_limit()
+    if limit < args.connections + 100:
+        sys.exit(f'File descriptor limit {limit} is too low for {args.connections} connections')
+    
+    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{db_file.name}',
+        REDIS_URL=redis_url,
+        SOCKETIO_MESSAGE_QUEUE=redis_url,
+    )
+    os.environ.update(env)
+    
+    ports = [args.base_port + i for i in range(args.workers)]
+    workers = [
+        subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), '--serve', str(port),
+            '--worker-connections', str(worker_connections),
+        ], env=env, cwd=BACKEND)
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            wait_for_port(port)
+        
+        from flask_jwt_extended import create_access_token
+        from socketio import RedisManager
+        from app import create_app
+        
+        app = create_app()
+        with app.app_context():
+            tokens = [create_access_token(identity=user_id) for user_id in range(1, args.users + 1)]
+        
+        latencies = []
+        clients = []
+        pool = eventlet.GreenPool(args.connections + 1)
+        
+        def open_connection(i):
+            client = IdleClient(ports[i % len(ports)], tokens[i % args.users], latencies)
+            clients.append(client)
+            pool.spawn_n(client.run)
+        
+        started = time.perf_counter()
+        connect_pool = eventlet.GreenPool(500)
+        failures = sum(1 for error in connect_pool.imap(_attempt(open_connection), range(args.connections)) if error)
+        connect_seconds = time.perf_counter() - started
+        eventlet.sleep(1)
+        
+        # Publish through the message queue, as a worker's emit would
+        queue = RedisManager(redis_url, channel='flask-socketio', write_only=True)
+        expected = 0
+        for _ in range(args.events):
+            user_id = random.randint(1, args.users)
+            expected += len(range(user_id - 1, args.connections, args.users))
+            queue.emit(EVENT, {'sent_at': time.time(), 'created': [], 'updated': [], 'deleted': []},
+                       room=f'user_{user_id}', namespace='/')
+            eventlet.sleep(0.01)
+        
+        deadline = time.monotonic() + 10
+        while len(latencies) < expected and time.monotonic() < deadline:
+            eventlet.sleep(0.1)
+        
+        from redis import Redis
+        redis = Redis.from_url(redis_url, decode_responses=True)
+        per_worker = {}
+        for key in redis.scan_iter('presence:[0-9]*'):
+            for worker, count in redis.hgetall(key).items():
+                per_worker[worker] = per_worker.get(worker, 0) + int(count)
+        # Counts left by the workers of earlier runs have no heartbeat
+        per_worker = {
+            worker: count for worker, count in per_worker.items() if redis.exists(f'presence:worker:{worker}')
+        }
+        
+        print(json.dumps({
+            'workers': args.workers,
+            'worker_connections': worker_connections,
+            'connections': len(clients),
+            'failed_connections': failures,
+            'connect_seconds': round(connect_seconds, 2),
+            'connections_per_worker': per_worker,
+            'worker_rss_kb': [rss_kb(worker.pid) for worker in workers],
+            'events_published': args.events,
+            'deliveries_expected': expected,
+            'delivery_latency': summarize(latencies),
+        }, indent=2))
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        os.unlink(db_file.name)
+
+
+def _attempt(func):
+    def attempt(*args):
+        try:
+            func(*args)
+        except Exception as e:  # report, don't abort the whole run
+            return e
+        return None
+    return attempt
+
+
+if __name__ == '__main__':
+    main()
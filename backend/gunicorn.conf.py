@@ -0,0 +1,84 @@
+"""
+Gunicorn configuration for production
+    
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers use eventlet so each process serves many HTTP requests and
+Socket.IO connections concurrently; the Redis message queue connects the
+Socket.IO servers of all workers. Gunicorn hands each connection to any
+worker, so Socket.IO only offers the WebSocket transport by default
+(SOCKETIO_TRANSPORTS): a WebSocket stays on the worker that accepted it,
+while a long-polling session would be spread over several. Every setting can be overridden through
+the environment variable named next to it.
+
+Graceful restarts: ``kill -HUP <master pid>`` reloads this file and
+replaces the workers one generation at a time, letting in-flight requests
+finish within graceful_timeout. Workers are also recycled after
+max_requests (+ jitter) requests so slow leaks cannot accumulate.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# One eventlet worker per core: a worker already multiplexes thousands of
+# greenlets, so more processes would only add memory and DB connections.
+# CPU-heavy password hashing runs in each worker's OS thread pool.
+worker_class = 'eventlet'
+workers = int(os.getenv('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count())))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# eventlet must monkey patch each worker before the app is imported
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # The app sizes its database pool from the effective values, including
+    # command line overrides (app.utils.pool)
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+    os.environ['WORKER_CONNECTIONS'] = str(server.cfg.worker_connections)
+
+
+def when_ready(server):
+    cfg = server.cfg
+    if cfg.workers > 1 and 'polling' in os.getenv('SOCKETIO_TRANSPORTS', 'websocket'):
+        # Workers share the port with no affinity, so polling requests of one
+        # session land on different processes ("Invalid session")
+        server.log.warning(
+            'SOCKETIO_TRANSPORTS includes polling with %d workers; '
+            'long-polling clients will fail, use websocket or WEB_CONCURRENCY=1', cfg.workers
+        )
+    server.log.info(
+        'Serving on %s: %d %s workers x %d connections, timeout %ss, '
+        'graceful timeout %ss, recycling after %d+-%d requests',
+        ', '.join(cfg.bind), cfg.workers, cfg.worker_class_str, cfg.worker_connections,
+        cfg.timeout, cfg.graceful_timeout, cfg.max_requests, cfg.max_requests_jitter
+    )
+
+
+def post_worker_init(worker):
+    app = worker.wsgi
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    worker.log.info(
+        'Worker %s: database pool %s, Socket.IO message queue %s',
+        worker.pid,
+        ', '.join(f'{key}={value}' for key, value in sorted(options.items())) or 'default',
+        'enabled' if app.config['SOCKETIO_MESSAGE_QUEUE'] else 'disabled'
+    )
+
+
+def worker_exit(server, worker):
+    # Recycled workers hand their last metrics to the Redis totals
+    from app.utils.instrumentation import push_metrics
+    push_metrics(worker.wsgi)
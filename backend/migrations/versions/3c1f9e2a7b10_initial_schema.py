@@ -0,0 +1,86 @@
+"""Initial schema
+
+The tables as the application created them before migrations were added.
+Databases created that way are adopted with ``flask db stamp 3c1f9e2a7b10``
+followed by ``flask db upgrade``; see migrations/README.
+
+Revision ID: 3c1f9e2a7b10
+Revises:
+Create Date: 2026-10-17 09:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f9e2a7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('first_name', sa.String(length=80), nullable=True),
+        sa.Column('last_name', sa.String(length=80), nullable=True),
+        sa.Column('avatar_url', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('color', sa.String(length=7), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tags_name', 'tags', ['name'], unique=True)
+    
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('priority', sa.String(length=20), nullable=True),
+        sa.Column('due_date', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tasks_status', 'tasks', ['status'])
+    op.create_index('ix_tasks_user_id', 'tasks', ['user_id'])
+    
+    op.create_table(
+        'task_tags',
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tag_id'], ['tags.id']),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id']),
+        sa.PrimaryKeyConstraint('task_id', 'tag_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('task_tags')
+    op.drop_table('tasks')
+    op.drop_table('tags')
+    op.drop_table('users')
@@ -0,0 +1,82 @@
+"""Keyset pagination index and full-text search over tasks
+
+On PostgreSQL adding the generated search column rewrites the tasks table
+under an exclusive lock, so large tables are best upgraded in a quiet hour.
+
+Revision ID: 5b8e1d3f9a62
+Revises: 3c1f9e2a7b10
+Create Date: 2026-10-17 09:20:13.604918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e1d3f9a62'
+down_revision = '3c1f9e2a7b10'
+branch_labels = None
+depends_on = None
+
+
+# As installed by app/models/task.py, plus indexing existing rows
+SEARCH_DDL = {
+    'postgresql': [
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """,
+        'CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)',
+    ],
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        # Index the tasks that already exist
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+    ],
+}
+
+
+def upgrade():
+    op.create_index('ix_tasks_user_id_created_at_id', 'tasks', ['user_id', 'created_at', 'id'])
+    
+    for statement in SEARCH_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS tasks_fts')
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS tasks_fts_{trigger}')
+    elif dialect == 'postgresql':
+        op.drop_index('ix_tasks_search_vector', table_name='tasks')
+        op.drop_column('tasks', 'search_vector')
+    
+    op.drop_index('ix_tasks_user_id_created_at_id', table_name='tasks')
@@ -0,0 +1,62 @@
+"""Composite task indexes matched to the endpoint queries
+
+Every hot query filters tasks by user_id and then orders or ranges on
+another column, so the single-column status and user_id indexes give way
+to composites led by user_id. The completion and due date indexes are
+partial because most tasks have neither timestamp. On PostgreSQL the
+indexes are built CONCURRENTLY so writes continue during the upgrade.
+
+Revision ID: 8d4b6e0c2f57
+Revises: a4c7f2e81d39
+Create Date: 2026-10-17 09:40:05.771932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4b6e0c2f57'
+down_revision = 'a4c7f2e81d39'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_tasks_user_id_status_created_at_id', 'tasks', ['user_id', 'status', 'created_at', 'id'], None),
+    ('ix_tasks_user_id_priority_created_at_id', 'tasks', ['user_id', 'priority', 'created_at', 'id'], None),
+    ('ix_tasks_user_id_completed_at', 'tasks', ['user_id', 'completed_at'], 'completed_at IS NOT NULL'),
+    ('ix_tasks_user_id_due_date', 'tasks', ['user_id', 'due_date'], 'due_date IS NOT NULL'),
+    ('ix_task_tags_tag_id', 'task_tags', ['tag_id'], None),
+]
+
+# Covered by the composites above, which all lead with user_id
+REPLACED = [
+    ('ix_tasks_status', 'tasks', ['status']),
+    ('ix_tasks_user_id', 'tasks', ['user_id']),
+]
+
+
+def _concurrently():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+                postgresql_concurrently=_concurrently(),
+            )
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=_concurrently())
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, postgresql_concurrently=_concurrently())
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=_concurrently())
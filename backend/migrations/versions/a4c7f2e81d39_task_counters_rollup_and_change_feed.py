@@ -0,0 +1,66 @@
+"""Task counters, daily completion rollup and task change feed
+
+The new tables start empty. On a database that already has tasks, fill
+the counters and the rollup with ``flask reconcile-task-stats`` after
+upgrading; the change feed starts at the upgrade.
+
+Revision ID: a4c7f2e81d39
+Revises: 5b8e1d3f9a62
+Create Date: 2026-10-17 09:31:52.117346
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c7f2e81d39'
+down_revision = '5b8e1d3f9a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_task_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=40), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'metric'),
+    )
+    
+    op.create_table(
+        'daily_completions',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'day'),
+    )
+    
+    op.create_table(
+        'task_change_sequences',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('last_seq', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    
+    op.create_table(
+        'task_changes',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'task_id'),
+    )
+    op.create_index('ix_task_changes_user_id_seq', 'task_changes', ['user_id', 'seq'], unique=True)
+
+
+def downgrade():
+    op.drop_table('task_changes')
+    op.drop_table('task_change_sequences')
+    op.drop_table('daily_completions')
+    op.drop_table('user_task_stats')
@@ -0,0 +1,25 @@
+"""Record when an account deletion was requested
+
+Revision ID: e6a2d8f4b915
+Revises: 8d4b6e0c2f57
+Create Date: 2026-10-17 14:05:27.402816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a2d8f4b915'
+down_revision = '8d4b6e0c2f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('deletion_requested_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('deletion_requested_at')
@@ -0,0 +1,168 @@
+"""
+Shared test fixtures
+"""
+import fnmatch
+import os
+
+# Flask-SQLAlchemy creates its engines in init_app, so the database URL has
+# to be in place before create_app() runs.
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# Same for the Socket.IO message queue: tests run a single process
+os.environ.setdefault('SOCKETIO_MESSAGE_QUEUE', '')
+
+import pytest
+from sqlalchemy import event
+import app as app_package
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    """Create application for testing"""
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['JWT_BLOCKLIST_SUBSCRIBE'] = False
+    # Tests flush task events explicitly
+    app.config['TASK_EVENT_WINDOW'] = 60
+    # Every request in the suite has to stay within its endpoint's budget
+    app.config['QUERY_BUDGET_MODE'] = 'raise'
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client"""
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a user and return Authorization headers for it"""
+    response = client.post('/api/auth/register', json={
+        'email': 'owner@example.com',
+        'username': 'owner',
+        'password': 'Test1234'
+    })
+    token = response.get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def user_id(client, auth_headers):
+    """Id of the user behind auth_headers"""
+    return client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+
+
+@pytest.fixture
+def count_queries(app):
+    """Return a context manager that records the SQL statements executed inside it"""
+    class QueryCounter:
+        def __init__(self):
+            self.statements = []
+        
+        def __enter__(self):
+            event.listen(db.engine, 'before_cursor_execute', self._record)
+            return self
+        
+        def __exit__(self, *exc):
+            event.remove(db.engine, 'before_cursor_execute', self._record)
+        
+        def _record(self, conn, cursor, statement, parameters, context, executemany):
+            self.statements.append(statement)
+        
+        @property
+        def count(self):
+            return len(self.statements)
+    
+    return QueryCounter
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the app uses"""
+    
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.calls = []
+        self.published = []
+    
+    def get(self, key):
+        return self.store.get(key)
+    
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+        self.ttls[key] = ttl
+    
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.store.pop(key, None) is not None
+            self.ttls.pop(key, None)
+        return removed
+    
+    def exists(self, *keys):
+        self.calls.append(('exists',) + keys)
+        return sum(key in self.store for key in keys)
+    
+    def scan_iter(self, match='*', count=None):
+        return [key for key in list(self.store) if fnmatch.fnmatchcase(key, match)]
+    
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+    
+    def hincrby(self, key, field, amount=1):
+        fields = self.store.setdefault(key, {})
+        fields[field] = int(fields.get(field, 0)) + amount
+        return fields[field]
+    
+    def hdel(self, key, *fields):
+        removed = sum(self.store.get(key, {}).pop(field, None) is not None for field in fields)
+        if key in self.store and not self.store[key]:
+            del self.store[key]
+        return removed
+    
+    def hincrbyfloat(self, key, field, amount=1.0):
+        fields = self.store.setdefault(key, {})
+        fields[field] = float(fields.get(field, 0)) + amount
+        return fields[field]
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+    
+    def hgetall(self, key):
+        return {field: str(value) for field, value in self.store.get(key, {}).items()}
+    
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+
+class FakePipeline:
+    """Queues FakeRedis commands until execute()"""
+    
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the application at an in-memory Redis"""
+    fake = FakeRedis()
+    monkeypatch.setattr(app_package, 'redis_client', fake)
+    return fake
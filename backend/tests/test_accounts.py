@@ -0,0 +1,175 @@
+"""
+Account deletion tests
+"""
+import pytest
+from sqlalchemy import func, select
+from app import db, socketio
+from app.models import User, Task, UserTaskStat, TaskChange, TaskChangeSequence
+from app.models.task import task_tags
+from app.services import accounts
+
+
+def create_tasks(client, auth_headers, count):
+    operations = [
+        {'op': 'create', 'data': {'title': f'Task {i}', 'status': 'completed', 'tags': ['a', f'b{i}']}}
+        for i in range(count)
+    ]
+    client.post('/api/tasks/batch', headers=auth_headers, json={'operations': operations})
+
+
+def row_count(statement):
+    return db.session.scalar(select(func.count()).select_from(statement.subquery()))
+
+
+@pytest.fixture
+def socket_calls(monkeypatch):
+    """Record the WebSocket events and room closes of account deletion"""
+    calls = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data, room: calls.append((event, data, room)))
+    monkeypatch.setattr(socketio, 'close_room', lambda room: calls.append(('close_room', room)))
+    return calls
+
+
+def test_delete_account_in_chunks(app, client, auth_headers, user_id, count_queries, fake_redis, socket_calls):
+    """Test tasks are deleted with chunked bulk statements, never loaded"""
+    app.config['ACCOUNT_DELETE_CHUNK_SIZE'] = 2
+    app.config['ACCOUNT_DELETE_SYNC_LIMIT'] = 4
+    create_tasks(client, auth_headers, 4)
+    client.get('/api/analytics/dashboard', headers=auth_headers)
+    fake_redis.store[f'presence:{user_id}'] = {'worker': 1}
+    fake_redis.store[f'replica:recent_write:{user_id}'] = '1'
+    assert f'analytics:dashboard:{user_id}' in fake_redis.store
+    
+    with count_queries() as queries:
+        response = client.delete('/api/users/profile', headers=auth_headers)
+    assert response.status_code == 200
+    
+    deletes = [statement for statement in queries.statements if statement.startswith('DELETE FROM tasks ')]
+    assert len(deletes) == 2
+    assert not any(statement.startswith('SELECT tasks.id AS tasks_id') for statement in queries.statements)
+    
+    assert db.session.get(User, user_id) is None
+    assert row_count(select(Task.id)) == 0
+    assert row_count(select(task_tags.c.task_id)) == 0
+    for model in (UserTaskStat, TaskChange, TaskChangeSequence):
+        assert row_count(select(model.user_id)) == 0
+    
+    assert not any(str(user_id) in key for key in fake_redis.store if not key.startswith('blacklist:'))
+    assert socket_calls == [
+        ('account_deleted', {'user_id': user_id}, f'user_{user_id}'),
+        ('close_room', f'user_{user_id}'),
+    ]
+    
+    # The token used for the deletion is revoked
+    assert client.get('/api/auth/me', headers=auth_headers).status_code == 401
+
+
+def test_large_account_is_deleted_in_background(app, client, auth_headers, user_id, fake_redis,
+                                                socket_calls, monkeypatch):
+    """Test accounts over the limit are deactivated first and deleted by a job"""
+    app.config['ACCOUNT_DELETE_SYNC_LIMIT'] = 3
+    create_tasks(client, auth_headers, 4)
+    jobs = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: jobs.append(args))
+    
+    response = client.delete('/api/users/profile', headers=auth_headers)
+    assert response.status_code == 202
+    assert len(jobs) == 1
+    
+    db.session.expire_all()
+    assert db.session.get(User, user_id).is_active is False
+    login = client.post('/api/auth/login', json={'username': 'owner', 'password': 'Test1234'})
+    assert login.status_code == 403
+    
+    function, *args = jobs[0]
+    function(*args)
+    db.session.expire_all()
+    assert db.session.get(User, user_id) is None
+    assert row_count(select(Task.id)) == 0
+
+
+def test_small_account_is_deleted_right_away(app, client, auth_headers, user_id, fake_redis, socket_calls):
+    """Test an account at the limit is still deleted within the request"""
+    app.config['ACCOUNT_DELETE_SYNC_LIMIT'] = 3
+    create_tasks(client, auth_headers, 3)
+    assert accounts.is_large_account(user_id) is False
+    assert client.delete('/api/users/profile', headers=auth_headers).status_code == 200
+    assert db.session.get(User, user_id) is None
+
+
+def test_delete_account_cli(app, client, auth_headers, user_id, fake_redis, socket_calls):
+    """Test the delete-account command removes a user"""
+    create_tasks(client, auth_headers, 2)
+    
+    result = app.test_cli_runner().invoke(args=['delete-account', '--user-id', str(user_id), '--yes'])
+    assert result.exit_code == 0
+    assert f'User {user_id} deleted' in result.output
+    assert db.session.get(User, user_id) is None
+
+
+def login(client):
+    return client.post('/api/auth/login', json={'username': 'owner', 'password': 'Test1234'}).get_json()
+
+
+def test_delete_account_revokes_refresh_token(app, client, auth_headers, user_id, fake_redis, socket_calls):
+    """Test a refresh token sent with the deletion is revoked, a foreign one refused"""
+    tokens = login(client)
+    other = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()
+    
+    response = client.delete('/api/users/profile', headers=auth_headers,
+                             json={'refresh_token': other['refresh_token']})
+    assert response.status_code == 400
+    assert db.session.get(User, user_id) is not None
+    
+    response = client.delete('/api/users/profile', headers=auth_headers,
+                             json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    refresh = client.post('/api/auth/refresh', headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+    assert refresh.status_code == 401
+
+
+def test_deactivated_account_cannot_refresh_or_write(app, client, auth_headers, user_id, fake_redis,
+                                                     socket_calls, monkeypatch):
+    """Test tokens issued before a deletion started cannot refresh or write"""
+    app.config['ACCOUNT_DELETE_SYNC_LIMIT'] = 1
+    create_tasks(client, auth_headers, 2)
+    tokens = login(client)
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: None)
+    assert client.delete('/api/users/profile', headers=auth_headers).status_code == 202
+    
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    refresh = client.post('/api/auth/refresh', headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+    assert refresh.status_code == 403
+    assert client.post('/api/tasks/', headers=headers, json={'title': 'Orphan'}).status_code == 403
+    assert client.put('/api/users/profile', headers=headers, json={'first_name': 'X'}).status_code == 403
+    
+    report = app.test_cli_runner().invoke(args=['import-tasks', '-', '--user-id', str(user_id)],
+                                          input='{"title": "Orphan"}\n')
+    assert 'Account is disabled' in report.output
+    assert row_count(select(Task.id).where(Task.title == 'Orphan')) == 0
+
+
+def test_interrupted_deletion_is_resumed(app, client, auth_headers, user_id, fake_redis, socket_calls, monkeypatch):
+    """Test a deletion whose background task never ran is finished by the CLI"""
+    app.config['ACCOUNT_DELETE_SYNC_LIMIT'] = 1
+    create_tasks(client, auth_headers, 2)
+    # The worker is recycled before the background task runs
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: None)
+    assert client.delete('/api/users/profile', headers=auth_headers).status_code == 202
+    
+    db.session.expire_all()
+    assert db.session.get(User, user_id).deletion_requested_at is not None
+    assert accounts.pending_deletions() == [user_id]
+    
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['resume-account-deletions'])
+    assert result.exit_code == 0
+    assert db.session.get(User, user_id) is not None
+    
+    result = runner.invoke(args=['resume-account-deletions', '--older-than', '0'])
+    assert result.exit_code == 0, result.output
+    assert f'User {user_id} deleted' in result.output
+    assert db.session.get(User, user_id) is None
+    assert row_count(select(Task.id)) == 0
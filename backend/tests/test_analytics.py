@@ -0,0 +1,195 @@
+"""
+Analytics endpoint tests
+"""
+from datetime import datetime, timedelta
+from app import db
+from app.models import Task
+from app.services.task_writes import record_task_changes, snapshot
+
+
+def add_task(user_id, **fields):
+    task = Task(title=fields.pop('title', 'Task'), user_id=user_id, **fields)
+    db.session.add(task)
+    db.session.flush()
+    record_task_changes(user_id, [(None, snapshot(task))])
+    db.session.commit()
+    return task
+
+
+def test_dashboard_stats(client, auth_headers, user_id):
+    """Test every dashboard metric is computed correctly"""
+    now = datetime.utcnow()
+    add_task(user_id, status='completed', priority='high', completed_at=now - timedelta(days=1))
+    add_task(user_id, status='completed', priority='low', completed_at=now - timedelta(days=10))
+    add_task(user_id, status='pending', priority='high', due_date=now - timedelta(days=1))
+    add_task(user_id, status='in_progress', priority='high', due_date=now + timedelta(days=1))
+    add_task(user_id, status='completed', priority='low', due_date=now - timedelta(days=3),
+             completed_at=now - timedelta(days=8))
+    
+    response = client.get('/api/analytics/dashboard', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'total_tasks': 5,
+        'completed_this_week': 1,
+        'overdue_tasks': 1,
+        'status_distribution': {'completed': 3, 'pending': 1, 'in_progress': 1},
+        'priority_distribution': {'high': 3, 'low': 2}
+    }
+
+
+def test_dashboard_reads_counters(client, auth_headers, user_id, count_queries):
+    """Test the dashboard costs a fixed number of statements"""
+    add_task(user_id, status='pending')
+    add_task(user_id, status='completed', completed_at=datetime.utcnow())
+    
+    with count_queries() as queries:
+        client.get('/api/analytics/dashboard', headers=auth_headers)
+    
+    # The change sequence, the counters and the task statement
+    assert queries.count == 3
+
+
+def test_dashboard_cache_is_invalidated_by_writes(client, auth_headers, fake_redis):
+    """Test task writes drop the cached dashboard"""
+    task_id = client.post('/api/tasks/', headers=auth_headers, json={'title': 'x'}).get_json()['task']['id']
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 1
+    assert any(key.startswith('analytics:dashboard:') for key in fake_redis.store)
+    
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'status': 'completed'})
+    stats = client.get('/api/analytics/dashboard', headers=auth_headers).get_json()
+    assert stats['completed_this_week'] == 1
+    
+    client.post('/api/tasks/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'title': 'y'}}
+    ]})
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 2
+    
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 1
+
+
+def test_dashboard_computed_before_a_write_is_not_served_after_it(app, client, auth_headers, user_id,
+                                                                   fake_redis, monkeypatch):
+    """Test statistics stored after a write's invalidation, but computed before it, are ignored"""
+    from app.services import analytics
+    add_task(user_id)
+    compute = analytics.compute_dashboard_stats
+    
+    def compute_then_write(uid):
+        result = compute(uid)
+        # Another request commits a task write before this one stores its result
+        client.post('/api/tasks/', headers=auth_headers, json={'title': 'late'})
+        return result
+    
+    monkeypatch.setattr(analytics, 'compute_dashboard_stats', compute_then_write)
+    with app.test_request_context():
+        assert analytics.get_dashboard_stats(user_id)['total_tasks'] == 1
+    assert any(key.startswith('analytics:dashboard:') for key in fake_redis.store)
+    monkeypatch.setattr(analytics, 'compute_dashboard_stats', compute)
+    
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 2
+
+
+def test_dashboard_cache_expires_when_a_task_becomes_overdue(client, auth_headers, user_id, fake_redis):
+    """Test the cache TTL ends when the next open task passes its due date"""
+    add_task(user_id, due_date=datetime.utcnow() + timedelta(minutes=10))
+    
+    client.get('/api/analytics/dashboard', headers=auth_headers)
+    
+    ttl, = fake_redis.ttls.values()
+    assert 0 < ttl <= 601
+
+
+def test_dashboard_overdue_follows_counter(client, auth_headers, user_id, fake_redis):
+    """Test overdue tasks are derived from the counter as tasks are completed"""
+    now = datetime.utcnow()
+    task = add_task(user_id, due_date=now - timedelta(days=2))
+    add_task(user_id, due_date=now - timedelta(days=1))
+    add_task(user_id, due_date=now + timedelta(days=1))
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['overdue_tasks'] == 2
+    
+    client.put(f'/api/tasks/{task.id}', headers=auth_headers, json={'status': 'completed'})
+    stats = client.get('/api/analytics/dashboard', headers=auth_headers).get_json()
+    assert stats['overdue_tasks'] == 1
+    assert stats['completed_this_week'] == 1
+    
+    # The completion leaves the window at a UTC midnight
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    ttl, = fake_redis.ttls.values()
+    assert 0 < ttl <= (midnight - now).total_seconds() + 1
+
+
+def test_productivity_fills_empty_days(client, auth_headers, user_id):
+    """Test the daily series covers every day of the range"""
+    add_task(user_id, status='completed', completed_at=datetime(2024, 3, 2, 10))
+    add_task(user_id, status='completed', completed_at=datetime(2024, 3, 2, 23))
+    add_task(user_id, status='completed', completed_at=datetime(2024, 3, 4, 1))
+    
+    data = client.get(
+        '/api/analytics/productivity?from=2024-03-01&to=2024-03-05', headers=auth_headers
+    ).get_json()
+    
+    assert data['completed'] == [
+        {'date': '2024-03-01', 'count': 0},
+        {'date': '2024-03-02', 'count': 2},
+        {'date': '2024-03-03', 'count': 0},
+        {'date': '2024-03-04', 'count': 1},
+        {'date': '2024-03-05', 'count': 0},
+    ]
+    assert data['daily_completed'] == data['completed']
+    assert data['total_completed'] == 3
+
+
+def test_productivity_week_and_month_buckets(client, auth_headers, user_id):
+    """Test weekly (Monday-based) and monthly aggregation"""
+    add_task(user_id, status='completed', completed_at=datetime(2024, 1, 31))
+    add_task(user_id, status='completed', completed_at=datetime(2024, 2, 4))
+    add_task(user_id, status='completed', completed_at=datetime(2024, 2, 5))
+    
+    weeks = client.get(
+        '/api/analytics/productivity?from=2024-01-29&to=2024-02-11&granularity=week', headers=auth_headers
+    ).get_json()['completed']
+    assert weeks == [{'date': '2024-01-29', 'count': 2}, {'date': '2024-02-05', 'count': 1}]
+    
+    months = client.get(
+        '/api/analytics/productivity?from=2024-01-01&to=2024-03-31&granularity=month', headers=auth_headers
+    ).get_json()['completed']
+    assert months == [
+        {'date': '2024-01-01', 'count': 1},
+        {'date': '2024-02-01', 'count': 2},
+        {'date': '2024-03-01', 'count': 0},
+    ]
+
+
+def test_productivity_rollup_follows_reopened_and_deleted_tasks(client, auth_headers):
+    """Test un-completing or deleting a task removes it from the rollup"""
+    today = datetime.utcnow().date().isoformat()
+    url = f'/api/analytics/productivity?from={today}&to={today}'
+    first = client.post('/api/tasks/', headers=auth_headers, json={'title': 'a', 'status': 'completed'}).get_json()['task']['id']
+    second = client.post('/api/tasks/', headers=auth_headers, json={'title': 'b'}).get_json()['task']['id']
+    client.put(f'/api/tasks/{second}', headers=auth_headers, json={'status': 'completed'})
+    assert client.get(url, headers=auth_headers).get_json()['total_completed'] == 2
+    
+    client.put(f'/api/tasks/{first}', headers=auth_headers, json={'status': 'pending'})
+    client.delete(f'/api/tasks/{second}', headers=auth_headers)
+    assert client.get(url, headers=auth_headers).get_json()['total_completed'] == 0
+
+
+def test_productivity_one_year_reads_only_the_rollup(client, auth_headers, count_queries):
+    """Test a one-year chart is answered with a single rollup query"""
+    with count_queries() as queries:
+        response = client.get(
+            '/api/analytics/productivity?from=2024-01-01&to=2024-12-31', headers=auth_headers
+        )
+    
+    assert len(response.get_json()['completed']) == 366
+    assert queries.count == 1
+    assert 'daily_completions' in queries.statements[0]
+
+
+def test_productivity_validates_parameters(client, auth_headers):
+    """Test malformed ranges and granularities are rejected"""
+    for query in ('granularity=hour', 'from=yesterday', 'from=2024-02-01&to=2024-01-01',
+                  'from=2000-01-01&to=2024-01-01'):
+        assert client.get(f'/api/analytics/productivity?{query}', headers=auth_headers).status_code == 400
@@ -0,0 +1,160 @@
+"""
+Batch task endpoint tests
+"""
+import pytest
+from app import db, socketio
+from app.models import Task
+from app.services.events import get_task_events
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Record WebSocket events instead of sending them"""
+    events = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data, room=None: events.append((event, data, room)))
+    return events
+
+
+def batch(client, headers, operations):
+    return client.post('/api/tasks/batch', headers=headers, json={'operations': operations})
+
+
+def test_batch_applies_mixed_operations(client, auth_headers, user_id, emitted):
+    """Test creates, updates and deletes are applied and reported per item"""
+    first = client.post('/api/tasks/', headers=auth_headers, json={'title': 'First'}).get_json()['task']
+    second = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Second'}).get_json()['task']
+    get_task_events().flush()
+    emitted.clear()
+    
+    response = batch(client, auth_headers, [
+        {'op': 'create', 'data': {'title': 'New', 'tags': ['work', 'work', 'home']}},
+        {'op': 'update', 'id': first['id'], 'data': {'status': 'completed', 'tags': ['done']}},
+        {'op': 'delete', 'id': second['id']},
+    ])
+    
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [201, 200, 200]
+    assert results[0]['task']['tags'] == ['home', 'work']
+    assert results[1]['task']['status'] == 'completed'
+    assert results[1]['task']['completed_at'] is not None
+    assert results[1]['task']['tags'] == ['done']
+    assert results[2]['task_id'] == second['id']
+    
+    assert Task.query.filter_by(user_id=user_id).count() == 2
+    
+    get_task_events().flush()
+    assert len(emitted) == 1
+    event, data, room = emitted[0]
+    assert event == 'tasks_changed'
+    assert room == f'user_{user_id}'
+    assert [task['title'] for task in data['created']] == ['New']
+    assert [task['id'] for task in data['updated']] == [first['id']]
+    assert set(data['updated'][0]) == {'id', 'status', 'completed_at', 'updated_at', 'tags'}
+    assert data['deleted'] == [second['id']]
+
+
+def test_batch_reports_invalid_operations(client, auth_headers, emitted):
+    """Test invalid operations fail individually without blocking the rest"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Mine'}).get_json()['task']
+    
+    response = batch(client, auth_headers, [
+        {'op': 'create', 'data': {}},
+        {'op': 'update', 'id': 9999, 'data': {'title': 'Ghost'}},
+        {'op': 'rename', 'id': task['id']},
+        {'op': 'update', 'id': task['id'], 'data': {'due_date': 'tomorrow'}},
+        {'op': 'update', 'id': task['id'], 'data': {'title': 'Renamed'}},
+        {'op': 'delete', 'id': task['id']},
+    ])
+    
+    statuses = [result['status'] for result in response.get_json()['results']]
+    assert statuses == [400, 404, 400, 400, 200, 409]
+    assert db.session.get(Task, task['id']).title == 'Renamed'
+
+
+def test_batch_reports_malformed_operations(client, auth_headers, emitted):
+    """Test malformed ids and field values fail per operation, not as a 500"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Mine'}).get_json()['task']
+    
+    response = batch(client, auth_headers, [
+        {'op': 'update', 'id': [task['id']], 'data': {'title': 'List id'}},
+        {'op': 'delete', 'id': True},
+        {'op': 'update', 'id': task['id'], 'data': {'title': None}},
+        {'op': 'update', 'id': task['id'], 'data': {'title': '  '}},
+        {'op': 'update', 'id': task['id'], 'data': {'status': 'blocked'}},
+        {'op': 'create', 'data': {'title': 'Odd', 'priority': 'asap'}},
+        {'op': 'create', 'data': {'title': 7}},
+        {'op': 'update', 'id': task['id'], 'data': {'priority': 'high'}},
+    ])
+    assert response.status_code == 200
+    
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [400] * 7 + [200]
+    assert results[0]['error'] == 'id must be an integer'
+    assert results[2]['error'] == 'Title is required'
+    assert results[4]['error'] == 'status must be one of pending, in_progress, completed, cancelled'
+    assert db.session.get(Task, task['id']).title == 'Mine'
+
+
+def test_batch_rejects_non_string_descriptions(client, auth_headers, emitted):
+    """Test a description that is not a string fails its operation only"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Mine'}).get_json()['task']
+    
+    response = batch(client, auth_headers, [
+        {'op': 'create', 'data': {'title': 'Bad', 'description': {'x': 1}}},
+        {'op': 'update', 'id': task['id'], 'data': {'description': ['x']}},
+        {'op': 'create', 'data': {'title': 'Good', 'description': None}},
+        {'op': 'update', 'id': task['id'], 'data': {'description': 'Updated'}},
+    ])
+    assert response.status_code == 200
+    
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [400, 400, 201, 200]
+    assert results[0]['error'] == results[1]['error'] == 'description must be a string'
+    assert results[2]['task']['description'] == ''
+    assert db.session.get(Task, task['id']).description == 'Updated'
+    assert Task.query.filter_by(title='Bad').count() == 0
+
+
+def test_batch_rejects_other_users_tasks(client, auth_headers):
+    """Test a batch cannot touch tasks owned by someone else"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Mine'}).get_json()['task']
+    token = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()['access_token']
+    
+    response = batch(client, {'Authorization': f'Bearer {token}'}, [{'op': 'delete', 'id': task['id']}])
+    
+    assert response.get_json()['results'][0]['status'] == 404
+    assert db.session.get(Task, task['id']) is not None
+
+
+def test_batch_validates_envelope(client, auth_headers):
+    """Test the request body must hold a bounded list of operations"""
+    assert batch(client, auth_headers, []).status_code == 400
+    assert client.post('/api/tasks/batch', headers=auth_headers, json={}).status_code == 400
+    assert batch(client, auth_headers, [{'op': 'create', 'data': {'title': 'x'}}] * 501).status_code == 400
+
+
+def test_batch_query_count_is_constant(client, auth_headers, user_id, count_queries, emitted):
+    """Test the number of statements does not grow with the batch size"""
+    # Creates are left out: SQLite cannot guarantee RETURNING order, so
+    # SQLAlchemy inserts row by row there (PostgreSQL batches them).
+    def run(count):
+        ids = [
+            result['task']['id'] for result in batch(client, auth_headers, [
+                {'op': 'create', 'data': {'title': f'Task {i}'}} for i in range(2 * count)
+            ]).get_json()['results']
+        ]
+        with count_queries() as queries:
+            batch(client, auth_headers, [
+                {'op': 'update', 'id': task_id, 'data': {'status': 'completed', 'tags': ['a', 'b']}}
+                for task_id in ids[:count]
+            ] + [
+                {'op': 'delete', 'id': task_id} for task_id in ids[count:]
+            ])
+        return queries.count
+    
+    run(1)  # creates the tags
+    run(1)  # caches their ids
+    assert run(5) == run(50)
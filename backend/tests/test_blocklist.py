@@ -0,0 +1,108 @@
+"""
+Token blocklist tests
+"""
+import time
+from flask_jwt_extended import decode_token
+from app.services.blocklist import BloomFilter, get_blocklist
+
+
+def register(client):
+    return client.post('/api/auth/register', json={
+        'email': 'revoked@example.com', 'username': 'revoked', 'password': 'Test1234'
+    }).get_json()
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_logout_revokes_access_token(client):
+    """Test an access token stops working after logout"""
+    tokens = register(client)
+    headers = bearer(tokens['access_token'])
+    
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+
+
+def test_logout_revokes_refresh_token(client):
+    """Test a refresh token sent with logout can no longer be used"""
+    tokens = register(client)
+    
+    response = client.post('/api/auth/logout', headers=bearer(tokens['access_token']),
+                           json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    
+    assert client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token'])).status_code == 401
+
+
+def test_logout_rejects_foreign_refresh_token(client):
+    """Test logout does not accept another user's or an access token as refresh token"""
+    tokens = register(client)
+    other = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()
+    headers = bearer(tokens['access_token'])
+    
+    for refresh_token in (other['refresh_token'], tokens['access_token'], 'garbage'):
+        response = client.post('/api/auth/logout', headers=headers, json={'refresh_token': refresh_token})
+        assert response.status_code == 400
+
+
+def test_revocation_expires_with_token(client, fake_redis):
+    """Test the Redis entry lives exactly as long as the token would"""
+    tokens = register(client)
+    client.post('/api/auth/logout', headers=bearer(tokens['access_token']))
+    
+    jti = decode_token(tokens['access_token'])['jti']
+    remaining = decode_token(tokens['access_token'])['exp'] - time.time()
+    assert abs(fake_redis.ttls[f'blacklist:{jti}'] - remaining) <= 2
+    assert fake_redis.published == [('blacklist', jti)]
+
+
+def test_unrevoked_tokens_skip_redis(client, fake_redis):
+    """Test checking a token that was never revoked needs no Redis lookup"""
+    tokens = register(client)
+    client.get('/api/auth/me', headers=bearer(tokens['access_token']))
+    fake_redis.calls.clear()
+    
+    for _ in range(5):
+        assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 200
+    
+    assert not [call for call in fake_redis.calls if call[0] == 'exists']
+
+
+def test_revocations_from_other_processes_are_picked_up(app, client, fake_redis):
+    """Test a reload brings in tokens revoked elsewhere"""
+    tokens = register(client)
+    jti = decode_token(tokens['access_token'])['jti']
+    client.get('/api/auth/me', headers=bearer(tokens['access_token']))
+    
+    fake_redis.setex(f'blacklist:{jti}', 60, '1')
+    get_blocklist().reload()
+    
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 401
+
+
+def test_revocations_are_polled_without_subscription(app, client, fake_redis):
+    """Test the filter is reloaded every poll interval when pub/sub is off"""
+    app.config['JWT_BLOCKLIST_POLL_INTERVAL'] = 0
+    tokens = register(client)
+    jti = decode_token(tokens['access_token'])['jti']
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 200
+    
+    fake_redis.setex(f'blacklist:{jti}', 60, '1')
+    
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 401
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added item is reported and the false positive rate is bounded"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'jti-{i}')
+    
+    assert all(f'jti-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
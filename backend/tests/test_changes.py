@@ -0,0 +1,99 @@
+"""
+Task change feed tests
+"""
+
+
+def changes(client, headers, **params):
+    return client.get('/api/tasks/changes', headers=headers, query_string=params)
+
+
+def create(client, headers, title):
+    return client.post('/api/tasks/', headers=headers, json={'title': title}).get_json()['task']
+
+
+def test_changes_since_cursor(client, auth_headers):
+    """Test only tasks written after the cursor are returned, deletes as tombstones"""
+    kept = create(client, auth_headers, 'Kept')
+    edited = create(client, auth_headers, 'Edited')
+    removed = create(client, auth_headers, 'Removed')
+    
+    cursor = changes(client, auth_headers).get_json()['cursor']
+    
+    client.put(f"/api/tasks/{edited['id']}", headers=auth_headers, json={'status': 'completed'})
+    added = create(client, auth_headers, 'Added')
+    client.delete(f"/api/tasks/{removed['id']}", headers=auth_headers)
+    
+    data = changes(client, auth_headers, since=cursor).get_json()
+    assert [task['id'] for task in data['tasks']] == [edited['id'], added['id']]
+    assert data['tasks'][0]['status'] == 'completed'
+    assert data['deleted'] == [removed['id']]
+    assert kept['id'] not in [task['id'] for task in data['tasks']]
+    assert data['has_more'] is False
+    
+    data = changes(client, auth_headers, since=data['cursor']).get_json()
+    assert data['tasks'] == [] and data['deleted'] == []
+
+
+def test_changes_record_batch_writes(client, auth_headers):
+    """Test batch operations land in the feed"""
+    task = create(client, auth_headers, 'Task')
+    cursor = changes(client, auth_headers).get_json()['cursor']
+    
+    client.post('/api/tasks/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'title': 'New'}},
+        {'op': 'delete', 'id': task['id']},
+    ]})
+    
+    data = changes(client, auth_headers, since=cursor).get_json()
+    assert [task['title'] for task in data['tasks']] == ['New']
+    assert data['deleted'] == [task['id']]
+
+
+def test_changes_keep_latest_change_per_task(client, auth_headers):
+    """Test a task changed repeatedly appears once, and paging by limit works"""
+    first = create(client, auth_headers, 'First')
+    second = create(client, auth_headers, 'Second')
+    for title in ('Again', 'And again'):
+        client.put(f"/api/tasks/{first['id']}", headers=auth_headers, json={'title': title})
+    
+    page = changes(client, auth_headers, since=0, limit=1).get_json()
+    assert [task['id'] for task in page['tasks']] == [second['id']]
+    assert page['has_more'] is True
+    
+    page = changes(client, auth_headers, since=page['cursor'], limit=1).get_json()
+    assert [task['title'] for task in page['tasks']] == ['And again']
+    assert page['has_more'] is False
+
+
+def test_changes_are_per_user(client, auth_headers):
+    """Test another user's writes neither show up nor advance the cursor"""
+    cursor = changes(client, auth_headers).get_json()['cursor']
+    token = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()['access_token']
+    create(client, {'Authorization': f'Bearer {token}'}, 'Not yours')
+    
+    data = changes(client, auth_headers, since=cursor).get_json()
+    assert data['tasks'] == [] and data['cursor'] == cursor
+
+
+def test_changes_query_count_independent_of_task_count(client, auth_headers, count_queries):
+    """Test reading the feed costs the same however many tasks the user has"""
+    for i in range(30):
+        create(client, auth_headers, f'Task {i}')
+    cursor = changes(client, auth_headers).get_json()['cursor']
+    task = create(client, auth_headers, 'Fresh')
+    client.put(f"/api/tasks/{task['id']}", headers=auth_headers, json={'tags': ['new']})
+    
+    with count_queries() as counter:
+        data = changes(client, auth_headers, since=cursor).get_json()
+    
+    assert [task['tags'] for task in data['tasks']] == [['new']]
+    # user lookup for the token, feed rows, tasks, tags
+    assert counter.count <= 4
+
+
+def test_changes_rejects_invalid_cursor(client, auth_headers):
+    """Test a malformed cursor is a client error"""
+    assert changes(client, auth_headers, since='abc').status_code == 400
+    assert changes(client, auth_headers, since=-1).status_code == 400
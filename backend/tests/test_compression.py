@@ -0,0 +1,43 @@
+"""
+Response compression tests
+"""
+import gzip
+import pytest
+
+
+def create_tasks(client, headers, count):
+    for i in range(count):
+        client.post('/api/tasks/', headers=headers, json={'title': f'Task {i}', 'description': 'x' * 100})
+
+
+def test_large_responses_are_gzipped(client, auth_headers):
+    """Test a large list is gzipped for clients that accept it"""
+    create_tasks(client, auth_headers, 20)
+    
+    plain = client.get('/api/tasks/', headers=auth_headers)
+    response = client.get('/api/tasks/', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+    
+    assert 'Content-Encoding' not in plain.headers
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_small_responses_are_not_compressed(client, auth_headers, app):
+    """Test bodies under COMPRESS_MIN_SIZE are sent as they are"""
+    response = client.get('/api/tasks/tags', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+    assert len(response.data) < app.config['COMPRESS_MIN_SIZE']
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_brotli_preferred_when_installed(client, auth_headers):
+    """Test brotli is chosen over gzip when available"""
+    brotli = pytest.importorskip('brotli')
+    create_tasks(client, auth_headers, 20)
+    
+    plain = client.get('/api/tasks/', headers=auth_headers)
+    response = client.get('/api/tasks/', headers={**auth_headers, 'Accept-Encoding': 'gzip, br'})
+    
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain.data
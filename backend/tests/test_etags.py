@@ -0,0 +1,73 @@
+"""
+Conditional GET tests
+"""
+
+
+def get(client, headers, url, etag=None, **params):
+    if etag:
+        headers = {**headers, 'If-None-Match': etag}
+    return client.get(url, headers=headers, query_string=params)
+
+
+def test_task_list_not_modified_until_write(client, auth_headers):
+    """Test the list answers 304 for its own ETag and changes after a write"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'})
+    
+    first = get(client, auth_headers, '/api/tasks/')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert etag.startswith('W/')
+    assert 'no-cache' in first.headers['Cache-Control']
+    
+    again = get(client, auth_headers, '/api/tasks/', etag)
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+    
+    # Different query strings are different representations
+    assert get(client, auth_headers, '/api/tasks/', etag, status='todo').status_code == 200
+    assert get(client, auth_headers, '/api/tasks/', etag, limit=5).status_code == 200
+    
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Another'})
+    after = get(client, auth_headers, '/api/tasks/', etag)
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+
+
+def test_task_detail_tracks_its_own_version(client, auth_headers):
+    """Test a task's ETag changes when it is updated but not for other tasks"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'}).get_json()['task']
+    url = f"/api/tasks/{task['id']}"
+    etag = get(client, auth_headers, url).headers['ETag']
+    
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Other'})
+    assert get(client, auth_headers, url, etag).status_code == 304
+    
+    client.put(url, headers=auth_headers, json={'status': 'completed'})
+    response = get(client, auth_headers, url, etag)
+    assert response.status_code == 200
+    assert response.get_json()['task']['status'] == 'completed'
+    
+    client.delete(url, headers=auth_headers)
+    assert get(client, auth_headers, url, response.headers['ETag']).status_code == 404
+
+
+def test_dashboard_etag(client, auth_headers):
+    """Test the dashboard revalidates until its statistics change"""
+    etag = get(client, auth_headers, '/api/analytics/dashboard').headers['ETag']
+    assert get(client, auth_headers, '/api/analytics/dashboard', etag).status_code == 304
+    
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'})
+    response = get(client, auth_headers, '/api/analytics/dashboard', etag)
+    assert response.status_code == 200
+    assert response.get_json()['total_tasks'] == 1
+
+
+def test_etag_is_per_user(client, auth_headers):
+    """Test one user's ETag never validates another user's list"""
+    etag = get(client, auth_headers, '/api/tasks/').headers['ETag']
+    token = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()['access_token']
+    
+    assert get(client, {'Authorization': f'Bearer {token}'}, '/api/tasks/', etag).status_code == 200
@@ -0,0 +1,90 @@
+"""
+Task WebSocket event tests
+"""
+import pytest
+from app import socketio
+from app.services.events import TaskEventDispatcher, get_task_events
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Record WebSocket events instead of sending them"""
+    events = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data, room=None: events.append((event, data, room)))
+    return events
+
+
+def test_update_sends_only_changed_fields(client, auth_headers, user_id, emitted):
+    """Test an update is published as a delta after the request"""
+    task = client.post('/api/tasks/', headers=auth_headers, json={
+        'title': 'Task', 'tags': ['work']
+    }).get_json()['task']
+    get_task_events().flush()
+    emitted.clear()
+    
+    client.put(f"/api/tasks/{task['id']}", headers=auth_headers, json={'status': 'in_progress'})
+    assert emitted == []
+    
+    get_task_events().flush()
+    event, data, room = emitted[0]
+    assert (event, room) == ('tasks_changed', f'user_{user_id}')
+    assert data['updated'] == [{
+        'id': task['id'], 'status': 'in_progress', 'updated_at': data['updated'][0]['updated_at']
+    }]
+
+
+def test_events_coalesce_per_task(client, auth_headers, emitted):
+    """Test repeated writes within the window go out as one merged event"""
+    events = get_task_events()
+    kept = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Kept'}).get_json()['task']
+    gone = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Gone'}).get_json()['task']
+    client.put(f"/api/tasks/{kept['id']}", headers=auth_headers, json={'title': 'Renamed'})
+    client.put(f"/api/tasks/{kept['id']}", headers=auth_headers, json={'priority': 'high'})
+    client.delete(f"/api/tasks/{gone['id']}", headers=auth_headers)
+    
+    events.flush()
+    
+    assert len(emitted) == 1
+    _, data, _ = emitted[0]
+    assert [(task['title'], task['priority']) for task in data['created']] == [('Renamed', 'high')]
+    assert data['updated'] == [] and data['deleted'] == []
+    assert events.counters.values() == {'enqueued': 5, 'coalesced': 3, 'sent': 1}
+
+
+def test_event_counters_are_published(app, client, auth_headers, emitted, fake_redis):
+    """Test the enqueued/coalesced/sent counts show up on /metrics"""
+    app.config['METRICS_TOKEN'] = 'secret'
+    task = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'}).get_json()['task']
+    client.put(f"/api/tasks/{task['id']}", headers=auth_headers, json={'title': 'Renamed'})
+    get_task_events().flush()
+    
+    body = client.get('/metrics', headers={'Authorization': 'Bearer secret'}).get_data(as_text=True)
+    assert '# TYPE task_events_total counter' in body
+    assert 'task_events_total{stage="enqueued"} 2' in body
+    assert 'task_events_total{stage="coalesced"} 1' in body
+    assert 'task_events_total{stage="sent"} 1' in body
+
+
+def test_merge_rules(emitted):
+    """Test updates merge fields and deletes supersede updates"""
+    events = TaskEventDispatcher(window=60)
+    
+    events.publish(1, updated=[{'id': 1, 'title': 'a'}, {'id': 2, 'title': 'b'}])
+    events.publish(1, updated=[{'id': 1, 'status': 'completed'}], deleted=[2])
+    events.publish(2, deleted=[3])
+    events.flush()
+    
+    assert emitted == [
+        ('tasks_changed', {'created': [], 'updated': [{'id': 1, 'title': 'a', 'status': 'completed'}], 'deleted': [2]}, 'user_1'),
+        ('tasks_changed', {'created': [], 'updated': [], 'deleted': [3]}, 'user_2'),
+    ]
+
+
+def test_flushes_in_background_after_window(app, emitted):
+    """Test buffered events are sent by a background task once the window passes"""
+    events = TaskEventDispatcher(window=0.01)
+    events.publish(1, deleted=[1])
+    assert emitted == []
+    
+    socketio.sleep(0.1)
+    assert [room for _, _, room in emitted] == ['user_1']
@@ -0,0 +1,102 @@
+"""
+Task export tests
+"""
+import csv
+import io
+import json
+
+
+def create_tasks(client, auth_headers, count, **extra):
+    for i in range(count):
+        client.post('/api/tasks/', headers=auth_headers, json={'title': f'Task {i}', **extra})
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_ndjson(client, auth_headers):
+    """Test every task is exported as one JSON line with its tags"""
+    create_tasks(client, auth_headers, 3, tags=['work', 'home'])
+    
+    response = client.get('/api/tasks/export', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=tasks.ndjson'
+    
+    tasks = ndjson(response)
+    assert [task['title'] for task in tasks] == ['Task 2', 'Task 1', 'Task 0']
+    assert all(task['tags'] == ['home', 'work'] for task in tasks)
+    
+    listed = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert tasks == listed
+
+
+def test_export_csv(client, auth_headers):
+    """Test the CSV export has a header row and one row per task"""
+    create_tasks(client, auth_headers, 2, tags=['a', 'b'])
+    
+    response = client.get('/api/tasks/export?format=csv&fields=title,due_date,tags', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['id', 'title', 'due_date', 'tags']
+    assert [row[1:] for row in rows[1:]] == [['Task 1', '', 'a,b'], ['Task 0', '', 'a,b']]
+
+
+def test_export_csv_escapes_tags_and_formulas(client, auth_headers):
+    """Test commas in tags and formula-looking text survive an export and import"""
+    client.post('/api/tasks/', headers=auth_headers, json={
+        'title': '=HYPERLINK("http://evil")', 'description': "'-already quoted", 'tags': ['a,b', 'c\\d', '@x']
+    })
+    exported = client.get('/api/tasks/export?format=csv', headers=auth_headers).get_data(as_text=True)
+    
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert rows[0]['title'] == '\'=HYPERLINK("http://evil")'
+    assert rows[0]['description'] == "''-already quoted"
+    # Tags are sorted, so this cell starts with @ as well
+    assert rows[0]['tags'] == "'@x,a\\,b,c\\\\d"
+    
+    client.post('/api/tasks/import', headers=auth_headers, data=exported.encode(), content_type='text/csv')
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert len(tasks) == 2
+    assert all(task['title'] == '=HYPERLINK("http://evil")' for task in tasks)
+    assert all(task['description'] == "'-already quoted" for task in tasks)
+    assert all(sorted(task['tags']) == ['@x', 'a,b', 'c\\d'] for task in tasks)
+
+
+def test_export_applies_list_filters(client, auth_headers):
+    """Test status, priority and search narrow the export like the list"""
+    create_tasks(client, auth_headers, 2, priority='high')
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Quarterly report', 'status': 'completed'})
+    
+    completed = ndjson(client.get('/api/tasks/export?status=completed', headers=auth_headers))
+    assert [task['title'] for task in completed] == ['Quarterly report']
+    high = ndjson(client.get('/api/tasks/export?priority=high&fields=title', headers=auth_headers))
+    assert [set(task) for task in high] == [{'id', 'title'}] * 2
+    found = ndjson(client.get('/api/tasks/export?search=quarter', headers=auth_headers))
+    assert [task['title'] for task in found] == ['Quarterly report']
+
+
+def test_export_reads_in_chunks(app, client, auth_headers, count_queries):
+    """Test rows are streamed in EXPORT_CHUNK_SIZE chunks with one tag query each"""
+    app.config['EXPORT_CHUNK_SIZE'] = 2
+    create_tasks(client, auth_headers, 5, tags=['x'])
+    
+    with count_queries() as queries:
+        response = client.get('/api/tasks/export', headers=auth_headers, buffered=False)
+        chunks = list(response.response)
+    
+    assert len(chunks) == 3
+    assert sum(chunk.count(b'\n') for chunk in chunks) == 5
+    tag_queries = [statement for statement in queries.statements if 'task_tags' in statement]
+    assert len(tag_queries) == 3
+    assert len(queries.statements) == 4
+
+
+def test_export_rejects_bad_arguments(client, auth_headers):
+    """Test unknown formats and fields are refused"""
+    assert client.get('/api/tasks/export?format=xml', headers=auth_headers).status_code == 400
+    assert client.get('/api/tasks/export?fields=secret', headers=auth_headers).status_code == 400
@@ -0,0 +1,131 @@
+"""
+Task import tests
+"""
+import json
+import pytest
+from app import socketio
+from app.services import task_import
+from app.services.events import get_task_events
+from app.services.task_stats import reconcile_task_stats
+
+
+def ndjson_body(*records):
+    return '\n'.join(record if isinstance(record, str) else json.dumps(record) for record in records)
+
+
+def post_import(client, auth_headers, body, content_type='application/x-ndjson', query=''):
+    return client.post(
+        f'/api/tasks/import{query}', headers=auth_headers, data=body.encode(), content_type=content_type
+    )
+
+
+def test_import_ndjson_reports_row_errors(client, auth_headers):
+    """Test valid lines are imported and invalid ones reported by line"""
+    body = ndjson_body(
+        {'title': 'Write report', 'priority': 'high', 'tags': ['work', 'q3']},
+        '{not json',
+        {'description': 'No title'},
+        '',
+        {'title': 'Done already', 'status': 'completed', 'completed_at': '2024-03-01T10:00:00Z'},
+        {'title': 'Odd', 'status': 'blocked'},
+        {'title': 'Tagged', 'tags': 'work'},
+    )
+    response = post_import(client, auth_headers, body)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 2
+    assert report['failed'] == 4
+    assert [error['line'] for error in report['errors']] == [2, 3, 6, 7]
+    assert report['errors'][0]['error'] == 'Invalid JSON'
+    assert report['errors'][1]['error'] == 'Title is required'
+    
+    tasks = {task['title']: task for task in client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']}
+    assert set(tasks) == {'Write report', 'Done already'}
+    assert tasks['Write report']['tags'] == ['q3', 'work']
+    assert tasks['Write report']['priority'] == 'high'
+    assert tasks['Done already']['completed_at'].startswith('2024-03-01T10:00:00')
+
+
+def test_import_csv_round_trips_an_export(client, auth_headers):
+    """Test a CSV export can be imported again, tags included"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Plan, then act', 'tags': ['a', 'b']})
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Second', 'status': 'in_progress'})
+    exported = client.get('/api/tasks/export?format=csv', headers=auth_headers).get_data(as_text=True)
+    
+    response = post_import(client, auth_headers, exported, content_type='text/csv')
+    assert response.get_json() == {'imported': 2, 'failed': 0, 'errors': []}
+    
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert len(tasks) == 4
+    copies = [task for task in tasks if task['title'] == 'Plan, then act']
+    assert len(copies) == 2 and all(task['tags'] == ['a', 'b'] for task in copies)
+    assert len({task['id'] for task in tasks}) == 4
+
+
+def test_import_writes_in_batches(app, client, auth_headers, user_id, count_queries, monkeypatch):
+    """Test rows are written per batch and follow-up work runs once per import"""
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    committed = []
+    monkeypatch.setattr(task_import, 'tasks_committed', lambda *args, **kwargs: committed.append((args, kwargs)))
+    body = ndjson_body(*({'title': f'Task {i}', 'tags': ['bulk', f'tag-{i}']} for i in range(5)))
+    
+    with count_queries() as queries:
+        assert post_import(client, auth_headers, body).get_json()['imported'] == 5
+    
+    tag_lookups = [statement for statement in queries.statements if statement.startswith('SELECT tags.name')]
+    assert len(tag_lookups) == 6   # existing tags, then the created ones, per batch
+    assert committed == [((user_id,), {'resync': True})]
+    
+    # Counters and change feed are kept up to date like for single writes
+    assert reconcile_task_stats([user_id], fix=False) == []
+    changes = client.get('/api/tasks/changes?since=0', headers=auth_headers).get_json()
+    assert len(changes['tasks']) == 5
+    dashboard = client.get('/api/analytics/dashboard', headers=auth_headers).get_json()
+    assert dashboard['total_tasks'] == 5
+
+
+def test_import_tells_clients_to_resync(app, client, auth_headers, user_id, fake_redis, monkeypatch):
+    """Test connected clients get one resync event, even if reading fails part way"""
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    events = []
+    monkeypatch.setattr(socketio, 'emit', lambda event, data, room=None: events.append((event, data, room)))
+    client.get('/api/analytics/dashboard', headers=auth_headers)
+    
+    def records():
+        for i in range(3):
+            yield i + 1, {'title': f'Task {i}'}
+        raise OSError('Client disconnected')
+    
+    with pytest.raises(OSError):
+        task_import.import_records(user_id, records())
+    get_task_events().flush()
+    
+    assert events == [(
+        'tasks_changed', {'created': [], 'updated': [], 'deleted': [], 'resync': True}, f'user_{user_id}'
+    )]
+    # The batch committed before the error is in, and the cached dashboard is gone
+    assert f'analytics:dashboard:{user_id}' not in fake_redis.store
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 2
+
+
+def test_import_rejects_empty_and_unknown_formats(client, auth_headers):
+    """Test requests without rows or with an unknown format are refused"""
+    assert post_import(client, auth_headers, '').status_code == 400
+    assert post_import(client, auth_headers, '{"title": "x"}', query='?format=xml').status_code == 400
+
+
+def test_import_cli(app, client, auth_headers, user_id, tmp_path):
+    """Test the import-tasks command reads a file for a user"""
+    path = tmp_path / 'tasks.csv'
+    path.write_text('title,status,tags\nFrom CLI,completed,"x,y"\n,pending,\n')
+    
+    result = app.test_cli_runner().invoke(args=['import-tasks', str(path), '--user-id', str(user_id)])
+    assert result.exit_code == 0
+    assert '1 task(s) imported, 1 failed' in result.output
+    assert 'line 3: Title is required' in result.output
+    
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert [(task['title'], task['tags']) for task in tasks] == [('From CLI', ['x', 'y'])]
+    
+    result = app.test_cli_runner().invoke(args=['import-tasks', str(path), '--user-id', '999'])
+    assert result.exit_code != 0
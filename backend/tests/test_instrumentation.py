@@ -0,0 +1,138 @@
+"""
+Request instrumentation tests
+"""
+import logging
+import re
+import pytest
+from flask import g
+from redis.exceptions import RedisError
+import app as app_package
+from app.utils.instrumentation import (
+    InstrumentedRedis, RequestMetrics, RequestStats, current_stats, get_request_metrics,
+)
+
+
+def timings(response):
+    """Server-Timing header as {name: (duration, description)}"""
+    entries = {}
+    for entry in response.headers['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        entries[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return entries
+
+
+def test_server_timing_counts_queries(client, auth_headers, count_queries):
+    """Test the header reports the request's SQL statements and phases"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'})
+    
+    with count_queries() as queries:
+        response = client.get('/api/tasks/', headers=auth_headers)
+    
+    entries = timings(response)
+    assert entries['db'][1] == f'{queries.count} queries'
+    assert entries['serialize'][0] > 0
+    assert entries['app'][0] >= entries['db'][0]
+    assert set(entries) == {'db', 'redis', 'serialize', 'app'}
+
+
+def test_server_timing_can_be_disabled(app, client, auth_headers):
+    """Test SERVER_TIMING=false keeps the header off responses"""
+    app.config['SERVER_TIMING'] = False
+    assert 'Server-Timing' not in client.get('/api/tasks/', headers=auth_headers).headers
+
+
+def scrape(client, token='secret'):
+    return client.get('/metrics', headers={'Authorization': f'Bearer {token}'})
+
+
+def test_metrics_histograms_by_endpoint(app, client, auth_headers, fake_redis):
+    """Test /metrics exposes per-endpoint histograms in Prometheus text format"""
+    app.config['METRICS_TOKEN'] = 'secret'
+    for _ in range(3):
+        client.get('/api/tasks/', headers=auth_headers)
+    
+    response = scrape(client)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_count{endpoint="tasks.get_tasks"} 3' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="tasks.get_tasks",le="+Inf"} 3' in body
+    match = re.search(r'http_request_db_queries_sum\{endpoint="tasks.get_tasks"\} (\S+)', body)
+    assert float(match.group(1)) > 0
+    # Scrapes are not measured themselves
+    assert 'endpoint="metrics"' not in body
+
+
+def test_metrics_sum_all_workers(app, client, auth_headers, fake_redis):
+    """Test a scrape reports the totals of every worker, not just its own"""
+    app.config['METRICS_TOKEN'] = 'secret'
+    client.get('/api/tasks/', headers=auth_headers)
+    
+    # Another worker process pushing its own observations
+    other_worker = RequestMetrics()
+    for _ in range(2):
+        other_worker.observe('tasks.get_tasks', RequestStats(), 0.01)
+    other_worker.push()
+    
+    body = scrape(client).get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="tasks.get_tasks"} 3' in body
+    
+    # Counters keep growing from scrape to scrape
+    client.get('/api/tasks/', headers=auth_headers)
+    body = scrape(client).get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="tasks.get_tasks"} 4' in body
+
+
+def test_metrics_require_token(app, client, fake_redis):
+    """Test /metrics is off without METRICS_TOKEN and checks the token otherwise"""
+    app.config['METRICS_TOKEN'] = ''
+    assert scrape(client).status_code == 404
+    
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 401
+    assert scrape(client, token='guess').status_code == 401
+    assert scrape(client).status_code == 200
+
+
+def test_metrics_scrape_fails_without_redis(app, client, auth_headers, monkeypatch):
+    """Test an unreachable Redis fails the scrape and keeps the observations"""
+    app.config['METRICS_TOKEN'] = 'secret'
+    client.get('/api/tasks/', headers=auth_headers)
+    metrics = get_request_metrics()
+    
+    def unavailable():
+        raise RedisError('down')
+    monkeypatch.setattr(app_package, 'redis_client', type('Down', (), {'pipeline': staticmethod(unavailable)})())
+    
+    assert scrape(client).status_code == 503
+    counts, _ = metrics.request_duration.take()['tasks.get_tasks']
+    assert sum(counts) == 1
+
+
+def test_slow_queries_are_logged(app, client, auth_headers, caplog):
+    """Test statements over SLOW_QUERY_MS are logged with their endpoint"""
+    app.config['SLOW_QUERY_MS'] = 1e-6
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/tasks/', headers=auth_headers)
+    
+    slow = [record.getMessage() for record in caplog.records if 'Slow query' in record.getMessage()]
+    assert slow and all('in tasks.get_tasks: SELECT' in message for message in slow)
+    
+    app.config['SLOW_QUERY_MS'] = 0
+    caplog.clear()
+    client.get('/api/tasks/', headers=auth_headers)
+    assert not any('Slow query' in record.getMessage() for record in caplog.records)
+
+
+def test_redis_commands_are_timed(app):
+    """Test Redis commands count towards the current request, failed ones too"""
+    redis = InstrumentedRedis(host='127.0.0.1', port=1, socket_connect_timeout=0.1)
+    with app.test_request_context():
+        g.request_stats = RequestStats()
+        with pytest.raises(RedisError):
+            redis.get('key')
+        assert current_stats().redis_count == 1
+        assert current_stats().redis_time > 0
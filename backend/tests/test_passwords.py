@@ -0,0 +1,69 @@
+"""
+Password hashing tests
+"""
+import threading
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User
+from app.utils import passwords
+
+
+def register(client):
+    client.post('/api/auth/register', json={
+        'email': 'hash@example.com', 'username': 'hasher', 'password': 'Test1234'
+    })
+    return User.query.filter_by(username='hasher').first()
+
+
+def login(client, password='Test1234'):
+    return client.post('/api/auth/login', json={'username': 'hasher', 'password': password})
+
+
+def test_configured_method_is_used(app, client):
+    """Test new hashes use PASSWORD_HASH_METHOD"""
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    user = register(client)
+    
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+    assert not user.password_needs_rehash()
+
+
+def test_default_parameters_match_stored_form(app, client):
+    """Test a method given without its cost parameters is not rehashed forever"""
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    user = register(client)
+    
+    assert not user.password_needs_rehash()
+
+
+def test_login_rehashes_outdated_hash(app, client):
+    """Test a successful login upgrades a hash made with other parameters"""
+    user = register(client)
+    user.password_hash = generate_password_hash('Test1234', 'pbkdf2:sha256:1000')
+    db.session.commit()
+    
+    assert login(client, 'wrong').status_code == 401
+    assert db.session.get(User, user.id).password_hash.startswith('pbkdf2:sha256:1000$')
+    
+    assert login(client).status_code == 200
+    upgraded = db.session.get(User, user.id)
+    assert upgraded.password_hash.startswith(f"{app.config['PASSWORD_HASH_METHOD']}$")
+    assert login(client).status_code == 200
+
+
+def test_hashing_runs_in_os_thread(app, monkeypatch):
+    """Test hashing leaves the calling thread when offloading is enabled"""
+    threads = []
+    
+    def hash_in_thread(password, method):
+        threads.append(threading.get_ident())
+        return generate_password_hash(password, method)
+    
+    monkeypatch.setattr(passwords, 'generate_password_hash', hash_in_thread)
+    app.config['PASSWORD_HASH_OFFLOAD'] = True
+    passwords.hash_password('secret')
+    app.config['PASSWORD_HASH_OFFLOAD'] = False
+    passwords.hash_password('secret')
+    
+    assert threads[0] != threading.get_ident()
+    assert threads[1] == threading.get_ident()
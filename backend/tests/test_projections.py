@@ -0,0 +1,97 @@
+"""
+Projection read path tests
+"""
+from datetime import datetime
+from app import db
+from app.models import Task, Tag, User
+from app.utils import serialization
+
+
+def test_task_list_matches_model_serialization(client, auth_headers, user_id):
+    """Test projected tasks serialize exactly like Task.to_dict()"""
+    client.post('/api/tasks/', headers=auth_headers, json={
+        'title': 'Task', 'description': 'Details', 'due_date': '2030-01-02T03:04:05', 'tags': ['b', 'a']
+    })
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Bare'})
+    
+    expected = {task['id']: task for task in Task.serialize_many(Task.query.filter_by(user_id=user_id).all())}
+    
+    for params in ({}, {'limit': 10}):
+        tasks = client.get('/api/tasks/', headers=auth_headers, query_string=params).get_json()['tasks']
+        assert {task['id']: task for task in tasks} == expected
+
+
+def test_users_and_tags_match_model_serialization(client, auth_headers):
+    """Test projected users and tags serialize like their to_dict()"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task', 'tags': ['work']})
+    
+    users = client.get('/api/users/', headers=auth_headers).get_json()
+    assert users['users'] == [user.to_dict() for user in User.query.all()]
+    assert (users['total'], users['pages'], users['current_page']) == (1, 1, 1)
+    
+    tags = client.get('/api/tasks/tags', headers=auth_headers).get_json()['tags']
+    assert tags == [tag.to_dict() for tag in Tag.query.all()]
+
+
+def test_user_pages_follow_paginate_arguments(client, auth_headers):
+    """Test out-of-range page arguments behave like Flask-SQLAlchemy paginate"""
+    for i in range(3):
+        db.session.add(User(email=f'u{i}@example.com', username=f'user{i}', password_hash='x'))
+    db.session.commit()
+    
+    data = client.get('/api/users/', headers=auth_headers, query_string={'per_page': 3, 'page': 2}).get_json()
+    assert (len(data['users']), data['total'], data['pages']) == (1, 4, 2)
+    
+    data = client.get('/api/users/', headers=auth_headers, query_string={'per_page': 0, 'page': 0}).get_json()
+    assert (len(data['users']), data['pages']) == (4, 1)
+
+
+def test_stdlib_fallback_encodes_like_orjson(monkeypatch):
+    """Test both encoders produce the same JSON for projected values"""
+    data = {'when': datetime(2024, 5, 6, 7, 8, 9, 123), 'none': None, 'tags': ['a'], 'ok': True}
+    fast = serialization.dumps(data)
+    
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert serialization.dumps(data) == fast
+
+
+def test_task_fields_are_pushed_down(client, auth_headers, count_queries):
+    """Test fields= selects only the named columns and skips the tag query"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task', 'description': 'Long', 'tags': ['a']})
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Other'})
+    
+    with count_queries() as queries:
+        response = client.get('/api/tasks/', headers=auth_headers, query_string={'fields': 'title,status'})
+    tasks = response.get_json()['tasks']
+    assert [sorted(task) for task in tasks] == [['id', 'status', 'title']] * 2
+    assert not any('description' in statement or 'task_tags' in statement for statement in queries.statements)
+    
+    tasks = client.get('/api/tasks/', headers=auth_headers, query_string={'fields': 'tags'}).get_json()['tasks']
+    assert sorted(task['tags'] for task in tasks) == [[], ['a']]
+
+
+def test_task_fields_with_cursor_pagination(client, auth_headers):
+    """Test cursor pages work when created_at is not among the fields"""
+    for i in range(3):
+        client.post('/api/tasks/', headers=auth_headers, json={'title': f'Task {i}'})
+    
+    page = client.get('/api/tasks/', headers=auth_headers, query_string={'fields': 'title', 'limit': 2}).get_json()
+    assert [sorted(task) for task in page['tasks']] == [['id', 'title']] * 2
+    
+    rest = client.get('/api/tasks/', headers=auth_headers, query_string={
+        'fields': 'title', 'limit': 2, 'cursor': page['next_cursor']
+    }).get_json()
+    assert [task['title'] for task in rest['tasks']] == ['Task 0']
+
+
+def test_unknown_fields_are_rejected(client, auth_headers):
+    """Test fields= only accepts serialized field names"""
+    response = client.get('/api/tasks/', headers=auth_headers, query_string={'fields': 'title,secret'})
+    assert response.status_code == 400
+    assert 'secret' in response.get_json()['error']
+    
+    response = client.get('/api/users/', headers=auth_headers, query_string={'fields': 'password_hash'})
+    assert response.status_code == 400
+    
+    users = client.get('/api/users/', headers=auth_headers, query_string={'fields': 'username'}).get_json()
+    assert users['users'] == [{'id': users['users'][0]['id'], 'username': 'owner'}]
@@ -0,0 +1,90 @@
+"""
+Query budget tests
+"""
+import logging
+import pytest
+from sqlalchemy import insert
+from app import db
+from app.models import Task, Tag, User
+from app.utils.query_budget import QueryBudgetExceeded, query_budget, statement_shape
+
+
+def add_view(app, rule, view):
+    app.add_url_rule(rule, view.__name__, view)
+
+
+def test_every_api_endpoint_has_a_budget(app):
+    """Test each route under /api declares its statement budget"""
+    missing = [
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.rule.startswith('/api/')
+        and not hasattr(app.view_functions[rule.endpoint], 'query_budget')
+    ]
+    assert missing == []
+
+
+def test_over_budget_raises_in_tests(app, client):
+    """Test a request running more statements than its budget fails the test"""
+    @query_budget(2)
+    def chatty():
+        for _ in range(3):
+            Task.query.count()
+        return 'ok'
+    
+    add_view(app, '/chatty', chatty)
+    with pytest.raises(QueryBudgetExceeded, match='chatty: 3 statements, budget 2'):
+        client.get('/chatty')
+
+
+def test_repeated_statements_are_flagged(app, client):
+    """Test lazy loads in a loop are reported as a probable N+1"""
+    user = User(email='owner@example.com', username='owner', password_hash='-')
+    db.session.add_all(Task(title=f'Task {i}', owner=user) for i in range(6))
+    db.session.commit()
+    
+    @query_budget(50)
+    def lazy_tags():
+        return {'tags': [task.tags.count() for task in Task.query.all()]}
+    
+    add_view(app, '/lazy-tags', lazy_tags)
+    with pytest.raises(QueryBudgetExceeded, match=r'probable N\+1, 6x: SELECT count\(\*\)'):
+        client.get('/lazy-tags')
+    
+    # A view can allow a statement to repeat
+    lazy_tags.query_repeat_limit = 10
+    assert client.get('/lazy-tags').status_code == 200
+
+
+def test_over_budget_is_logged_outside_tests(app, client, caplog):
+    """Test the default mode logs the violation and keeps the response"""
+    app.config['QUERY_BUDGET_MODE'] = 'log'
+    
+    @query_budget(0)
+    def one_query():
+        Task.query.count()
+        return 'ok'
+    
+    add_view(app, '/one-query', one_query)
+    with caplog.at_level(logging.WARNING):
+        assert client.get('/one-query').status_code == 200
+    assert 'Query budget exceeded in one_query: 1 statements, budget 0' in caplog.text
+
+
+def test_executemany_counts_once(app, client):
+    """Test a multi-row insert counts as one statement on every dialect"""
+    @query_budget(1)
+    def bulk_insert():
+        db.session.scalars(
+            insert(Tag).returning(Tag.id, sort_by_parameter_order=True),
+            [{'name': f'tag-{i}'} for i in range(20)]
+        ).all()
+        return 'ok'
+    
+    add_view(app, '/bulk-insert', bulk_insert)
+    assert client.get('/bulk-insert').status_code == 200
+
+
+def test_statement_shape_collapses_in_lists():
+    """Test IN lists of different lengths have one shape"""
+    assert statement_shape('SELECT 1\nFROM tags WHERE id IN (?, ?, ?)') == 'SELECT 1 FROM tags WHERE id IN (...)'
+    assert statement_shape('SELECT 1 FROM tags WHERE id IN (?, ?)') == 'SELECT 1 FROM tags WHERE id IN (...)'
@@ -0,0 +1,188 @@
+"""
+Query plan regression tests
+
+Seeds a task table, runs the read endpoints, and EXPLAINs every statement
+they issued. None of them may fall back to scanning a whole task table
+instead of seeking into an index.
+
+The suite normally runs on SQLite, with 5,000 tasks. SQLite picks plans
+by rule rather than by table statistics, so those checks hold at any size
+but say nothing about PostgreSQL. With DATABASE_URL pointing at an empty
+PostgreSQL database the same tests seed 200,000 tasks, ANALYZE them and
+check the Seq Scan nodes of the real plans; enable_seqscan is left on, so
+a sequential scan fails the test only where the planner itself prefers it.
+"""
+import json
+import re
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, insert, select, text
+from app import db
+from app.models import Task, Tag, User
+from app.models.task import task_tags
+from app.services.productivity import reconcile_daily_completions
+from app.services.task_stats import reconcile_task_stats
+
+# Tasks per user, by dialect: PostgreSQL's planner needs a realistic size
+# before an index beats a sequential scan
+SIZES = {'sqlite': (20, 250), 'postgresql': (200, 1000)}
+
+# Tables that grow with the number of tasks
+TASK_TABLES = ('tasks', 'task_tags', 'task_changes', 'user_task_stats', 'daily_completions')
+
+_SQLITE_SCAN = re.compile(r'^SCAN ({})\b'.format('|'.join(TASK_TABLES)))
+
+
+@pytest.fixture
+def seeded(app, client, auth_headers, user_id, fake_redis):
+    """A large task table, with the auth_headers user as one of many owners"""
+    users, tasks_per_user = SIZES[db.engine.dialect.name]
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@example.com', 'username': f'user{i}', 'password_hash': '-'}
+        for i in range(users - 1)
+    ])
+    owners = db.session.scalars(select(User.id)).all()
+    
+    statuses = ('pending', 'in_progress', 'completed', 'cancelled')
+    priorities = ('low', 'medium', 'high', 'urgent')
+    rows = []
+    for owner in owners:
+        for i in range(tasks_per_user):
+            status = statuses[i % 4]
+            rows.append({
+                'title': f'Task {i} of {owner}', 'description': 'seeded', 'user_id': owner,
+                'status': status, 'priority': priorities[i // 4 % 4],
+                'created_at': now - timedelta(hours=i), 'updated_at': now,
+                'completed_at': now - timedelta(days=i % 30) if status == 'completed' else None,
+                'due_date': now + timedelta(days=i % 20 - 10) if i % 3 == 0 else None,
+            })
+    db.session.execute(insert(Task.__table__), rows)
+    
+    db.session.execute(insert(Tag), [{'name': f'tag-{i}'} for i in range(50)])
+    tag_ids = db.session.scalars(select(Tag.id)).all()
+    task_ids = db.session.scalars(select(Task.id)).all()
+    db.session.execute(insert(task_tags), [
+        {'task_id': task_id, 'tag_id': tag_ids[(task_id + j) % len(tag_ids)]}
+        for task_id in task_ids for j in range(2)
+    ])
+    
+    # One change feed entry per task, as if each had been written once
+    db.session.execute(text(
+        'INSERT INTO task_changes (user_id, task_id, seq, deleted) '
+        'SELECT user_id, id, row_number() OVER (PARTITION BY user_id ORDER BY id), false FROM tasks'
+    ))
+    db.session.execute(text(
+        'INSERT INTO task_change_sequences (user_id, last_seq) '
+        'SELECT user_id, max(seq) FROM task_changes GROUP BY user_id'
+    ))
+    
+    reconcile_task_stats(fix=True)
+    reconcile_daily_completions(fix=True)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return {'tag_id': tag_ids[0], 'tasks_per_user': tasks_per_user}
+
+
+def capture_statements():
+    """Record (statement, parameters) of every query until the returned stop() is called"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def full_scans(statement, parameters):
+    """Task tables a statement reads in full, according to EXPLAIN"""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+            nodes = [json.loads(plan)[0]['Plan'] if isinstance(plan, str) else plan[0]['Plan']]
+            scans = []
+            while nodes:
+                node = nodes.pop()
+                if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in TASK_TABLES:
+                    scans.append(node['Relation Name'])
+                nodes.extend(node.get('Plans', []))
+            return scans
+        
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        return [row[-1] for row in rows if _SQLITE_SCAN.match(row[-1])]
+
+
+def assert_no_full_scans(client, headers, url, **params):
+    statements, stop = capture_statements()
+    try:
+        response = client.get(url, headers=headers, query_string=params)
+    finally:
+        stop()
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert statements
+    
+    for statement, parameters in statements:
+        scans = full_scans(statement, parameters)
+        assert not scans, f'{url} {params}: {scans} in\n{statement}'
+    return response
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'status': 'completed'},
+    {'priority': 'high'},
+    {'status': 'pending', 'priority': 'urgent'},
+    {'limit': 20, 'include_total': 'true'},
+    {'limit': 20, 'status': 'in_progress'},
+    {'search': 'task'},
+    {'fields': 'title,tags'},
+])
+def test_task_list_plans(client, auth_headers, seeded, params):
+    """Test every variant of the task list seeks into an index"""
+    response = assert_no_full_scans(client, auth_headers, '/api/tasks/', **params)
+    
+    cursor = response.get_json().get('next_cursor')
+    if cursor:
+        assert_no_full_scans(client, auth_headers, '/api/tasks/', cursor=cursor, **params)
+
+
+def test_task_detail_and_changes_plans(client, auth_headers, user_id, seeded):
+    """Test single-task and change feed reads seek into an index"""
+    task_id = db.session.scalar(select(Task.id).where(Task.user_id == user_id).limit(1))
+    assert_no_full_scans(client, auth_headers, f'/api/tasks/{task_id}')
+    
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'status': 'completed'})
+    assert_no_full_scans(client, auth_headers, '/api/tasks/changes', since=0)
+
+
+def test_analytics_plans(client, auth_headers, seeded):
+    """Test the dashboard's time windows and the productivity series use indexes"""
+    response = assert_no_full_scans(client, auth_headers, '/api/analytics/dashboard')
+    assert response.get_json()['total_tasks'] == seeded['tasks_per_user']
+    assert_no_full_scans(client, auth_headers, '/api/analytics/productivity', granularity='week')
+
+
+def statement_scans(statement):
+    """Full task table scans in the plan of a select, as executed on this database"""
+    statements, stop = capture_statements()
+    try:
+        db.session.execute(statement).all()
+    finally:
+        stop()
+    assert len(statements) == 1
+    return full_scans(*statements[0])
+
+
+def test_full_scans_are_detected(seeded):
+    """Test the plan check itself reports a scan, so passing tests mean something"""
+    assert statement_scans(select(Task.id).where(Task.description == 'seeded')) == [
+        'tasks' if db.engine.dialect.name == 'postgresql' else 'SCAN tasks'
+    ]
+
+
+def test_tag_reverse_lookup_plan(seeded):
+    """Test finding the tasks of a tag does not scan task_tags"""
+    assert not statement_scans(select(task_tags.c.task_id).where(task_tags.c.tag_id == seeded['tag_id']))
@@ -0,0 +1,116 @@
+"""
+Read replica routing tests, with two SQLite files as primary and replica
+"""
+import pytest
+from sqlalchemy import insert, text
+import app as app_package
+from app import create_app, db
+from app.models import Task
+from app.utils.replica import get_replica_router
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch, fake_redis):
+    """Application with a separate replica database holding the same schema"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setenv('DATABASE_REPLICA_URL', f"sqlite:///{tmp_path / 'replica.db'}")
+    app = create_app()
+    monkeypatch.setattr(app_package, 'redis_client', fake_redis)
+    app.config['TESTING'] = True
+    app.config['JWT_BLOCKLIST_SUBSCRIBE'] = False
+    app.config['TASK_EVENT_WINDOW'] = 60
+    
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(get_replica_router().engine)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def replica_client(replica_app):
+    return replica_app.test_client()
+
+
+def register(client):
+    response = client.post('/api/auth/register', json={
+        'email': 'owner@example.com', 'username': 'owner', 'password': 'Test1234'
+    })
+    token = response.get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}, response.get_json()['user']['id']
+
+
+def add_replica_task(user_id, title):
+    with get_replica_router().engine.begin() as conn:
+        conn.execute(insert(Task), {'title': title, 'user_id': user_id, 'status': 'pending'})
+
+
+def forget_writes(fake_redis):
+    get_replica_router()._recent_writers.clear()
+    fake_redis.store.clear()
+
+
+def titles(client, headers):
+    return [task['title'] for task in client.get('/api/tasks/', headers=headers).get_json()['tasks']]
+
+
+def test_list_reads_go_to_replica(replica_client, fake_redis):
+    """Test list endpoints read the replica once no recent write pins the user"""
+    headers, user_id = register(replica_client)
+    add_replica_task(user_id, 'Only on replica')
+    forget_writes(fake_redis)
+    
+    assert titles(replica_client, headers) == ['Only on replica']
+    # Endpoints without @replica_reads keep using the primary
+    assert replica_client.get('/api/tasks/1', headers=headers).status_code == 404
+
+
+def test_recent_writers_read_from_primary(replica_client, fake_redis):
+    """Test a user sees their own write until the sticky window ends"""
+    headers, user_id = register(replica_client)
+    forget_writes(fake_redis)
+    
+    replica_client.post('/api/tasks/', headers=headers, json={'title': 'Fresh'})
+    assert titles(replica_client, headers) == ['Fresh']
+    assert any(key.startswith('replica:recent_write:') for key in fake_redis.store)
+    
+    forget_writes(fake_redis)
+    assert titles(replica_client, headers) == []
+
+
+def test_unhealthy_replica_falls_back_to_primary(replica_app, replica_client, fake_redis, tmp_path):
+    """Test reads use the primary while the replica fails its health check"""
+    headers, user_id = register(replica_client)
+    replica_client.post('/api/tasks/', headers=headers, json={'title': 'Primary'})
+    forget_writes(fake_redis)
+    
+    router = get_replica_router()
+    router.engine = db.create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router._next_check = 0
+    
+    assert titles(replica_client, headers) == ['Primary']
+    assert router.healthy is False
+
+
+def test_replica_failure_mid_request_retries_on_primary(replica_client, fake_redis):
+    """Test a replica error during a view re-runs it on the primary"""
+    headers, user_id = register(replica_client)
+    replica_client.post('/api/tasks/', headers=headers, json={'title': 'Primary'})
+    forget_writes(fake_redis)
+    with get_replica_router().engine.begin() as conn:
+        conn.execute(text('DROP TABLE tasks'))
+    
+    assert titles(replica_client, headers) == ['Primary']
+    assert get_replica_router().healthy is False
+
+
+def test_dashboard_reads_primary_and_caches(replica_client, fake_redis):
+    """Test the cached dashboard never comes from a lagging replica"""
+    headers, user_id = register(replica_client)
+    replica_client.post('/api/tasks/', headers=headers, json={'title': 'Primary'})
+    forget_writes(fake_redis)
+    
+    stats = replica_client.get('/api/analytics/dashboard', headers=headers).get_json()
+    assert stats['total_tasks'] == 1
+    assert f'analytics:dashboard:{user_id}' in fake_redis.store
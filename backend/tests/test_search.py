@@ -0,0 +1,62 @@
+"""
+Full-text search tests
+"""
+
+
+def create(client, headers, **fields):
+    return client.post('/api/tasks/', headers=headers, json=fields).get_json()['task']['id']
+
+
+def search(client, headers, term):
+    response = client.get(f'/api/tasks/?search={term}', headers=headers)
+    assert response.status_code == 200
+    return [task['id'] for task in response.get_json()['tasks']]
+
+
+def test_search_matches_title_and_description(client, auth_headers):
+    """Test search covers both title and description, with prefix matching"""
+    in_title = create(client, auth_headers, title='Quarterly report')
+    in_description = create(client, auth_headers, title='Send email', description='attach the report')
+    create(client, auth_headers, title='Unrelated chore')
+    
+    assert sorted(search(client, auth_headers, 'report')) == sorted([in_title, in_description])
+    assert search(client, auth_headers, 'quart') == [in_title]
+    assert search(client, auth_headers, 'report email') == [in_description]
+
+
+def test_search_ranks_title_matches_first(client, auth_headers):
+    """Test relevance ranking prefers title matches over description matches"""
+    in_description = create(client, auth_headers, title='Call Bob', description='about the budget')
+    in_title = create(client, auth_headers, title='Budget review')
+    
+    assert search(client, auth_headers, 'budget') == [in_title, in_description]
+
+
+def test_search_index_follows_updates_and_deletes(client, auth_headers):
+    """Test the index is kept in sync on update and delete"""
+    task_id = create(client, auth_headers, title='Buy milk')
+    
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'title': 'Buy bread'})
+    assert search(client, auth_headers, 'milk') == []
+    assert search(client, auth_headers, 'bread') == [task_id]
+    
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert search(client, auth_headers, 'bread') == []
+
+
+def test_search_is_scoped_to_user(client, auth_headers):
+    """Test other users' tasks never show up in search results"""
+    create(client, auth_headers, title='Private plan')
+    token = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()['access_token']
+    
+    assert search(client, {'Authorization': f'Bearer {token}'}, 'private') == []
+
+
+def test_search_ignores_query_syntax(client, auth_headers):
+    """Test punctuation in the search term cannot break the query"""
+    task_id = create(client, auth_headers, title='Fix "quotes" handling')
+    
+    assert search(client, auth_headers, '"quotes*') == [task_id]
+    assert search(client, auth_headers, '***') == [task_id]
@@ -0,0 +1,94 @@
+"""
+Socket.IO connection tests
+"""
+from app import db, socketio
+from app.models import User
+from app.services.events import get_task_events
+
+
+def connect(app, token=None, **kwargs):
+    return socketio.test_client(app, auth={'token': token} if token else None, **kwargs)
+
+
+def test_connect_requires_valid_token(app):
+    """Test connections without a valid access token are refused"""
+    assert not connect(app).is_connected()
+    assert not connect(app, 'garbage').is_connected()
+
+
+def test_connect_joins_user_room(app, client, auth_headers, user_id):
+    """Test a connection receives its user's task events and nobody else's"""
+    token = auth_headers['Authorization'].split()[1]
+    mine = connect(app, token)
+    other_token = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()['access_token']
+    other = connect(app, other_token)
+    assert mine.is_connected() and other.is_connected()
+    
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Task'})
+    get_task_events().flush()
+    
+    received = mine.get_received()
+    assert [event['name'] for event in received] == ['tasks_changed']
+    assert received[0]['args'][0]['created'][0]['title'] == 'Task'
+    assert other.get_received() == []
+
+
+def test_long_polling_is_not_offered(client):
+    """Test the handshake refuses long-polling, which breaks across workers"""
+    response = client.get('/socket.io/', query_string={'EIO': 4, 'transport': 'polling'})
+    assert response.status_code == 400
+    assert b'Invalid transport' in response.get_data()
+
+
+def test_query_string_token_is_refused(app, auth_headers):
+    """Test tokens are only accepted from the auth payload, never the URL"""
+    token = auth_headers['Authorization'].split()[1]
+    assert not connect(app, query_string=f'token={token}').is_connected()
+
+
+def test_revoked_token_is_refused(app, client, auth_headers):
+    """Test a token revoked by logout can no longer connect"""
+    client.post('/api/auth/logout', headers=auth_headers)
+    assert not connect(app, auth_headers['Authorization'].split()[1]).is_connected()
+
+
+def test_presence_counts_connections(app, client, auth_headers, user_id, fake_redis):
+    """Test presence follows connects and disconnects"""
+    token = auth_headers['Authorization'].split()[1]
+    
+    def presence():
+        return client.get(f'/api/users/{user_id}/presence', headers=auth_headers).get_json()
+    
+    assert presence() == {'user_id': user_id, 'online': False, 'connections': 0}
+    first, second = connect(app, token), connect(app, token)
+    assert presence()['connections'] == 2
+    
+    first.disconnect()
+    assert presence()['connections'] == 1
+    second.disconnect()
+    assert presence() == {'user_id': user_id, 'online': False, 'connections': 0}
+
+
+def test_presence_ignores_dead_workers(app, client, auth_headers, user_id, fake_redis):
+    """Test counts left behind by a worker without a heartbeat are not counted"""
+    connect(app, auth_headers['Authorization'].split()[1])
+    fake_redis.hincrby(f'presence:{user_id}', 'crashed-worker', 3)
+    
+    response = client.get(f'/api/users/{user_id}/presence', headers=auth_headers)
+    assert response.get_json()['connections'] == 1
+
+
+def test_presence_of_others_is_admin_only(client, auth_headers, user_id, fake_redis):
+    """Test users can read their own presence, and only admins anyone's"""
+    other = client.post('/api/auth/register', json={
+        'email': 'other@example.com', 'username': 'other', 'password': 'Test1234'
+    }).get_json()
+    other_headers = {'Authorization': f"Bearer {other['access_token']}"}
+    
+    assert client.get(f'/api/users/{user_id}/presence', headers=other_headers).status_code == 403
+    
+    db.session.get(User, other['user']['id']).is_admin = True
+    db.session.commit()
+    assert client.get(f'/api/users/{user_id}/presence', headers=other_headers).status_code == 200
@@ -0,0 +1,84 @@
+"""
+Tag resolution tests
+"""
+from datetime import datetime
+from app import db
+from app.models import Task, Tag
+from app.models.task import task_tags
+from app.services.tags import TagCache, _insert_tags, resolve_tag_ids, sync_task_tags
+
+
+def test_resolve_creates_missing_tags_once(app, count_queries):
+    """Test missing tags are created with one insert and reused afterwards"""
+    db.session.add(Tag(name='existing'))
+    db.session.commit()
+    
+    with count_queries() as queries:
+        tag_ids = resolve_tag_ids(['existing', 'new-a', 'new-b'])
+    db.session.commit()
+    
+    assert queries.count == 3
+    assert sorted(tag_ids) == ['existing', 'new-a', 'new-b']
+    assert Tag.query.count() == 3
+    assert resolve_tag_ids(['new-a']) == {'new-a': tag_ids['new-a']}
+
+
+def test_resolve_tolerates_concurrently_created_tags(app):
+    """Test a tag created by another transaction does not break the insert"""
+    db.session.add(Tag(name='racy'))
+    db.session.commit()
+    
+    _insert_tags({'racy', 'fresh'})
+    db.session.commit()
+    
+    assert sorted(name for name, in db.session.query(Tag.name)) == ['fresh', 'racy']
+
+
+def test_resolve_serves_known_tags_from_cache(app, count_queries):
+    """Test committed tags are answered without touching the database"""
+    db.session.add(Tag(name='cached'))
+    db.session.commit()
+    resolve_tag_ids(['cached'])
+    
+    with count_queries() as queries:
+        resolve_tag_ids(['cached'])
+    
+    assert queries.count == 0
+
+
+def test_tag_cache_is_bounded():
+    """Test the cache evicts the least recently used names"""
+    cache = TagCache(max_size=2)
+    cache.put_many({'a': 1, 'b': 2})
+    cache.get_many(['a'])
+    cache.put_many({'c': 3})
+    
+    assert len(cache) == 2
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+
+def test_sync_only_writes_the_difference(app, user_id):
+    """Test unchanged associations are left alone when tags change"""
+    task = Task(title='Tagged', user_id=user_id)
+    db.session.add(task)
+    db.session.flush()
+    sync_task_tags({task.id: ['keep', 'drop']}, new_task_ids=[task.id])
+    db.session.execute(task_tags.update().values(created_at=datetime(2024, 1, 1)))
+    db.session.commit()
+    
+    sync_task_tags({task.id: ['keep', 'add']})
+    db.session.commit()
+    
+    rows = db.session.query(Tag.name, task_tags.c.created_at).join(
+        task_tags, task_tags.c.tag_id == Tag.id
+    ).filter(task_tags.c.task_id == task.id).order_by(Tag.name).all()
+    assert [name for name, _ in rows] == ['add', 'keep']
+    assert rows[1].created_at == datetime(2024, 1, 1)
+
+
+def test_update_rejects_malformed_tags(client, auth_headers):
+    """Test the tags payload must be a list of strings"""
+    task_id = client.post('/api/tasks/', headers=auth_headers, json={'title': 'x'}).get_json()['task']['id']
+    
+    response = client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'tags': 'work'})
+    assert response.status_code == 400
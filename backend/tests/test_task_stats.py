@@ -0,0 +1,50 @@
+"""
+Per-user task counter tests
+"""
+from app import db
+from app.models import Task
+from app.services.task_stats import compute_task_stats, get_task_stats, reconcile_task_stats
+
+
+def test_counters_follow_every_write_path(client, auth_headers, user_id):
+    """Test counters match a recount after creates, updates, deletes and batches"""
+    first = client.post('/api/tasks/', headers=auth_headers, json={
+        'title': 'First', 'priority': 'high', 'due_date': '2030-01-01T00:00:00Z'
+    }).get_json()['task']['id']
+    second = client.post('/api/tasks/', headers=auth_headers, json={'title': 'Second'}).get_json()['task']['id']
+    client.put(f'/api/tasks/{first}', headers=auth_headers, json={'status': 'completed'})
+    client.delete(f'/api/tasks/{second}', headers=auth_headers)
+    client.post('/api/tasks/batch', headers=auth_headers, json={'operations': [
+        {'op': 'create', 'data': {'title': 'Third', 'status': 'in_progress', 'due_date': '2030-01-01'}},
+        {'op': 'update', 'id': first, 'data': {'status': 'pending', 'priority': 'low'}},
+    ]})
+    
+    assert get_task_stats(user_id) == {
+        'total': 2,
+        'status:pending': 1,
+        'status:in_progress': 1,
+        'status:completed': 0,
+        'priority:high': 0,
+        'priority:medium': 1,
+        'priority:low': 1,
+        'open_with_due_date': 2,
+    }
+    assert {k: v for k, v in get_task_stats(user_id).items() if v} == compute_task_stats()[user_id]
+
+
+def test_reconcile_reports_and_repairs_drift(app, client, auth_headers, user_id):
+    """Test reconciliation rebuilds counters after writes that bypassed them"""
+    client.post('/api/tasks/', headers=auth_headers, json={'title': 'Tracked'})
+    db.session.add(Task(title='Untracked', user_id=user_id, status='completed'))
+    db.session.commit()
+    
+    drift = reconcile_task_stats(fix=False)
+    assert (user_id, 'total', 1, 2) in drift
+    assert (user_id, 'status:completed', 0, 1) in drift
+    
+    result = app.test_cli_runner().invoke(args=['reconcile-task-stats'])
+    assert result.exit_code == 0
+    assert '3 drifted counter(s), 0 drifted day(s) rebuilt' in result.output
+    
+    assert reconcile_task_stats(fix=False) == []
+    assert client.get('/api/analytics/dashboard', headers=auth_headers).get_json()['total_tasks'] == 2
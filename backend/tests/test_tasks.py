@@ -0,0 +1,116 @@
+"""
+Task endpoint tests
+"""
+from datetime import datetime
+from datetime import datetime
+from app import db
+from app.models import Task, Tag
+
+
+def seed_tasks(user_id, count, tags_per_task=3):
+    """Insert tasks with tags directly through the ORM"""
+    tags = [Tag(name=f'tag-{i}') for i in range(tags_per_task)]
+    db.session.add_all(tags)
+    for i in range(count):
+        task = Task(title=f'Task {i}', user_id=user_id)
+        for tag in tags:
+            task.tags.append(tag)
+        db.session.add(task)
+    db.session.commit()
+
+
+def test_create_task_returns_tags(client, auth_headers):
+    """Test task creation serializes its tags"""
+    response = client.post('/api/tasks/', headers=auth_headers, json={
+        'title': 'Write tests',
+        'tags': ['work', 'urgent']
+    })
+    
+    assert response.status_code == 201
+    assert sorted(response.get_json()['task']['tags']) == ['urgent', 'work']
+
+
+def test_update_task_replaces_tags(client, auth_headers):
+    """Test updating tags is reflected in the task detail"""
+    task_id = client.post('/api/tasks/', headers=auth_headers, json={
+        'title': 'Write tests',
+        'tags': ['work']
+    }).get_json()['task']['id']
+    
+    response = client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={
+        'tags': ['home', 'errands']
+    })
+    assert response.status_code == 200
+    assert response.get_json()['task']['tags'] == ['errands', 'home']
+    
+    response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert response.get_json()['task']['tags'] == ['errands', 'home']
+
+
+def test_list_tasks_query_count_is_constant(client, auth_headers, user_id, count_queries):
+    """Test listing tasks does not issue a tags query per task"""
+    seed_tasks(user_id, 50)
+    
+    with count_queries() as small:
+        response = client.get('/api/tasks/?per_page=5', headers=auth_headers)
+    assert len(response.get_json()['tasks']) == 5
+    
+    with count_queries() as large:
+        response = client.get('/api/tasks/?per_page=50', headers=auth_headers)
+    tasks = response.get_json()['tasks']
+    assert len(tasks) == 50
+    assert all(task['tags'] == ['tag-0', 'tag-1', 'tag-2'] for task in tasks)
+    
+    assert small.count == large.count
+
+
+def test_cursor_pagination_walks_all_tasks(client, auth_headers, user_id):
+    """Test keyset pagination returns every task exactly once, newest first"""
+    seed_tasks(user_id, 25, tags_per_task=0)
+    # Force ties on created_at so ordering relies on the id tiebreaker
+    Task.query.filter(Task.id <= 10).update({'created_at': datetime(2024, 1, 1)})
+    db.session.commit()
+    
+    seen = []
+    response = client.get('/api/tasks/?limit=10', headers=auth_headers).get_json()
+    assert 'total' not in response
+    while True:
+        seen.extend(task['id'] for task in response['tasks'])
+        if not response['next_cursor']:
+            break
+        response = client.get(
+            f"/api/tasks/?limit=10&cursor={response['next_cursor']}", headers=auth_headers
+        ).get_json()
+    
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    assert seen[-10:] == list(range(10, 0, -1))
+
+
+def test_cursor_pagination_counts_only_on_request(client, auth_headers, user_id, count_queries):
+    """Test the total is only counted when include_total is set"""
+    seed_tasks(user_id, 5, tags_per_task=0)
+    
+    with count_queries() as queries:
+        client.get('/api/tasks/?limit=2', headers=auth_headers)
+    assert not any('count(' in statement.lower() for statement in queries.statements)
+    
+    response = client.get('/api/tasks/?limit=2&include_total=true', headers=auth_headers)
+    assert response.get_json()['total'] == 5
+
+
+def test_cursor_pagination_rejects_bad_cursor(client, auth_headers):
+    """Test a malformed cursor is a client error"""
+    response = client.get('/api/tasks/?cursor=not-a-cursor', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_page_pagination_still_supported(client, auth_headers, user_id):
+    """Test the page/per_page contract is unchanged"""
+    seed_tasks(user_id, 5, tags_per_task=0)
+    
+    data = client.get('/api/tasks/?page=2&per_page=2', headers=auth_headers).get_json()
+    assert data['total'] == 5
+    assert data['pages'] == 3
+    assert data['current_page'] == 2
+    assert len(data['tasks']) == 2
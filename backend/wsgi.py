@@ -1,9 +1,13 @@
 """
 WSGI entry point
+
+Production runs under gunicorn (``gunicorn -c gunicorn.conf.py wsgi:app``);
+running this file starts the single-process development server.
 """
+import os
 from app import create_app, socketio
 
 app = create_app()
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    socketio.run(app, debug=os.getenv('FLASK_ENV', 'development') == 'development', host='0.0.0.0', port=5000)